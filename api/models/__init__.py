@@ -6,7 +6,7 @@ API層 - データモデル
 """
 
 from .requests import ChatRequest, ProgressUpdate, InventoryRequest, HealthRequest, RecipeAdoptionRequest, RecipeItem, MenuSaveRequest, CSVUploadError, CSVUploadResponse, OCRReceiptItem, OCRReceiptResponse, IngredientDeleteItem, IngredientDeleteRequest, OCRMappingRequest, OCRMappingResponse
-from .responses import ChatResponse, HealthResponse, InventoryResponse, InventoryListResponse, InventoryItemResponse, ErrorResponse, SSEEvent, RecipeAdoptionResponse, SavedRecipe, SavedMenuRecipe, MenuSaveResponse, HistoryRecipe, HistoryEntry, MenuHistoryResponse, IngredientDeleteCandidate, IngredientDeleteCandidatesResponse, IngredientDeleteResponse
+from .responses import ChatResponse, HealthResponse, InventoryResponse, InventoryListResponse, InventoryItemResponse, ErrorResponse, SSEEvent, RecipeAdoptionResponse, SavedRecipe, SavedMenuRecipe, MenuSaveResponse, HistoryRecipe, HistoryEntry, MenuHistoryResponse, IngredientDeleteCandidate, IngredientDeleteCandidatesResponse, IngredientDeleteResult, IngredientDeleteResponse
 
 __all__ = [
     'ChatRequest',
@@ -38,6 +38,7 @@ __all__ = [
     'IngredientDeleteCandidatesResponse',
     'IngredientDeleteItem',
     'IngredientDeleteRequest',
+    'IngredientDeleteResult',
     'IngredientDeleteResponse',
     'OCRMappingRequest',
     'OCRMappingResponse'
@@ -132,6 +132,7 @@ class MenuHistoryResponse(BaseModel):
     """献立履歴レスポンス"""
     success: bool = Field(..., description="処理成功フラグ")
     data: List[HistoryEntry] = Field(..., description="日付別の履歴エントリリスト")
+    next_cursor: Optional[str] = Field(None, description="次ページ取得用のカーソル（次ページがない場合はNone）")
 
 class IngredientDeleteCandidate(BaseModel):
     """削除候補食材"""
@@ -148,9 +149,19 @@ class IngredientDeleteCandidatesResponse(BaseModel):
     candidates: List[IngredientDeleteCandidate] = Field(..., description="削除候補食材リスト")
 
 
+class IngredientDeleteResult(BaseModel):
+    """食材削除の在庫ごとの結果"""
+    item_name: str = Field(..., description="食材名（リクエストの指定）")
+    inventory_id: Optional[str] = Field(None, description="在庫ID（在庫が見つからない場合はNone）")
+    quantity: float = Field(..., description="更新後の数量（0で削除）")
+    status: str = Field(..., description="結果（deleted / updated / failed）")
+    error: Optional[str] = Field(None, description="失敗理由")
+
+
 class IngredientDeleteResponse(BaseModel):
     """食材削除レスポンス"""
     success: bool = Field(..., description="処理成功フラグ")
     deleted_count: int = Field(..., description="削除件数（数量が0に設定された件数）")
     updated_count: int = Field(..., description="更新件数（数量が0以外に更新された件数）")
     failed_items: List[str] = Field(default_factory=list, description="失敗した食材リスト")
+    results: List[IngredientDeleteResult] = Field(default_factory=list, description="在庫ごとの結果")
@@ -14,8 +14,10 @@ from config.loggers import GenericLogger
 from ..models import ChatRequest, ChatResponse, ProgressUpdate
 from ..utils.sse_manager import get_sse_sender
 from core.agent import TrueReactAgent
+from core.models import RequestContext
 from ..request_models import UserSelectionRequest
 from ..utils.auth_handler import get_auth_handler
+from ..utils.agent_provider import get_agent
 
 
 async def verify_token_dependency(request: Request):
@@ -37,7 +39,7 @@ logger = GenericLogger("api", "chat")
 
 
 @router.post("/chat")
-async def chat(request: ChatRequest, http_request: Request):
+async def chat(request: ChatRequest, http_request: Request, agent: TrueReactAgent = Depends(get_agent)):
     """AIエージェントとの対話"""
     try:
         # リクエストボディからconfirmを取得（プロキシ問題回避）
@@ -96,9 +98,6 @@ async def chat(request: ChatRequest, http_request: Request):
         # SSEセッションIDの生成（提供されていない場合）
         sse_session_id = request.sse_session_id or str(uuid.uuid4())
         
-        # TrueReactAgentの初期化と実行
-        agent = TrueReactAgent()
-        
         # Phase 3C-3: 次の段階のリクエストがセッションに保存されている場合はそれを使用
         from services.session_service import session_service
         session = await session_service.get_session(sse_session_id, user_id)
@@ -117,9 +116,7 @@ async def chat(request: ChatRequest, http_request: Request):
                     # 見つかったセッションIDを使って次の段階のリクエストを実行
                     response_data = await agent.process_request(
                         next_stage_request,
-                        user_id,
-                        token=token,
-                        sse_session_id=session_id,
+                        RequestContext(user_id, token, session_id),
                         is_confirmation_response=False
                     )
                     break
@@ -139,9 +136,7 @@ async def chat(request: ChatRequest, http_request: Request):
                 # 次の段階のリクエストを実行
                 response_data = await agent.process_request(
                     next_stage_request,
-                    user_id,
-                    token=token,
-                    sse_session_id=sse_session_id,
+                    RequestContext(user_id, token, sse_session_id),
                     is_confirmation_response=False
                 )
             elif is_whitespace_only:
@@ -155,9 +150,7 @@ async def chat(request: ChatRequest, http_request: Request):
                 # 通常のリクエストの処理
                 response_data = await agent.process_request(
                     request.message, 
-                    user_id,
-                    token=token,
-                    sse_session_id=sse_session_id,
+                    RequestContext(user_id, token, sse_session_id),
                     is_confirmation_response=actual_confirm
                 )
         else:
@@ -171,9 +164,7 @@ async def chat(request: ChatRequest, http_request: Request):
             # 通常のリクエストの処理
             response_data = await agent.process_request(
                 request.message, 
-                user_id,
-                token=token,
-                sse_session_id=sse_session_id,
+                RequestContext(user_id, token, sse_session_id),
                 is_confirmation_response=actual_confirm
             )
         
@@ -368,7 +359,8 @@ def _create_sse_event(event_type: str, data: Dict[str, Any]) -> str:
 @router.post("/chat/selection")
 async def receive_user_selection(
     selection_request: UserSelectionRequest,
-    http_request: Request
+    http_request: Request,
+    agent: TrueReactAgent = Depends(get_agent)
 ):
     """ユーザーの選択結果を受信"""
     try:
@@ -392,8 +384,7 @@ async def receive_user_selection(
         
         logger.info(f"📥 [API] Received user selection: task_id={selection_request.task_id}, selection={selection_request.selection}")
         
-        # エージェントで選択結果を処理
-        agent = TrueReactAgent()
+        # エージェントで選択結果を処理（共有エージェント）
         result = await agent.process_user_selection(
             selection_request.task_id,
             selection_request.selection,
@@ -5,12 +5,17 @@ API層 - ヘルスチェックルート
 サービス状態の確認とヘルスチェック
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from datetime import datetime
 from typing import Dict, Any
 from config.loggers import GenericLogger
 from ..models.requests import HealthRequest
 from ..models.responses import HealthResponse
+from ..utils.agent_provider import get_agent
+from ..utils.history_writer import get_history_writer
+from mcp_servers.supabase_pool import get_supabase_pool
+from mcp_servers.ocr_mapping_cache import get_ocr_mapping_cache
+from mcp_servers.embedding_cache import get_embedding_cache
 
 router = APIRouter()
 logger = GenericLogger("api", "health")
@@ -38,7 +43,7 @@ async def health_check():
 
 
 @router.post("/health", response_model=HealthResponse)
-async def detailed_health_check(request: HealthRequest):
+async def detailed_health_check(request: HealthRequest, http_request: Request):
     """詳細なヘルスチェック"""
     try:
         logger.info("🔍 [API] Detailed health check requested")
@@ -53,7 +58,7 @@ async def detailed_health_check(request: HealthRequest):
         
         # サービス状態の確認が要求された場合
         if request.check_services:
-            services_status = await _check_services_status()
+            services_status = await _check_services_status(http_request)
             health_info["services"] = services_status
         
         response = HealthResponse(**health_info)
@@ -66,35 +71,49 @@ async def detailed_health_check(request: HealthRequest):
         raise HTTPException(status_code=500, detail="詳細ヘルスチェックに失敗しました")
 
 
-async def _check_services_status() -> Dict[str, Any]:
-    """各サービスの状態を確認"""
+async def _check_services_status(http_request: Request) -> Dict[str, Any]:
+    """各サービスの状態を確認（共有エージェントのサービスグラフを確認）"""
     try:
         services_status = {}
+        agent = None
+        tool_router = None
         
         # Core層の状態確認
         try:
-            from core.agent import TrueReactAgent
-            agent = TrueReactAgent()
+            agent = get_agent(http_request)
             services_status["core"] = {"status": "healthy", "message": "Core layer is operational"}
         except Exception as e:
             services_status["core"] = {"status": "unhealthy", "message": str(e)}
         
         # Service層の状態確認
         try:
-            from services.tool_router import ToolRouter
-            tool_router = ToolRouter()
+            tool_router = agent.service_coordinator.tool_router
             services_status["services"] = {"status": "healthy", "message": "Service layer is operational"}
         except Exception as e:
             services_status["services"] = {"status": "unhealthy", "message": str(e)}
         
         # MCP層の状態確認
         try:
-            from mcp_servers.client import MCPClient
-            mcp_client = MCPClient()
+            mcp_client = tool_router.mcp_client
             services_status["mcp"] = {"status": "healthy", "message": "MCP layer is operational"}
         except Exception as e:
             services_status["mcp"] = {"status": "unhealthy", "message": str(e)}
         
+        # タスク分解テンプレートキャッシュ・在庫操作高速パス・在庫先読みのメトリクス
+        if agent is not None:
+            services_status["plan_cache"] = agent.llm_service.plan_cache.get_stats()
+            services_status["inventory_fast_path"] = dict(agent.llm_service.inventory_fast_path.stats)
+            services_status["inventory_prefetch"] = agent.inventory_prefetcher.get_stats()
+        
+        # Supabase接続プールの統計（接続の再利用率）
+        services_status["supabase_pool"] = get_supabase_pool().get_stats()
+        # OCR変換テーブルキャッシュの統計
+        services_status["ocr_mapping_cache"] = get_ocr_mapping_cache().get_stats()
+        # RAG検索の埋め込みキャッシュの統計
+        services_status["embedding_cache"] = get_embedding_cache().get_stats()
+        # レシピ履歴write-behindの統計
+        services_status["history_writer"] = get_history_writer().get_stats()
+        
         return services_status
         
     except Exception as e:
@@ -5,13 +5,14 @@ API層 - 在庫ルート
 在庫管理のエンドポイント（一覧取得、CRUD操作）
 """
 
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
 from typing import Dict, Any, Optional, Tuple
 import os
 from config.loggers import GenericLogger
 from ..models import InventoryResponse, InventoryListResponse, InventoryItemResponse, InventoryRequest, CSVUploadResponse, OCRReceiptResponse, OCRMappingRequest, OCRMappingResponse
 from mcp_servers.inventory_crud import InventoryCRUD
 from mcp_servers.utils import get_authenticated_client
+from ..utils.csv_importer import CSVInventoryImporter
 
 router = APIRouter()
 logger = GenericLogger("api", "inventory")
@@ -247,9 +248,10 @@ async def delete_inventory_item(item_id: str, http_request: Request):
 @router.post("/inventory/upload-csv", response_model=CSVUploadResponse)
 async def upload_csv_inventory(
     file: UploadFile = File(...),
+    sse_session_id: Optional[str] = Form(None),
     http_request: Request = None
 ):
-    """CSVファイルから在庫データを一括登録"""
+    """CSVファイルから在庫データを一括登録（sse_session_id指定時は進捗をSSEで通知）"""
     try:
         logger.info(f"🔍 [API] CSV upload request received: {file.filename}")
         
@@ -268,125 +270,20 @@ async def upload_csv_inventory(
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="CSVファイルのみアップロード可能です")
         
-        # ファイルサイズチェック（10MB制限）
-        file_content = await file.read()
-        if len(file_content) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="ファイルサイズは10MB以下にしてください")
-        
-        # 3. CSV解析
-        import csv
-        import io
-        from datetime import datetime
-        
-        # エンコーディング検出（UTF-8/BOM付き対応）
-        try:
-            text = file_content.decode('utf-8-sig')
-        except:
-            text = file_content.decode('utf-8')
-        
-        csv_reader = csv.DictReader(io.StringIO(text))
-        
-        # 4. データバリデーションと変換
-        items = []
-        validation_errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):  # ヘッダー行を除くため2から開始
-            try:
-                # 必須項目チェック
-                if not row.get('item_name') or not row.get('item_name').strip():
-                    validation_errors.append({
-                        "row": row_num,
-                        "item_name": row.get('item_name', ''),
-                        "error": "アイテム名は必須です"
-                    })
-                    continue
-                
-                if not row.get('quantity'):
-                    validation_errors.append({
-                        "row": row_num,
-                        "item_name": row.get('item_name', ''),
-                        "error": "数量は必須です"
-                    })
-                    continue
-                
-                # 数量の型変換と検証
-                try:
-                    quantity = float(row['quantity'])
-                    if quantity <= 0:
-                        validation_errors.append({
-                            "row": row_num,
-                            "item_name": row.get('item_name', ''),
-                            "error": "数量は0より大きい値が必要です"
-                        })
-                        continue
-                except ValueError:
-                    validation_errors.append({
-                        "row": row_num,
-                        "item_name": row.get('item_name', ''),
-                        "error": "数量は数値である必要があります"
-                    })
-                    continue
-                
-                # アイテム名の長さチェック
-                item_name = row['item_name'].strip()
-                if len(item_name) > 100:
-                    validation_errors.append({
-                        "row": row_num,
-                        "item_name": item_name,
-                        "error": "アイテム名は100文字以下である必要があります"
-                    })
-                    continue
-                
-                # 単位の検証
-                unit = row.get('unit', '個').strip()
-                if len(unit) > 20:
-                    validation_errors.append({
-                        "row": row_num,
-                        "item_name": item_name,
-                        "error": "単位は20文字以下である必要があります"
-                    })
-                    continue
-                
-                # 保管場所の検証
-                storage_location = row.get('storage_location', '冷蔵庫').strip()
-                if storage_location and len(storage_location) > 50:
-                    validation_errors.append({
-                        "row": row_num,
-                        "item_name": item_name,
-                        "error": "保管場所は50文字以下である必要があります"
-                    })
-                    continue
-                
-                # 消費期限の検証
-                expiry_date = row.get('expiry_date', '').strip()
-                if expiry_date:
-                    try:
-                        datetime.strptime(expiry_date, '%Y-%m-%d')
-                    except ValueError:
-                        validation_errors.append({
-                            "row": row_num,
-                            "item_name": item_name,
-                            "error": "消費期限はYYYY-MM-DD形式である必要があります"
-                        })
-                        continue
-                
-                # バリデーション通過
-                items.append({
-                    "item_name": item_name,
-                    "quantity": quantity,
-                    "unit": unit,
-                    "storage_location": storage_location if storage_location else "冷蔵庫",
-                    "expiry_date": expiry_date if expiry_date else None
-                })
-                
-            except Exception as e:
-                validation_errors.append({
-                    "row": row_num,
-                    "item_name": row.get('item_name', ''),
-                    "error": f"データ処理エラー: {str(e)}"
-                })
-        
-        # 5. 認証済みSupabaseクライアントの作成
+        # ファイルサイズチェック（既定10MB。内容はメモリに読み込まずに逐次処理する）
+        max_size_mb = int(os.getenv("CSV_UPLOAD_MAX_SIZE_MB", "10"))
+        file_size = file.size
+        if file_size is None:
+            # サイズ不明の場合は末尾までシークしてサイズを確認（内容は読み込まない）
+            if not file.file.seekable():
+                raise HTTPException(status_code=400, detail="ファイルサイズを確認できません")
+            file.file.seek(0, os.SEEK_END)
+            file_size = file.file.tell()
+            file.file.seek(0)
+        if file_size > max_size_mb * 1024 * 1024:
+            raise HTTPException(status_code=400, detail=f"ファイルサイズは{max_size_mb}MB以下にしてください")
+        
+        # 3. 認証済みSupabaseクライアントの作成
         try:
             client = get_authenticated_client(user_id, token)
             logger.info(f"✅ [API] Authenticated client created for user: {user_id}")
@@ -394,20 +291,9 @@ async def upload_csv_inventory(
             logger.error(f"❌ [API] Failed to create authenticated client: {e}")
             raise HTTPException(status_code=401, detail="認証に失敗しました")
         
-        # 6. 一括登録
-        crud = InventoryCRUD()
-        result = await crud.add_items_bulk(client, user_id, items)
-        
-        # バリデーションエラーとDBエラーを統合
-        total_errors = validation_errors + result.get("errors", [])
-        
-        return {
-            "success": result.get("success", False) and len(validation_errors) == 0,
-            "total": len(items) + len(validation_errors),
-            "success_count": result.get("success_count", 0),
-            "error_count": len(total_errors),
-            "errors": total_errors
-        }
+        # 4. 逐次解析・チャンク単位の検証と一括登録
+        importer = CSVInventoryImporter(client, user_id, sse_session_id)
+        return await importer.import_file(file)
         
     except HTTPException:
         raise
@@ -5,18 +5,25 @@ API層 - 献立ルート
 献立保存のエンドポイント
 """
 
-from fastapi import APIRouter, HTTPException, Request
+import base64
+import json
+import uuid
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from config.loggers import GenericLogger
 from ..models import MenuSaveRequest, MenuSaveResponse, SavedMenuRecipe, MenuHistoryResponse, HistoryRecipe, HistoryEntry
-from mcp_servers.recipe_history_crud import RecipeHistoryCRUD
 from mcp_servers.utils import get_authenticated_client
 from services.session.service import session_service
+from mcp_servers.recipe_history_crud import RecipeHistoryCRUD
+from ..utils.history_writer import get_history_writer
 
 router = APIRouter()
 logger = GenericLogger("api", "menu")
 
+# 献立履歴の1ページあたりの日付数の上限
+MENU_HISTORY_MAX_LIMIT = 100
+
 
 @router.post("/menu/save", response_model=MenuSaveResponse)
 async def save_menu(request: MenuSaveRequest, http_request: Request):
@@ -91,8 +98,7 @@ async def save_menu(request: MenuSaveRequest, http_request: Request):
             logger.error(f"❌ [API] Failed to create authenticated client: {e}")
             raise HTTPException(status_code=401, detail="認証に失敗しました")
         
-        # 4. 各レシピをDBに保存
-        crud = RecipeHistoryCRUD()
+        # 4. 保存する履歴を組み立てて一括保存
         saved_recipes = []
         failed_count = 0
         
@@ -108,6 +114,8 @@ async def save_menu(request: MenuSaveRequest, http_request: Request):
             "web": "web"
         }
         
+        categories = []
+        histories = []
         for category in ["main", "sub", "soup"]:
             recipe = selected_recipes.get(category)
             if not recipe:
@@ -136,33 +144,36 @@ async def save_menu(request: MenuSaveRequest, http_request: Request):
                 else:
                     logger.warning(f"⚠️ [API] Saving {category}: title='{prefixed_title}', source={recipe_source}→{db_source}, ingredients missing or empty (ingredients={ingredients})")
                 
-                # DBに保存
-                result = await crud.add_history(
-                    client=client,
-                    user_id=user_id,
-                    title=prefixed_title,
-                    source=db_source,
-                    url=url,
-                    ingredients=ingredients
-                )
-                
-                if result.get("success"):
-                    history_id = result.get("data", {}).get("id")
-                    logger.info(f"✅ [API] {category} saved successfully: history_id={history_id}")
-                    saved_recipes.append(SavedMenuRecipe(
-                        category=category,
-                        title=prefixed_title,
-                        history_id=history_id
-                    ))
-                else:
-                    failed_count += 1
-                    error_msg = result.get("error", "不明なエラー")
-                    logger.error(f"❌ [API] Failed to save {category}: {error_msg}")
+                categories.append(category)
+                histories.append({
+                    "title": prefixed_title,
+                    "source": db_source,
+                    "url": url,
+                    "ingredients": ingredients
+                })
                     
             except Exception as e:
                 failed_count += 1
                 logger.error(f"❌ [API] Error saving {category}: {e}")
         
+        # DBに一括保存（1回のinsert、write-behind有効時はキューに追加して即応答）
+        result = await get_history_writer().save(client, user_id, histories)
+        errors_by_index = {error["index"]: error["error"] for error in result.get("errors", [])}
+        
+        for index, (category, history) in enumerate(zip(categories, histories)):
+            if index in errors_by_index:
+                failed_count += 1
+                logger.error(f"❌ [API] Failed to save {category}: {errors_by_index[index]}")
+                continue
+            
+            history_id = (result["data"][index] or {}).get("id")
+            logger.info(f"✅ [API] {category} saved successfully: history_id={history_id}")
+            saved_recipes.append(SavedMenuRecipe(
+                category=category,
+                title=history["title"],
+                history_id=history_id
+            ))
+        
         # 5. レスポンスの生成
         total_saved = len(saved_recipes)
         if total_saved == 0:
@@ -191,15 +202,38 @@ async def save_menu(request: MenuSaveRequest, http_request: Request):
         raise HTTPException(status_code=500, detail="献立保存処理でエラーが発生しました")
 
 
+def _encode_history_cursor(cursor: Optional[Dict[str, str]]) -> Optional[str]:
+    """履歴カーソル（cooked_at, id）をURLセーフな文字列に変換"""
+    if not cursor:
+        return None
+    raw = json.dumps([cursor["cooked_at"], cursor["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_history_cursor(cursor: str) -> Dict[str, str]:
+    """URLセーフな文字列から履歴カーソルを復元（不正な場合は400）"""
+    try:
+        cooked_at, history_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        datetime.fromisoformat(cooked_at.replace("Z", "+00:00"))
+        uuid.UUID(history_id)
+        return {"cooked_at": cooked_at, "id": history_id}
+    except Exception:
+        raise HTTPException(status_code=400, detail="カーソルが不正です")
+
+
 @router.get("/menu/history", response_model=MenuHistoryResponse)
 async def get_menu_history(
     days: int = 14,
     category: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from", description="期間の開始日（YYYY-MM-DD、指定時はdaysより優先）"),
+    date_to: Optional[date] = Query(None, alias="to", description="期間の終了日（YYYY-MM-DD、この日を含む）"),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MENU_HISTORY_MAX_LIMIT, description="1ページの日付数（省略時は期間内のすべての日付）"),
     http_request: Request = None
 ):
     """献立履歴を取得するエンドポイント"""
     try:
-        logger.info(f"🔍 [API] Menu history request received: days={days}, category={category}")
+        logger.info(f"🔍 [API] Menu history request received: days={days}, category={category}, from={date_from}, to={date_to}, limit={limit}")
         
         # 1. 認証処理
         authorization = http_request.headers.get("Authorization")
@@ -213,7 +247,16 @@ async def get_menu_history(
         user_id = user_info['user_id']
         logger.info(f"🔍 [API] User ID: {user_id}")
         
-        # 2. 認証済みSupabaseクライアントの作成
+        # 2. 期間・カーソルの検証
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="期間の開始日は終了日以前である必要があります")
+        decoded_cursor = _decode_history_cursor(cursor) if cursor else None
+        
+        # from未指定の場合は従来どおり直近days日間
+        start = datetime.combine(date_from, time.min) if date_from else datetime.now() - timedelta(days=days)
+        end = datetime.combine(date_to + timedelta(days=1), time.min) if date_to else None
+        
+        # 3. 認証済みSupabaseクライアントの作成
         try:
             client = get_authenticated_client(user_id, token)
             logger.info(f"✅ [API] Authenticated client created for user: {user_id}")
@@ -221,105 +264,35 @@ async def get_menu_history(
             logger.error(f"❌ [API] Failed to create authenticated client: {e}")
             raise HTTPException(status_code=401, detail="認証に失敗しました")
         
-        # 3. 履歴を取得
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # recipe_historysテーブルから取得
-        result = client.table("recipe_historys")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .gte("cooked_at", cutoff_date.isoformat())\
-            .order("cooked_at", desc=True)\
-            .execute()
-        
-        logger.info(f"🔍 [API] Retrieved {len(result.data)} recipe histories from database")
-        
-        # 4. 日付ごとにグループ化
-        history_by_date = {}
-        ingredients_deleted_by_date = {}  # 日付ごとのingredients_deletedフラグ
-        category_prefix_map = {
-            "main": "主菜: ",
-            "sub": "副菜: ",
-            "soup": "汁物: "
-        }
-        
-        for item in result.data:
-            # cooked_atから日付を取得
-            cooked_at_str = item.get("cooked_at")
-            if not cooked_at_str:
-                logger.warning(f"⚠️ [API] Missing cooked_at for history_id={item.get('id')}")
-                continue
-            
-            try:
-                # ISO形式の日時文字列をパース
-                if "Z" in cooked_at_str:
-                    cooked_at = datetime.fromisoformat(cooked_at_str.replace("Z", "+00:00"))
-                else:
-                    cooked_at = datetime.fromisoformat(cooked_at_str)
-                
-                # タイムゾーン情報を削除して日付のみ取得
-                if cooked_at.tzinfo:
-                    cooked_at = cooked_at.replace(tzinfo=None)
-                
-                date_key = cooked_at.date().isoformat()
-            except Exception as e:
-                logger.error(f"❌ [API] Failed to parse cooked_at: {cooked_at_str}, error: {e}")
-                continue
-            
-            if date_key not in history_by_date:
-                history_by_date[date_key] = []
-                ingredients_deleted_by_date[date_key] = []
-            
-            # ingredients_deletedフラグを収集
-            ingredients_deleted = item.get("ingredients_deleted", False)
-            ingredients_deleted_by_date[date_key].append(ingredients_deleted)
-            
-            # カテゴリを判定（タイトルのプレフィックスから）
-            title = item.get("title", "")
-            recipe_category = None
-            for cat, prefix in category_prefix_map.items():
-                if title.startswith(prefix):
-                    recipe_category = cat
-                    break
-            
-            # カテゴリフィルター適用
-            if category and recipe_category != category:
-                continue
-            
-            history_by_date[date_key].append(HistoryRecipe(
-                category=recipe_category,
-                title=title,
-                source=item.get("source", "web"),
-                url=item.get("url"),
-                history_id=item.get("id")
-            ))
-        
-        # 5. 日付ごとのingredients_deletedフラグを判定（その日のすべてのレシピがTrueの場合のみTrue）
-        ingredients_deleted_flags = {}
-        for date_key, flags in ingredients_deleted_by_date.items():
-            # その日のすべてのレシピがingredients_deleted=Trueの場合のみTrue
-            ingredients_deleted_flags[date_key] = all(flags) if flags else False
-        
-        # 6. 日付順にソート（最新順）
-        sorted_history = sorted(
-            [
-                HistoryEntry(
-                    date=date,
-                    recipes=recipes,
-                    ingredients_deleted=ingredients_deleted_flags.get(date, False)
-                )
-                for date, recipes in history_by_date.items()
-            ],
-            key=lambda x: x.date,
-            reverse=True
+        # 4. 日付ごとにまとめた履歴を取得（グループ化・ingredients_deletedの集計はDB側）
+        result = await RecipeHistoryCRUD().get_histories_by_date(
+            client,
+            user_id,
+            start=start.isoformat(),
+            end=end.isoformat() if end else None,
+            category=category,
+            cursor=decoded_cursor,
+            limit=limit
         )
+        if not result.get("success"):
+            raise Exception(result.get("error"))
+        
+        history = [
+            HistoryEntry(
+                date=entry["date"],
+                recipes=[HistoryRecipe(**recipe) for recipe in entry["recipes"]],
+                ingredients_deleted=entry["ingredients_deleted"]
+            )
+            for entry in result["data"]
+        ]
         
-        logger.info(f"✅ [API] Returning {len(sorted_history)} date entries with total {sum(len(entry.recipes) for entry in sorted_history)} recipes")
+        logger.info(f"✅ [API] Returning {len(history)} date entries with total {sum(len(entry.recipes) for entry in history)} recipes")
         
-        # 7. レスポンスを生成
+        # 5. レスポンスを生成
         return MenuHistoryResponse(
             success=True,
-            data=sorted_history
+            data=history,
+            next_cursor=_encode_history_cursor(result.get("next_cursor"))
         )
         
     except HTTPException:
@@ -6,15 +6,17 @@ API層 - レシピルート
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 import json
+import uuid
 from config.loggers import GenericLogger
-from ..models import RecipeAdoptionRequest, RecipeAdoptionResponse, SavedRecipe, IngredientDeleteCandidatesResponse, IngredientDeleteCandidate, IngredientDeleteRequest, IngredientDeleteResponse
+from ..models import RecipeAdoptionRequest, RecipeAdoptionResponse, SavedRecipe, IngredientDeleteCandidatesResponse, IngredientDeleteCandidate, IngredientDeleteRequest, IngredientDeleteResult, IngredientDeleteResponse
 from mcp_servers.recipe_history_crud import RecipeHistoryCRUD
-from mcp_servers.utils import get_authenticated_client
+from mcp_servers.utils import get_authenticated_client, execute_query
 from mcp_servers.inventory_crud import InventoryCRUD
 from services.session.models.components.ingredient_mapper import IngredientMapperComponent
+from ..utils.history_writer import get_history_writer
 
 router = APIRouter()
 logger = GenericLogger("api", "recipe")
@@ -64,11 +66,12 @@ async def adopt_recipe(request: RecipeAdoptionRequest, http_request: Request):
             logger.error(f"❌ [API] Failed to create authenticated client: {e}")
             raise HTTPException(status_code=401, detail="認証に失敗しました")
         
-        # 5. 各レシピを順次保存
-        crud = RecipeHistoryCRUD()
+        # 5. 保存する履歴を組み立てて一括保存
         saved_recipes = []
         failed_recipes = []
         
+        recipe_indexes = []
+        histories = []
         for i, recipe in enumerate(request.recipes):
             try:
                 logger.info(f"🔍 [API] Processing recipe {i+1}/{len(request.recipes)}: {recipe.title}")
@@ -87,39 +90,43 @@ async def adopt_recipe(request: RecipeAdoptionRequest, http_request: Request):
                 
                 logger.info(f"🔍 [API] Mapped source for recipe {i+1}: {recipe.menu_source} → {db_source}")
                 
-                # RecipeHistoryCRUD.add_history()を呼び出し
                 if has_ingredients:
                     logger.info(f"✅ [API] Saving recipe {i+1} with {len(recipe.ingredients)} ingredients: {recipe.ingredients}")
                 else:
                     logger.warning(f"⚠️ [API] Saving recipe {i+1} without ingredients (ingredients={ingredients})")
                 
-                result = await crud.add_history(
-                    client=client,
-                    user_id=user_id,
-                    title=recipe.title,
-                    source=db_source,
-                    url=recipe.url,
-                    ingredients=ingredients  # 新規追加
-                )
-                
-                if result.get("success"):
-                    history_id = result.get("data", {}).get("id")
-                    logger.info(f"✅ [API] Recipe {i+1} saved successfully: {history_id}")
-                    
-                    saved_recipes.append(SavedRecipe(
-                        title=recipe.title,
-                        category=recipe.category,
-                        history_id=history_id
-                    ))
-                else:
-                    error_msg = result.get("error", "不明なエラー")
-                    logger.error(f"❌ [API] Failed to save recipe {i+1}: {error_msg}")
-                    failed_recipes.append(f"Recipe {i+1}: {error_msg}")
+                recipe_indexes.append(i)
+                histories.append({
+                    "title": recipe.title,
+                    "source": db_source,
+                    "url": recipe.url,
+                    "ingredients": ingredients
+                })
                     
             except Exception as e:
                 logger.error(f"❌ [API] Error processing recipe {i+1}: {e}")
                 failed_recipes.append(f"Recipe {i+1}: {str(e)}")
         
+        # DBに一括保存（1回のinsert、write-behind有効時はキューに追加して即応答）
+        result = await get_history_writer().save(client, user_id, histories)
+        errors_by_index = {error["index"]: error["error"] for error in result.get("errors", [])}
+        
+        for index, i in enumerate(recipe_indexes):
+            recipe = request.recipes[i]
+            if index in errors_by_index:
+                logger.error(f"❌ [API] Failed to save recipe {i+1}: {errors_by_index[index]}")
+                failed_recipes.append(f"Recipe {i+1}: {errors_by_index[index]}")
+                continue
+            
+            history_id = (result["data"][index] or {}).get("id")
+            logger.info(f"✅ [API] Recipe {i+1} saved successfully: {history_id}")
+            
+            saved_recipes.append(SavedRecipe(
+                title=recipe.title,
+                category=recipe.category,
+                history_id=history_id
+            ))
+        
         # 6. レスポンスの生成
         total_recipes = len(request.recipes)
         saved_count = len(saved_recipes)
@@ -193,12 +200,12 @@ async def get_ingredient_delete_candidates(
         
         # 4. 指定日付のレシピ履歴を取得
         crud = RecipeHistoryCRUD()
-        result = client.table("recipe_historys")\
+        query = client.table("recipe_historys")\
             .select("*")\
             .eq("user_id", user_id)\
             .gte("cooked_at", start_datetime.isoformat())\
-            .lte("cooked_at", end_datetime.isoformat())\
-            .execute()
+            .lte("cooked_at", end_datetime.isoformat())
+        result = await execute_query(query)
         
         logger.info(f"🔍 [API] Retrieved {len(result.data)} recipe histories for date: {date}")
         
@@ -387,11 +394,16 @@ async def delete_ingredients(
         # 4. 食材名の正規化用
         ingredient_mapper = IngredientMapperComponent(GenericLogger("api", "ingredient_mapper"))
         
-        # 5. リクエストの食材名で在庫を検索して更新
-        deleted_count = 0
-        updated_count = 0
+        # 5. 在庫IDごとの反映後の数量をメモリ上で計算（同じ在庫が複数回指定された場合は後の指定を優先）
+        planned: Dict[str, Tuple[str, float]] = {}
+        results: List[IngredientDeleteResult] = []
         failed_items = []
         
+        normalized_inventory = [
+            (inv_item, ingredient_mapper.normalize_ingredient_name(inv_item.get("item_name", "")))
+            for inv_item in inventory_items
+        ]
+        
         for ingredient_item in request.ingredients:
             try:
                 item_name = ingredient_item.item_name
@@ -400,90 +412,74 @@ async def delete_ingredients(
                 
                 # 在庫IDが指定されている場合は直接更新または削除
                 if inventory_id:
-                    if target_quantity == 0:
-                        # 削除の場合
-                        result = await inventory_crud.delete_item_by_id(
-                            client=client,
-                            user_id=user_id,
-                            item_id=inventory_id
-                        )
-                        
-                        if result.get("success"):
-                            deleted_count += 1
-                            logger.info(f"✅ [API] Deleted inventory item: {inventory_id}")
-                        else:
-                            failed_items.append(f"{item_name} (ID: {inventory_id})")
-                            logger.error(f"❌ [API] Failed to delete inventory item: {inventory_id}")
-                    else:
-                        # 数量更新の場合
-                        result = await inventory_crud.update_item_by_id(
-                            client=client,
-                            user_id=user_id,
-                            item_id=inventory_id,
-                            quantity=target_quantity
-                        )
-                        
-                        if result.get("success"):
-                            updated_count += 1
-                            logger.info(f"✅ [API] Updated inventory item: {inventory_id}, quantity={target_quantity}")
-                        else:
-                            failed_items.append(f"{item_name} (ID: {inventory_id})")
-                            logger.error(f"❌ [API] Failed to update inventory item: {inventory_id}")
+                    try:
+                        uuid.UUID(inventory_id)
+                    except ValueError:
+                        failed_items.append(f"{item_name} (ID: {inventory_id})")
+                        results.append(IngredientDeleteResult(
+                            item_name=item_name, inventory_id=inventory_id, quantity=target_quantity,
+                            status="failed", error="Invalid inventory ID"
+                        ))
+                        continue
+                    planned[inventory_id] = (item_name, target_quantity)
                 else:
                     # 食材名で検索（複数在庫がある場合はすべて更新）
-                    matched_items = []
                     normalized_item_name = ingredient_mapper.normalize_ingredient_name(item_name)
-                    
-                    for inv_item in inventory_items:
-                        normalized_inv = ingredient_mapper.normalize_ingredient_name(inv_item.get("item_name", ""))
-                        if normalized_item_name == normalized_inv or \
-                           normalized_item_name in normalized_inv or \
-                           normalized_inv in normalized_item_name:
-                            matched_items.append(inv_item)
+                    matched_items = [
+                        inv_item for inv_item, normalized_inv in normalized_inventory
+                        if normalized_item_name == normalized_inv or
+                        normalized_item_name in normalized_inv or
+                        normalized_inv in normalized_item_name
+                    ]
                     
                     if not matched_items:
                         failed_items.append(f"{item_name} (在庫に存在しません)")
+                        results.append(IngredientDeleteResult(
+                            item_name=item_name, quantity=target_quantity,
+                            status="failed", error="Inventory item not found"
+                        ))
                         logger.warning(f"⚠️ [API] Inventory item not found: {item_name}")
                         continue
                     
                     # すべてのマッチした在庫を更新または削除
                     for inv_item in matched_items:
-                        inv_id = inv_item.get("id")
-                        if target_quantity == 0:
-                            # 削除の場合
-                            result = await inventory_crud.delete_item_by_id(
-                                client=client,
-                                user_id=user_id,
-                                item_id=inv_id
-                            )
-                            
-                            if result.get("success"):
-                                deleted_count += 1
-                                logger.info(f"✅ [API] Deleted inventory item: {inv_id}")
-                            else:
-                                failed_items.append(f"{item_name} (ID: {inv_id})")
-                                logger.error(f"❌ [API] Failed to delete inventory item: {inv_id}")
-                        else:
-                            # 数量更新の場合
-                            result = await inventory_crud.update_item_by_id(
-                                client=client,
-                                user_id=user_id,
-                                item_id=inv_id,
-                                quantity=target_quantity
-                            )
-                            
-                            if result.get("success"):
-                                updated_count += 1
-                                logger.info(f"✅ [API] Updated inventory item: {inv_id}, quantity={target_quantity}")
-                            else:
-                                failed_items.append(f"{item_name} (ID: {inv_id})")
-                                logger.error(f"❌ [API] Failed to update inventory item: {inv_id}")
+                        planned[inv_item.get("id")] = (item_name, target_quantity)
                             
             except Exception as e:
                 failed_items.append(f"{ingredient_item.item_name} (エラー: {str(e)})")
                 logger.error(f"❌ [API] Error processing ingredient: {ingredient_item.item_name}, error: {e}")
         
-        # 6. レシピ履歴のingredients_deletedフラグを更新
+        # 6. 削除と数量更新を一括反映（RPC 1回・1トランザクション）
+        apply_result = await inventory_crud.apply_quantity_changes(
+            client=client,
+            user_id=user_id,
+            quantities={inv_id: quantity for inv_id, (_, quantity) in planned.items()}
+        )
+        deleted_ids = set(apply_result.get("deleted_ids", []))
+        updated_ids = set(apply_result.get("updated_ids", []))
+        
+        deleted_count = 0
+        updated_count = 0
+        for inv_id, (item_name, target_quantity) in planned.items():
+            if inv_id in deleted_ids:
+                deleted_count += 1
+                status = "deleted"
+            elif inv_id in updated_ids:
+                updated_count += 1
+                status = "updated"
+            else:
+                failed_items.append(f"{item_name} (ID: {inv_id})")
+                logger.error(f"❌ [API] Failed to apply quantity to inventory item: {inv_id}")
+                results.append(IngredientDeleteResult(
+                    item_name=item_name, inventory_id=inv_id, quantity=target_quantity,
+                    status="failed", error=apply_result.get("error", "Item not found")
+                ))
+                continue
+            results.append(IngredientDeleteResult(
+                item_name=item_name, inventory_id=inv_id, quantity=target_quantity, status=status
+            ))
+        
+        # 7. レシピ履歴のingredients_deletedフラグを更新
         crud = RecipeHistoryCRUD()
         update_result = await crud.update_ingredients_deleted(
             client=client,
@@ -501,7 +497,8 @@ async def delete_ingredients(
             success=True,
             deleted_count=deleted_count,
             updated_count=updated_count,
-            failed_items=failed_items
+            failed_items=failed_items,
+            results=results
         )
         
     except HTTPException:
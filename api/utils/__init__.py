@@ -2,15 +2,25 @@
 """
 API層 - ユーティリティ
 
-SSE管理と認証処理の統合
+SSE管理・認証処理・共有エージェント・CSVインポート・レシピ履歴書き込みの統合
 """
 
 from .sse_manager import SSESender, get_sse_sender
 from .auth_handler import AuthHandler, get_auth_handler
+from .agent_provider import create_agent, close_agent, get_agent
+from .csv_importer import CSVInventoryImporter, validate_csv_row
+from .history_writer import HistoryWriter, get_history_writer
 
 __all__ = [
     'SSESender',
     'get_sse_sender',
     'AuthHandler', 
-    'get_auth_handler'
+    'get_auth_handler',
+    'create_agent',
+    'close_agent',
+    'get_agent',
+    'CSVInventoryImporter',
+    'validate_csv_row',
+    'HistoryWriter',
+    'get_history_writer'
 ]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+API層 - エージェント提供
+
+ワーカー単位で共有するTrueReactAgent（サービスグラフ）の構築と取得
+"""
+
+from typing import Optional
+from fastapi import Request
+from config.clients import close_shared_clients, get_openai_client
+from config.loggers import GenericLogger
+from core.agent import TrueReactAgent
+from core.service_coordinator import ServiceCoordinator
+from mcp_servers.client import MCPClient
+from mcp_servers.supabase_pool import close_supabase_pool
+from services.llm.llm_client import LLMClient
+from services.llm_service import LLMService
+from services.tool_router import ToolRouter
+from .history_writer import get_history_writer
+
+logger = GenericLogger("api", "agent_provider")
+
+
+def create_agent() -> TrueReactAgent:
+    """
+    共有サービスグラフを構築してエージェントを生成
+
+    MCPClient → ToolRouter → ServiceCoordinator と、共有OpenAIクライアントを使う
+    LLMService をそれぞれ1つだけ生成し、エージェントの全コンポーネントで共有する。
+    """
+    mcp_client = MCPClient()
+    service_coordinator = ServiceCoordinator(ToolRouter(mcp_client))
+    llm_service = LLMService(LLMClient(get_openai_client()))
+    agent = TrueReactAgent(service_coordinator=service_coordinator, llm_service=llm_service)
+    logger.info("✅ [API] Shared agent graph created")
+    return agent
+
+
+async def close_agent(agent: Optional[TrueReactAgent]) -> None:
+    """エージェントが保持する接続（MCPセッションプール・Supabase接続プール・共有クライアント）を閉じる"""
+    # write-behindで未書き込みのレシピ履歴を接続を閉じる前に書き込む
+    await get_history_writer().close()
+    if agent is not None:
+        await agent.service_coordinator.tool_router.mcp_client.cleanup()
+    close_supabase_pool()
+    await close_shared_clients()
+    logger.info("🛑 [API] Shared agent graph closed")
+
+
+# lifespanを経由しない起動（テスト等）用のフォールバック
+_agent: Optional[TrueReactAgent] = None
+
+
+def get_agent(request: Request) -> TrueReactAgent:
+    """
+    リクエストに対応する共有エージェントを取得（FastAPIの依存関係として使用）
+
+    lifespanで構築した app.state.agent を優先し、未構築の場合はプロセス内で1つだけ生成する。
+    """
+    global _agent
+    agent = getattr(request.app.state, "agent", None)
+    if agent is not None:
+        return agent
+
+    if _agent is None:
+        _agent = create_agent()
+    return _agent
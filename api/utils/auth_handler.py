@@ -5,10 +5,15 @@ API層 - 認証処理
 Supabase Auth連携とトークン検証
 """
 
+import asyncio
 import os
 from typing import Optional, Dict, Any
-from supabase import create_client, Client
+from supabase import Client
+from config.clients import get_supabase_client
 from config.loggers import GenericLogger
+from mcp_servers.supabase_pool import get_supabase_pool
+from mcp_servers.token_verifier import get_token_verifier
+from mcp_servers.utils import execute_query
 
 
 class AuthHandler:
@@ -32,31 +37,23 @@ class AuthHandler:
             self.logger.info(f"  SUPABASE_KEY value: {self.supabase_key[:20]}..." if len(self.supabase_key) > 20 else f"  SUPABASE_KEY value: {self.supabase_key}")
         
         # Supabaseクライアントの初期化
-        if self.supabase_url and self.supabase_key:
-            self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        self.supabase: Optional[Client] = get_supabase_client()
+        if self.supabase:
             self.logger.info("✅ [Auth] Supabase client initialized")
         else:
             self.supabase = None
             self.logger.warning("⚠️ [Auth] Supabase credentials not found")
     
     async def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """トークンを検証してユーザー情報を取得"""
+        """トークンを検証してユーザー情報を取得（共有キャッシュ・ローカルJWT検証を使用）"""
         try:
             if not self.supabase:
                 self.logger.error("❌ [Auth] Supabase client not available")
                 return None
             
-            # Supabaseでトークンを検証
-            response = self.supabase.auth.get_user(token)
+            user_info = await get_token_verifier().verify(token)
             
-            if response.user:
-                user_info = {
-                    "user_id": response.user.id,
-                    "email": response.user.email,
-                    "created_at": response.user.created_at,
-                    "last_sign_in": response.user.last_sign_in_at
-                }
-                
+            if user_info:
                 self.logger.info(f"✅ [Auth] Token verified for user: {user_info['user_id']}")
                 return user_info
             else:
@@ -73,7 +70,9 @@ class AuthHandler:
             if not self.supabase:
                 return None
             
-            response = self.supabase.auth.refresh_session(refresh_token)
+            # 共有クライアントにセッションを保存しないよう、使い捨ての認証クライアントで更新
+            auth_client = get_supabase_pool().get_auth_client()
+            response = await asyncio.to_thread(auth_client.refresh_session, refresh_token)
             
             if response.session:
                 return {
@@ -110,7 +109,7 @@ class AuthHandler:
                 return None
             
             # ユーザープロフィールテーブルから情報を取得
-            response = self.supabase.table("profiles").select("*").eq("id", user_id).execute()
+            response = await execute_query(self.supabase.table("profiles").select("*").eq("id", user_id))
             
             if response.data:
                 return response.data[0]
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+API層 - CSV在庫インポート
+
+アップロードされたCSVを行単位で逐次解析し、チャンクごとに検証・一括登録する。
+ファイル全体をメモリに読み込まないため、メモリ使用量はファイルサイズによらず一定。
+"""
+
+import asyncio
+import csv
+import io
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from config.loggers import GenericLogger
+from mcp_servers.inventory_crud import InventoryCRUD
+from .sse_manager import get_sse_sender
+
+# 環境変数を読み込み
+load_dotenv()
+
+
+def validate_csv_row(row_num: int, row: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    CSVの1行を検証して在庫アイテムに変換
+
+    Args:
+        row_num: 行番号（ヘッダー行が1）
+        row: csv.DictReader の行
+
+    Returns:
+        (在庫アイテム, None) または (None, エラー)
+    """
+    def error(item_name: str, message: str) -> Tuple[None, Dict[str, Any]]:
+        return None, {"row": row_num, "item_name": item_name, "error": message}
+
+    try:
+        # 必須項目チェック
+        if not row.get('item_name') or not row.get('item_name').strip():
+            return error(row.get('item_name', ''), "アイテム名は必須です")
+
+        if not row.get('quantity'):
+            return error(row.get('item_name', ''), "数量は必須です")
+
+        # 数量の型変換と検証
+        try:
+            quantity = float(row['quantity'])
+        except ValueError:
+            return error(row.get('item_name', ''), "数量は数値である必要があります")
+        if quantity <= 0:
+            return error(row.get('item_name', ''), "数量は0より大きい値が必要です")
+
+        # アイテム名の長さチェック
+        item_name = row['item_name'].strip()
+        if len(item_name) > 100:
+            return error(item_name, "アイテム名は100文字以下である必要があります")
+
+        # 単位の検証
+        unit = row.get('unit', '個').strip()
+        if len(unit) > 20:
+            return error(item_name, "単位は20文字以下である必要があります")
+
+        # 保管場所の検証
+        storage_location = row.get('storage_location', '冷蔵庫').strip()
+        if storage_location and len(storage_location) > 50:
+            return error(item_name, "保管場所は50文字以下である必要があります")
+
+        # 消費期限の検証
+        expiry_date = row.get('expiry_date', '').strip()
+        if expiry_date:
+            try:
+                datetime.strptime(expiry_date, '%Y-%m-%d')
+            except ValueError:
+                return error(item_name, "消費期限はYYYY-MM-DD形式である必要があります")
+
+        # バリデーション通過
+        return {
+            "item_name": item_name,
+            "quantity": quantity,
+            "unit": unit,
+            "storage_location": storage_location if storage_location else "冷蔵庫",
+            "expiry_date": expiry_date if expiry_date else None
+        }, None
+
+    except Exception as e:
+        return error(row.get('item_name', ''), f"データ処理エラー: {str(e)}")
+
+
+class CSVInventoryImporter:
+    """CSV在庫インポート（逐次解析・チャンク登録・SSE進捗通知）"""
+
+    def __init__(self, client: Any, user_id: str, sse_session_id: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            client: 認証済みSupabaseクライアント
+            user_id: ユーザーID
+            sse_session_id: 進捗を通知するSSEセッションID（省略時は通知しない）
+        """
+        self.logger = GenericLogger("api", "csv_importer")
+        self.client = client
+        self.user_id = user_id
+        self.sse_session_id = sse_session_id
+        self.crud = InventoryCRUD()
+        # 1回の一括登録で送る行数
+        self.chunk_size = max(1, int(os.getenv("CSV_IMPORT_CHUNK_SIZE", "500")))
+
+    @staticmethod
+    def _read_rows(reader: csv.DictReader, count: int) -> List[Dict[str, Any]]:
+        """CSVから最大count行を読み込む（スレッドプールで実行）"""
+        return list(islice(reader, count))
+
+    async def _send_progress(self, processed: int, success_count: int, error_count: int, percentage: int) -> None:
+        if not self.sse_session_id:
+            return
+        await get_sse_sender().send_progress(self.sse_session_id, {
+            "message": f"{processed}行を処理しました（登録 {success_count}件、エラー {error_count}件）",
+            "completed_tasks": processed,
+            "total_tasks": 0,
+            "progress_percentage": percentage,
+            "current_task": "CSVインポート",
+            "is_complete": False
+        })
+
+    async def import_file(self, file: UploadFile) -> Dict[str, Any]:
+        """
+        CSVファイルを逐次解析して在庫に登録
+
+        Args:
+            file: アップロードされたCSVファイル
+
+        Returns:
+            {
+                "success": bool,
+                "total": int,
+                "success_count": int,
+                "error_count": int,
+                "errors": List[Dict[str, Any]]
+            }
+        """
+        total = 0
+        success_count = 0
+        validation_error_count = 0
+        attempted = 0
+        errors: List[Dict[str, Any]] = []
+        row_num = 1  # ヘッダー行
+
+        size = file.size or 0
+        # エンコーディング: UTF-8（BOM付きにも対応）
+        text_stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(text_stream)
+            while True:
+                try:
+                    raw_rows = await asyncio.to_thread(self._read_rows, reader, self.chunk_size)
+                except (UnicodeDecodeError, csv.Error) as e:
+                    self.logger.warning(f"⚠️ [CSV] Failed to parse CSV after row {row_num}: {e}")
+                    errors.append({"row": row_num + 1, "item_name": None, "error": f"CSV解析エラー: {str(e)}"})
+                    validation_error_count += 1
+                    break
+                if not raw_rows:
+                    break
+
+                # チャンク単位で検証
+                items = []
+                rows = []
+                for raw_row in raw_rows:
+                    row_num += 1
+                    item, error = validate_csv_row(row_num, raw_row)
+                    if error:
+                        errors.append(error)
+                        validation_error_count += 1
+                    else:
+                        items.append(item)
+                        rows.append(row_num)
+                total += len(raw_rows)
+
+                # チャンク単位で一括登録（失敗時は二分割で不正な行を特定）
+                if items:
+                    attempted += len(items)
+                    result = await self.crud.add_items_bulk(self.client, self.user_id, items, rows=rows)
+                    success_count += result.get("success_count", 0)
+                    errors.extend(result.get("errors", []))
+
+                percentage = min(99, int(file.file.tell() * 100 / size)) if size else 0
+                await self._send_progress(total, success_count, len(errors), percentage)
+        finally:
+            # アップロードファイル自体は閉じない（UploadFileが管理する）
+            text_stream.detach()
+
+        self.logger.info(f"✅ [CSV] Imported {success_count}/{total} rows ({len(errors)} errors)")
+
+        if self.sse_session_id:
+            await get_sse_sender().send_complete(
+                self.sse_session_id,
+                f"CSVインポートが完了しました（登録 {success_count}件、エラー {len(errors)}件）"
+            )
+
+        return {
+            "success": validation_error_count == 0 and (attempted == 0 or success_count > 0),
+            "total": total,
+            "success_count": success_count,
+            "error_count": len(errors),
+            "errors": errors
+        }
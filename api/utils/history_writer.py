@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+API層 - レシピ履歴の書き込み
+
+献立保存・レシピ採用時のレシピ履歴を一括で保存する。
+write-behindモードでは履歴IDを採番して即座に応答し、バックグラウンドのキューから
+リトライ付きでDBに書き込む。
+"""
+
+import asyncio
+import os
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from config.loggers import GenericLogger
+from mcp_servers.recipe_history_crud import RecipeHistoryCRUD
+
+# 環境変数を読み込み
+load_dotenv()
+
+
+class HistoryWriter:
+    """レシピ履歴の一括保存（オプションでwrite-behind）"""
+
+    def __init__(self):
+        """初期化"""
+        self.logger = GenericLogger("api", "history_writer")
+        self.crud = RecipeHistoryCRUD()
+        # trueで応答後にバックグラウンドで書き込む
+        self.write_behind = os.getenv("HISTORY_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+        self.max_retries = int(os.getenv("HISTORY_WRITE_BEHIND_MAX_RETRIES", "3"))
+        self.retry_delay = float(os.getenv("HISTORY_WRITE_BEHIND_RETRY_DELAY", "1.0"))
+        # キューの上限（超えた場合はその場で書き込む）
+        self.max_pending = int(os.getenv("HISTORY_WRITE_BEHIND_MAX_PENDING", "1000"))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {"deferred": 0, "written": 0, "retried": 0, "failed": 0}
+
+    async def save(self, client: Any, user_id: str, histories: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        レシピ履歴を保存
+
+        Args:
+            client: 認証済みSupabaseクライアント
+            user_id: ユーザーID
+            histories: RecipeHistoryCRUD.add_histories_bulk と同じ形式のリスト
+
+        Returns:
+            RecipeHistoryCRUD.add_histories_bulk と同じ形式の結果
+            （write-behindで受け付けた場合は "deferred": True、data は採番済みの履歴）
+        """
+        if self.write_behind and histories and self._enqueue(client, user_id, histories):
+            self.logger.info(f"📮 [HistoryWriter] Deferred {len(histories)} recipe histories")
+            return {
+                "success": True,
+                "total": len(histories),
+                "success_count": len(histories),
+                "error_count": 0,
+                "data": histories,
+                "errors": [],
+                "deferred": True
+            }
+
+        return await self.crud.add_histories_bulk(client, user_id, histories)
+
+    def _enqueue(self, client: Any, user_id: str, histories: List[Dict[str, Any]]) -> bool:
+        """履歴IDを採番してキューに追加（キューが満杯の場合はFalse）"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        if self._queue.full():
+            self.logger.warning(f"⚠️ [HistoryWriter] Write-behind queue is full, writing synchronously")
+            return False
+
+        # 応答で履歴IDを返せるよう、またリトライ時に重複登録を検出できるようIDを事前に採番
+        for history in histories:
+            history.setdefault("id", str(uuid.uuid4()))
+
+        self._queue.put_nowait((client, user_id, histories))
+        self.stats["deferred"] += len(histories)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        """キューから取り出して書き込むワーカー"""
+        while True:
+            client, user_id, histories = await self._queue.get()
+            try:
+                await self._write_with_retry(client, user_id, histories)
+            except Exception as e:
+                self.stats["failed"] += len(histories)
+                self.logger.error(f"❌ [HistoryWriter] Unexpected error while writing recipe histories: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _write_with_retry(self, client: Any, user_id: str, histories: List[Dict[str, Any]]) -> None:
+        """失敗した行のみを指数バックオフで再試行"""
+        pending = histories
+        for attempt in range(self.max_retries + 1):
+            result = await self.crud.add_histories_bulk(client, user_id, pending)
+            pending, duplicates = self._failed_histories(pending, result.get("errors", []))
+            self.stats["written"] += result.get("success_count", 0) + duplicates
+            if not pending:
+                return
+            if attempt < self.max_retries:
+                self.stats["retried"] += len(pending)
+                await asyncio.sleep(self.retry_delay * (2 ** attempt))
+
+        self.stats["failed"] += len(pending)
+        self.logger.error(
+            f"❌ [HistoryWriter] Gave up writing {len(pending)} recipe histories after {self.max_retries} retries: "
+            f"{[history.get('title') for history in pending]}"
+        )
+
+    @staticmethod
+    def _failed_histories(histories: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """再試行が必要な履歴と、前回の試行で登録済みだった件数（主キー重複）を返す"""
+        failed = []
+        duplicates = 0
+        for error in errors:
+            # 応答が失われただけで登録済みの場合（主キーの一意制約違反）は成功扱い
+            if "23505" in str(error.get("error", "")):
+                duplicates += 1
+            else:
+                failed.append(histories[error["index"]])
+        return failed, duplicates
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """未書き込みの履歴を書き込んでからワーカーを停止（アプリケーション終了時）"""
+        if self._queue is not None:
+            # 書き込み中のバッチも含めて完了を待つ
+            if not self._queue.empty():
+                self.logger.info(f"⏳ [HistoryWriter] Flushing {self._queue.qsize()} pending history batches")
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.logger.error(f"❌ [HistoryWriter] Timed out flushing recipe histories ({self._queue.qsize()} batches dropped)")
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """write-behindの統計"""
+        stats = dict(self.stats)
+        stats["pending"] = self._queue.qsize() if self._queue is not None else 0
+        stats["write_behind"] = self.write_behind
+        return stats
+
+
+# グローバルインスタンス
+_history_writer: Optional[HistoryWriter] = None
+
+
+def get_history_writer() -> HistoryWriter:
+    """レシピ履歴書き込みのシングルトン取得"""
+    global _history_writer
+    if _history_writer is None:
+        _history_writer = HistoryWriter()
+    return _history_writer
@@ -0,0 +1,72 @@
+"""
+Morizo AI v2 - Shared Clients
+
+This module provides process-wide external API clients (OpenAI, Supabase)
+so that their HTTP connection pools are reused across requests.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+from .loggers import GenericLogger
+
+# .envファイルを読み込み
+load_dotenv()
+
+logger = GenericLogger("config", "clients")
+
+_openai_client = None
+_supabase_client = None
+
+
+def get_openai_client():
+    """
+    共有AsyncOpenAIクライアントを取得
+
+    Returns:
+        AsyncOpenAIクライアント（OPENAI_API_KEY未設定の場合はNone）
+    """
+    global _openai_client
+    if _openai_client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        from openai import AsyncOpenAI
+        _openai_client = AsyncOpenAI(api_key=api_key)
+        logger.info("✅ [Clients] Shared OpenAI client initialized")
+    return _openai_client
+
+
+def get_supabase_client():
+    """
+    共有Supabaseクライアント（サービスキー）を取得
+
+    ユーザーのトークンを設定しない処理（トークン検証・リフレッシュ等）専用。
+    ユーザー単位の処理にはmcp_servers.utils.get_authenticated_clientを使用する。
+
+    Returns:
+        Supabaseクライアント（SUPABASE_URL/SUPABASE_KEY未設定の場合はNone）
+    """
+    global _supabase_client
+    if _supabase_client is None:
+        supabase_url = os.getenv("SUPABASE_URL")
+        supabase_key = os.getenv("SUPABASE_KEY")
+        if not supabase_url or not supabase_key:
+            return None
+        from supabase import create_client
+        _supabase_client = create_client(supabase_url, supabase_key)
+        logger.info("✅ [Clients] Shared Supabase client initialized")
+    return _supabase_client
+
+
+async def close_shared_clients() -> None:
+    """共有クライアントの接続を閉じる（アプリケーション終了時）"""
+    global _openai_client, _supabase_client
+    if _openai_client is not None:
+        try:
+            await _openai_client.close()
+        except Exception as e:
+            logger.warning(f"⚠️ [Clients] Error while closing OpenAI client: {e}")
+        _openai_client = None
+    _supabase_client = None
@@ -10,7 +10,7 @@ This module contains the core components for the unified ReAct agent:
 from .agent import TrueReactAgent
 from .planner import ActionPlanner
 from .executor import TaskExecutor
-from .models import Task, ExecutionResult, TaskChainManager
+from .models import Task, ExecutionResult, RequestContext, TaskChainManager
 from .exceptions import CoreError, TaskExecutionError, PlanningError
 
 __all__ = [
@@ -19,6 +19,7 @@ __all__ = [
     "TaskExecutor",
     "Task",
     "ExecutionResult",
+    "RequestContext",
     "TaskChainManager",
     "CoreError",
     "TaskExecutionError",
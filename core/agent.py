@@ -10,16 +10,19 @@ This component coordinates the entire ReAct loop, orchestrating:
 - Response formatting (via ResponseFormatter)
 """
 
-from typing import Optional, Dict, Any
-from .models import TaskChainManager, ExecutionResult
+import os
+from typing import Optional, Dict, Any, AsyncIterator
+from .models import Task, TaskChainManager, ExecutionResult, RequestContext
 from .planner import ActionPlanner
 from .executor import TaskExecutor
+from .inventory_prefetch import InventoryPrefetcher
 from .service_coordinator import ServiceCoordinator
 from .response_formatter import ResponseFormatter
 from .handlers.confirmation_handler import ConfirmationHandler
 from .handlers.selection_handler import SelectionHandler
 from .handlers.stage_manager import StageManager
 from services.confirmation_service import ConfirmationService
+from services.llm_service import LLMService
 from config.loggers import GenericLogger
 from core.help_handler import HelpHandler
 
@@ -32,16 +35,34 @@ class TrueReactAgent:
     to final response, managing task planning, execution, and confirmation.
     """
     
-    def __init__(self):
+    def __init__(self, service_coordinator: Optional[ServiceCoordinator] = None, llm_service: Optional[LLMService] = None):
+        """
+        Build the agent and its component graph.
+        
+        The planner, executor and confirmation service share a single
+        ServiceCoordinator (→ ToolRouter → MCPClient), and the planner and
+        response formatter share a single LLMService. The agent holds no
+        per-request state, so one instance can serve all requests of a worker
+        (see api.utils.agent_provider).
+        
+        Args:
+            service_coordinator: Shared ServiceCoordinator (created if omitted)
+            llm_service: Shared LLMService (created if omitted)
+        """
         self.logger = GenericLogger("core", "agent")
-        self.action_planner = ActionPlanner()
-        self.service_coordinator = ServiceCoordinator()
+        self.llm_service = llm_service or LLMService()
+        self.service_coordinator = service_coordinator or ServiceCoordinator()
+        self.action_planner = ActionPlanner(self.llm_service, self.service_coordinator)
         self.confirmation_service = ConfirmationService(self.service_coordinator.tool_router)
-        self.task_executor = TaskExecutor(self.service_coordinator, self.confirmation_service)
-        self.response_formatter = ResponseFormatter()
+        self.inventory_prefetcher = InventoryPrefetcher(self.service_coordinator, self.llm_service.request_analyzer)
+        self.task_executor = TaskExecutor(self.service_coordinator, self.confirmation_service, self.inventory_prefetcher)
+        self.response_formatter = ResponseFormatter(self.llm_service)
         from services.session_service import SessionService
         self.session_service = SessionService()
         
+        # ストリーミング計画モード（LLMが計画を書き終える前に読み取り専用タスクを開始）
+        self.streaming_planning_enabled = os.getenv("STREAMING_PLANNING_ENABLED", "false").lower() == "true"
+        
         # Handler initialization
         # Note: Callbacks are set later to avoid circular references
         self.confirmation_handler = ConfirmationHandler(
@@ -66,20 +87,20 @@ class TrueReactAgent:
         """Set SelectionHandler callback (called after initialization to avoid circular references)"""
         self.selection_handler.process_request_callback = self.process_request
     
-    async def process_request(self, user_request: str, user_id: str, token: str, sse_session_id: Optional[str] = None, is_confirmation_response: bool = False) -> Dict[str, Any]:
+    async def process_request(self, user_request: str, context: RequestContext, is_confirmation_response: bool = False) -> Dict[str, Any]:
         """
         Process user request through the complete ReAct loop.
         
         Args:
             user_request: User's natural language request
-            user_id: User identifier
-            token: Authentication token
-            sse_session_id: Optional SSE session ID for progress tracking
+            context: User identifier, authentication token and optional SSE session ID
             is_confirmation_response: Whether this is a response to confirmation request
             
         Returns:
             Final response string
         """
+        user_id, token, sse_session_id = context.user_id, context.token, context.sse_session_id
+        
         # Set callbacks on first invocation (to avoid circular references)
         if self.confirmation_handler.process_request_callback is None:
             self._set_confirmation_handler_callback()
@@ -138,31 +159,14 @@ class TrueReactAgent:
             task_chain_manager = TaskChainManager(sse_session_id)
             self.logger.info(f"🔗 [AGENT] TaskChainManager initialized")
             
-            # Step 1: Planning - Generate task list
-            self.logger.info(f"📋 [AGENT] Starting planning phase...")
-            tasks = await self.action_planner.plan(user_request, user_id, sse_session_id)
-            
-            # Inject session context for additional proposals
-            if sse_session_id and any(t.parameters.get("inventory_items", "").startswith("session.context.") for t in tasks):
-                self.logger.info(f"🔄 [AGENT] Detected session context references, injecting values")
-                for task in tasks:
-                    for key, value in task.parameters.items():
-                        if isinstance(value, str) and value.startswith("session.context."):
-                            context_key = value.replace("session.context.", "")
-                            context_value = await self.session_service.get_session_context(
-                                sse_session_id, context_key, None
-                            )
-                            task.parameters[key] = context_value
-                            self.logger.info(f"💾 [AGENT] Injected session context: {context_key} = {context_value}")
-            task_chain_manager.set_tasks(tasks)
-            self.logger.info(f"✅ [AGENT] Planning phase completed: {len(tasks)} tasks generated")
-            
-            # Step 2: Execution - Execute tasks
-            self.logger.info(f"⚙️ [AGENT] Starting execution phase...")
-            execution_result = await self.task_executor.execute(
-                tasks, user_id, task_chain_manager, token
+            # 在庫を使う計画と予測できる場合は計画と並行して在庫を先読み
+            task_chain_manager.inventory_prefetch = self.inventory_prefetcher.start(
+                user_request, user_id, token, sse_session_id
             )
-            self.logger.info(f"✅ [AGENT] Execution phase completed: status={execution_result.status}")
+            try:
+                execution_result = await self._plan_and_execute(user_request, context, task_chain_manager)
+            finally:
+                self.inventory_prefetcher.release(task_chain_manager.inventory_prefetch)
             
             # Step 3: Handle confirmation if needed
             if execution_result.status == "needs_confirmation":
@@ -217,6 +221,56 @@ class TrueReactAgent:
             self.logger.error(f"❌ [AGENT] Request processing failed: {str(e)}")
             return {"response": f"リクエストの処理中にエラーが発生しました: {str(e)}"}
     
+    async def _plan_and_execute(self, user_request: str, context: RequestContext, task_chain_manager: TaskChainManager) -> ExecutionResult:
+        """Plan the request and execute the resulting tasks (Steps 1 and 2)."""
+        user_id, token, sse_session_id = context.user_id, context.token, context.sse_session_id
+        if self.streaming_planning_enabled:
+            # Step 1+2: Planning and execution overlapped (tasks start while the plan is streaming)
+            self.logger.info(f"📋 [AGENT] Starting streaming planning/execution phase...")
+            execution_result = await self.task_executor.execute_stream(
+                self._stream_planned_tasks(user_request, context),
+                user_id, task_chain_manager, token
+            )
+            self.logger.info(f"✅ [AGENT] Streaming planning/execution phase completed: {len(task_chain_manager.tasks)} tasks, status={execution_result.status}")
+        else:
+            # Step 1: Planning - Generate task list
+            self.logger.info(f"📋 [AGENT] Starting planning phase...")
+            tasks = await self.action_planner.plan(user_request, user_id, sse_session_id)
+            
+            # Inject session context for additional proposals
+            if sse_session_id and any(t.parameters.get("inventory_items", "").startswith("session.context.") for t in tasks):
+                self.logger.info(f"🔄 [AGENT] Detected session context references, injecting values")
+                for task in tasks:
+                    await self._inject_session_context(task, sse_session_id)
+            task_chain_manager.set_tasks(tasks)
+            self.logger.info(f"✅ [AGENT] Planning phase completed: {len(tasks)} tasks generated")
+            
+            # Step 2: Execution - Execute tasks
+            self.logger.info(f"⚙️ [AGENT] Starting execution phase...")
+            execution_result = await self.task_executor.execute(
+                tasks, user_id, task_chain_manager, token
+            )
+            self.logger.info(f"✅ [AGENT] Execution phase completed: status={execution_result.status}")
+        return execution_result
+    
+    async def _inject_session_context(self, task: Task, sse_session_id: str) -> None:
+        """Replace "session.context.*" parameter values with the stored session context."""
+        for key, value in task.parameters.items():
+            if isinstance(value, str) and value.startswith("session.context."):
+                context_key = value.replace("session.context.", "")
+                context_value = await self.session_service.get_session_context(
+                    sse_session_id, context_key, None
+                )
+                task.parameters[key] = context_value
+                self.logger.info(f"💾 [AGENT] Injected session context: {context_key} = {context_value}")
+    
+    async def _stream_planned_tasks(self, user_request: str, context: RequestContext) -> AsyncIterator[Task]:
+        """Yield planned tasks as they stream from the planner, with session context injected."""
+        async for task in self.action_planner.plan_stream(user_request, context.user_id, context.sse_session_id):
+            if context.sse_session_id:
+                await self._inject_session_context(task, context.sse_session_id)
+            yield task
+    
     async def handle_user_selection_required(self, candidates: list, context: dict, task_chain_manager: TaskChainManager) -> dict:
         """Handle user selection required (delegates to SelectionHandler)"""
         return await self.selection_handler.handle_user_selection_required(candidates, context, task_chain_manager)
@@ -5,20 +5,44 @@ This component manages task execution, dependency resolution, and parallel proce
 """
 
 import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Set, Optional
+import re
+from typing import List, Dict, Any, Set, Optional, Tuple, AsyncIterator
 from .models import Task, TaskStatus, TaskChainManager, ExecutionResult
+from .param_resolver import compile_parameters, resolve_parameters
 from .exceptions import TaskExecutionError, CircularDependencyError, AmbiguityDetected
 from .service_coordinator import ServiceCoordinator
 from config.loggers import GenericLogger
 
 
 class TaskExecutor:
-    """Executes tasks with dependency resolution and parallel processing."""
+    """Executes tasks with dependency resolution and parallel processing.
     
-    def __init__(self, service_coordinator: ServiceCoordinator, confirmation_service=None):
+    Tasks are scheduled as a dependency-driven DAG: each task is launched as
+    soon as all of its own dependencies have completed, without waiting for
+    unrelated tasks started in the same round.
+    """
+    
+    # 計画のストリーミング中に先行実行してよい読み取り専用メソッド
+    # （データを変更せず、曖昧性チェックの対象にもならないもの）
+    EARLY_DISPATCH_METHODS = frozenset({
+        "get_inventory",
+        "get_recipe_history",
+        "history_get_recent_titles",
+        "session_get_proposed_titles",
+    })
+    
+    # 在庫一覧を表示せず、在庫を食材名のリストとしてのみ使う献立提案メソッド
+    MENU_METHODS = frozenset({
+        "generate_menu_plan",
+        "search_menu_from_rag",
+    })
+    
+    def __init__(self, service_coordinator: ServiceCoordinator, confirmation_service=None, inventory_prefetcher=None):
         self.service_coordinator = service_coordinator
         self.confirmation_service = confirmation_service
+        self.inventory_prefetcher = inventory_prefetcher
         self.logger = GenericLogger("core", "executor")
     
     async def execute(self, tasks: List[Task], user_id: str, task_chain_manager: TaskChainManager, token: str) -> ExecutionResult:
@@ -63,86 +87,109 @@ class TaskExecutor:
                 
                 self.logger.info(f"✅ [EXECUTOR] No ambiguity detected, proceeding with execution")
             
-            # Log task dependency graph
-            self.logger.info(f"📊 [EXECUTOR] Task dependency graph:")
-            for task in tasks:
-                deps_str = f"deps: {task.dependencies}" if task.dependencies else "no dependencies"
-                self.logger.info(f"  - {task.id}: {task.service}.{task.method} ({deps_str})")
+            return await self._run_task_graph(tasks, user_id, task_chain_manager, token)
+            
+        except AmbiguityDetected as e:
+            return ExecutionResult(
+                status="needs_confirmation",
+                confirmation_context=e.context,
+                message=e.message
+            )
+        except Exception as e:
+            self.logger.error(f"Task execution failed: {str(e)}")
+            return ExecutionResult(status="error", message=str(e))
+    
+    async def execute_stream(self, task_stream: AsyncIterator[Task], user_id: str, task_chain_manager: TaskChainManager, token: str) -> ExecutionResult:
+        """
+        Execute tasks while they are still being planned.
+        
+        Tasks are received from ``task_stream`` one at a time. While the plan is
+        still streaming, read-only tasks (EARLY_DISPATCH_METHODS) whose
+        dependencies are completed start immediately. Tasks that modify data
+        or may need user confirmation wait until the plan is complete and the
+        ambiguity check over the whole plan has passed, exactly as in execute().
+        
+        Args:
+            task_stream: Async iterator yielding planned tasks in plan order
+            user_id: User identifier
+            task_chain_manager: Task chain manager for progress tracking
+            token: Authentication token
             
-            remaining_tasks = tasks.copy()
-            all_results = {}
-            iteration = 0
+        Returns:
+            ExecutionResult with status and outputs
+        """
+        tasks: List[Task] = []
+        all_results: Dict[str, Any] = {}
+        running: Dict[asyncio.Task, Task] = {}
+        ambiguity: Optional[AmbiguityDetected] = None
+        stream = task_stream.__aiter__()
+        next_task: Optional[asyncio.Future] = asyncio.ensure_future(stream.__anext__())
+        
+        try:
+            self.logger.info(f"🔄 [EXECUTOR] Starting streaming ReAct loop for user {user_id}")
             
-            while remaining_tasks:
-                iteration += 1
-                self.logger.info(f"🔄 [EXECUTOR] ReAct iteration {iteration}: {len(remaining_tasks)} tasks remaining")
-                # Find executable group (tasks with resolved dependencies)
-                executable_group = self._find_executable_group(remaining_tasks, all_results)
-                
-                if not executable_group:
-                    # Check if we have remaining tasks but no executable ones
-                    if remaining_tasks:
-                        self.logger.error(f"❌ [EXECUTOR] Circular dependency detected in task graph")
-                        raise CircularDependencyError("Circular dependency detected in task graph")
-                    self.logger.info(f"✅ [EXECUTOR] All tasks completed")
-                    break
+            while next_task is not None:
+                done, _ = await asyncio.wait({next_task, *running.keys()}, return_when=asyncio.FIRST_COMPLETED)
                 
-                # Log executable group
-                group_task_ids = [task.id for task in executable_group]
-                self.logger.info(f"⚡ [EXECUTOR] Executing group {iteration}: {group_task_ids}")
-                for task in executable_group:
-                    self.logger.info(f"  - {task.id}: {task.service}.{task.method}")
+                if next_task in done:
+                    done.discard(next_task)
+                    try:
+                        task = next_task.result()
+                    except StopAsyncIteration:
+                        next_task = None
+                    else:
+                        tasks.append(task)
+                        task_chain_manager.add_task(task)
+                        self.logger.info(f"📥 [EXECUTOR] Received planned task {task.id}: {task.service}.{task.method}")
+                        next_task = asyncio.ensure_future(stream.__anext__())
                 
-                # Execute tasks in parallel
-                group_results = await self._execute_group(executable_group, user_id, all_results, task_chain_manager, token)
+                _, finished_ambiguity = self._collect_finished_tasks(done, running, all_results, task_chain_manager)
+                if ambiguity is None:
+                    ambiguity = finished_ambiguity
                 
-                # Process results
-                completed_count = 0
-                for task, result in zip(executable_group, group_results):
-                    if isinstance(result, AmbiguityDetected):
-                        # Ambiguity detected - interrupt execution
-                        self.logger.warning(f"⚠️ [EXECUTOR] Ambiguity detected in task {task.id}: {result.message}")
-                        return ExecutionResult(
-                            status="needs_confirmation",
-                            confirmation_context=result.context,
-                            message=result.message
-                        )
-                    
-                    if isinstance(result, Exception):
-                        self.logger.error(f"❌ [EXECUTOR] Task {task.id} failed: {str(result)}")
-                        task.status = TaskStatus.FAILED
-                        task.error = str(result)
-                        task_chain_manager.update_task_status(task.id, TaskStatus.FAILED, error=str(result))
-                    else:
-                        self.logger.info(f"✅ [EXECUTOR] Task {task.id} completed successfully")
-                        task.status = TaskStatus.COMPLETED
-                        task.result = result
-                        all_results[task.id] = result
-                        task_chain_manager.update_task_status(task.id, TaskStatus.COMPLETED, result)
-                        completed_count += 1
+                # 計画の生成中は読み取り専用タスクのみ先行して開始
+                if ambiguity is None:
+                    for task in tasks:
+                        if (task.status == TaskStatus.PENDING
+                                and task.method in self.EARLY_DISPATCH_METHODS
+                                and self._are_dependencies_satisfied(task, all_results)):
+                            self.logger.info(f"⚡ [EXECUTOR] Early dispatch while planning: {task.id}")
+                            running[self._start_task(task, user_id, all_results, task_chain_manager, token)] = task
+            
+            self.logger.info(f"📋 [EXECUTOR] Plan stream completed: {len(tasks)} tasks, {len(all_results)} completed, {len(running)} running")
+            
+            # 計画確定後に計画全体で曖昧性チェック（execute()と同じ）
+            if self.confirmation_service and ambiguity is None:
+                self.logger.info(f"🔍 [EXECUTOR] Checking for ambiguity before execution")
+                ambiguity_result = await self.confirmation_service.detect_ambiguity(tasks, user_id, token)
                 
-                # 完了したタスク数分だけ進捗を更新
-                if completed_count > 0:
-                    task_chain_manager.current_step += completed_count
-                    
-                    # 完了したタスクの情報を使用
-                    completed_tasks = [task for task, result in zip(executable_group, group_results) 
-                                     if not isinstance(result, Exception) and not isinstance(result, AmbiguityDetected)]
+                if ambiguity_result.requires_confirmation:
+                    self.logger.info(f"⚠️ [EXECUTOR] Ambiguity detected, requesting confirmation")
+                    # 先行実行分は破棄し、確認後に計画全体を実行し直す
+                    await self._cancel_running(running)
+                    for task in tasks:
+                        task.status = TaskStatus.PENDING
+                        task.result = None
+                        task.error = None
                     
-                    if completed_tasks:
-                        # 最初の完了タスクの情報を使用
-                        first_completed_task = completed_tasks[0]
-                        task_chain_manager.send_progress(first_completed_task.id, "完了", f"{completed_count}個のタスクが完了しました")
+                    first_ambiguous_task = ambiguity_result.ambiguous_tasks[0]
+                    return ExecutionResult(
+                        status="needs_confirmation",
+                        confirmation_context={
+                            "ambiguity_info": first_ambiguous_task,
+                            "user_response": "",
+                            "original_tasks": tasks
+                        },
+                        outputs={},
+                        message=first_ambiguous_task.details["message"]
+                    )
                 
-                # Remove completed tasks from remaining
-                completed_ids = [task.id for task in executable_group]
-                remaining_tasks = [t for t in remaining_tasks if t.id not in completed_ids]
-                self.logger.info(f"📊 [EXECUTOR] Completed {len(completed_ids)} tasks, {len(remaining_tasks)} remaining")
+                self.logger.info(f"✅ [EXECUTOR] No ambiguity detected, proceeding with execution")
             
-            self.logger.info("✅ [EXECUTOR] ReAct loop completed successfully")
-            return ExecutionResult(status="success", outputs=all_results)
+            return await self._run_task_graph(tasks, user_id, task_chain_manager, token, all_results, running, ambiguity)
             
         except AmbiguityDetected as e:
+            await self._cancel_running(running)
             return ExecutionResult(
                 status="needs_confirmation",
                 confirmation_context=e.context,
@@ -150,21 +197,203 @@ class TaskExecutor:
             )
         except Exception as e:
             self.logger.error(f"Task execution failed: {str(e)}")
+            await self._cancel_running(running)
             return ExecutionResult(status="error", message=str(e))
+        finally:
+            if next_task is not None and not next_task.done():
+                next_task.cancel()
+                await asyncio.gather(next_task, return_exceptions=True)
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception:
+                    pass
     
-    def _find_executable_group(self, tasks: List[Task], completed_results: Dict[str, Any]) -> List[Task]:
-        """Find tasks that can be executed (dependencies resolved)."""
-        executable = []
+    async def _run_task_graph(
+        self,
+        tasks: List[Task],
+        user_id: str,
+        task_chain_manager: TaskChainManager,
+        token: str,
+        all_results: Optional[Dict[str, Any]] = None,
+        running: Optional[Dict[asyncio.Task, Task]] = None,
+        ambiguity: Optional[AmbiguityDetected] = None
+    ) -> ExecutionResult:
+        """
+        Run the task DAG until every reachable task has finished.
+        
+        ``all_results`` and ``running`` carry over tasks that were already
+        completed or started (e.g. early-dispatched by execute_stream).
+        """
+        all_results = {} if all_results is None else all_results
+        running = {} if running is None else running
+        
+        self._apply_inventory_projection(tasks)
+        
+        # Log task dependency graph
+        self.logger.info(f"📊 [EXECUTOR] Task dependency graph:")
+        for task in tasks:
+            deps_str = f"deps: {task.dependencies}" if task.dependencies else "no dependencies"
+            self.logger.info(f"  - {task.id}: {task.service}.{task.method} ({deps_str})")
+        
+        # Build dependency index (in-degree + reverse edges) once
+        in_degree, dependents = self._build_dependency_index(tasks, all_results)
+        ready = [task for task in tasks if task.status == TaskStatus.PENDING and in_degree[task.id] == 0]
+        
+        pending_count = sum(1 for task in tasks if task.status == TaskStatus.PENDING)
+        iteration = 0
+        
+        while ready or running:
+            # Launch every task whose dependencies are all completed
+            if ready and ambiguity is None:
+                ready_ids = [task.id for task in ready]
+                self.logger.info(f"⚡ [EXECUTOR] Launching ready tasks: {ready_ids}")
+                for task in ready:
+                    running[self._start_task(task, user_id, all_results, task_chain_manager, token)] = task
+                    pending_count -= 1
+            ready = []
+            
+            if not running:
+                break
+            
+            # Wait for the first task(s) to finish, then unlock their dependents
+            iteration += 1
+            done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+            self.logger.info(f"🔄 [EXECUTOR] ReAct iteration {iteration}: {len(done)} finished, {len(running) - len(done)} running, {pending_count} waiting")
+            
+            completed_tasks, finished_ambiguity = self._collect_finished_tasks(done, running, all_results, task_chain_manager)
+            if ambiguity is None:
+                ambiguity = finished_ambiguity
+            
+            for task in completed_tasks:
+                for dependent in dependents.get(task.id, []):
+                    in_degree[dependent.id] -= 1
+                    if in_degree[dependent.id] == 0 and dependent.status == TaskStatus.PENDING:
+                        ready.append(dependent)
+        
+        if ambiguity is not None:
+            return ExecutionResult(
+                status="needs_confirmation",
+                confirmation_context=ambiguity.context,
+                message=str(ambiguity)
+            )
+        
+        if pending_count > 0:
+            # Remaining tasks whose dependencies can never be satisfied
+            self.logger.error(f"❌ [EXECUTOR] Circular dependency detected in task graph")
+            raise CircularDependencyError("Circular dependency detected in task graph")
+        
+        self.logger.info("✅ [EXECUTOR] ReAct loop completed successfully")
+        return ExecutionResult(status="success", outputs=all_results)
+    
+    def _apply_inventory_projection(self, tasks: List[Task]) -> None:
+        """
+        Request only item_name for inventory reads that are consumed as a name list.
+        
+        In menu plans the inventory list is not shown to the user, so when every
+        reference to a get_inventory task is the plain "taskN.result" form
+        (resolved to the item name list), the other columns are never read.
+        """
+        if not any(task.service == "recipe_service" and task.method in self.MENU_METHODS for task in tasks):
+            return
         
         for task in tasks:
-            if task.status != TaskStatus.PENDING:
+            if (task.status != TaskStatus.PENDING
+                    or task.service != "inventory_service"
+                    or task.method != "get_inventory"
+                    or "fields" in task.parameters):
                 continue
-                
-            # Check if all dependencies are completed
-            if self._are_dependencies_satisfied(task, completed_results):
-                executable.append(task)
+            
+            name_ref = f"{task.id}.result"
+            ref_pattern = re.compile(rf"(?<![\w.]){re.escape(name_ref)}(?![\w])")
+            name_consumers = 0
+            full_consumers = 0
+            for other in tasks:
+                if other is task:
+                    continue
+                for value in other.parameters.values():
+                    if value == name_ref:
+                        name_consumers += 1
+                    elif ref_pattern.search(value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)):
+                        full_consumers += 1
+            
+            if name_consumers and not full_consumers:
+                task.parameters["fields"] = ["item_name"]
+                self.logger.info(f"✂️ [EXECUTOR] Requesting item_name only for {task.id} ({name_consumers} name-list consumers)")
+    
+    def _collect_finished_tasks(
+        self,
+        done: Set[asyncio.Task],
+        running: Dict[asyncio.Task, Task],
+        all_results: Dict[str, Any],
+        task_chain_manager: TaskChainManager
+    ) -> Tuple[List[Task], Optional[AmbiguityDetected]]:
+        """Record the outcome of finished tasks and report progress."""
+        completed_tasks = []
+        ambiguity: Optional[AmbiguityDetected] = None
+        
+        for future in done:
+            task = running.pop(future)
+            result = future.exception() or future.result()
+            
+            if isinstance(result, AmbiguityDetected):
+                # Ambiguity detected - stop launching new tasks and interrupt after in-flight tasks finish
+                self.logger.warning(f"⚠️ [EXECUTOR] Ambiguity detected in task {task.id}: {result}")
+                if ambiguity is None:
+                    ambiguity = result
+                continue
+            
+            if isinstance(result, Exception):
+                self.logger.error(f"❌ [EXECUTOR] Task {task.id} failed: {str(result)}")
+                task.status = TaskStatus.FAILED
+                task.error = str(result)
+                task_chain_manager.update_task_status(task.id, TaskStatus.FAILED, error=str(result))
+                continue
+            
+            self.logger.info(f"✅ [EXECUTOR] Task {task.id} completed successfully")
+            task.status = TaskStatus.COMPLETED
+            task.result = result
+            all_results[task.id] = result
+            task_chain_manager.update_task_status(task.id, TaskStatus.COMPLETED, result)
+            completed_tasks.append(task)
+        
+        # 完了したタスク数分だけ進捗を更新
+        if completed_tasks:
+            task_chain_manager.current_step += len(completed_tasks)
+            # 最初の完了タスクの情報を使用
+            first_completed_task = completed_tasks[0]
+            task_chain_manager.send_progress(first_completed_task.id, "完了", f"{len(completed_tasks)}個のタスクが完了しました")
+        
+        return completed_tasks, ambiguity
+    
+    async def _cancel_running(self, running: Dict[asyncio.Task, Task]) -> None:
+        """Cancel in-flight tasks and wait for them to unwind."""
+        if not running:
+            return
+        for future in running:
+            future.cancel()
+        await asyncio.gather(*running.keys(), return_exceptions=True)
+        running.clear()
+    
+    def _build_dependency_index(self, tasks: List[Task], completed_results: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, int], Dict[str, List[Task]]]:
+        """Build in-degree counts and reverse dependency edges for O(1) readiness checks.
+        
+        Dependencies that already have a result in ``completed_results`` are not counted.
+        """
+        completed_results = completed_results or {}
+        in_degree = {
+            task.id: len({dep_id for dep_id in task.dependencies if dep_id not in completed_results})
+            for task in tasks
+        }
+        dependents: Dict[str, List[Task]] = {}
+        
+        for task in tasks:
+            for dep_id in set(task.dependencies):
+                if dep_id not in completed_results:
+                    dependents.setdefault(dep_id, []).append(task)
         
-        return executable
+        return in_degree, dependents
     
     def _are_dependencies_satisfied(self, task: Task, completed_results: Dict[str, Any]) -> bool:
         """Check if all task dependencies are satisfied."""
@@ -173,20 +402,15 @@ class TaskExecutor:
                 return False
         return True
     
-    async def _execute_group(self, tasks: List[Task], user_id: str, previous_results: Dict[str, Any], task_chain_manager: TaskChainManager, token: str) -> List[Any]:
-        """Execute a group of tasks in parallel."""
-        coroutines = []
+    def _start_task(self, task: Task, user_id: str, previous_results: Dict[str, Any], task_chain_manager: TaskChainManager, token: str) -> asyncio.Task:
+        """Mark a task as running and schedule it on the event loop."""
+        task.status = TaskStatus.RUNNING
+        task_chain_manager.update_task_status(task.id, TaskStatus.RUNNING)
+        self.logger.info(f"  - {task.id}: {task.service}.{task.method}")
         
-        for task in tasks:
-            task.status = TaskStatus.RUNNING
-            task_chain_manager.update_task_status(task.id, TaskStatus.RUNNING)
-            
-            coroutine = self._execute_single_task(task, user_id, previous_results, token, task_chain_manager)
-            coroutines.append(coroutine)
-        
-        # Execute all tasks in parallel
-        results = await asyncio.gather(*coroutines, return_exceptions=True)
-        return results
+        return asyncio.create_task(
+            self._execute_single_task(task, user_id, previous_results, token, task_chain_manager)
+        )
     
     async def _execute_single_task(self, task: Task, user_id: str, previous_results: Dict[str, Any], token: str, task_chain_manager: TaskChainManager = None) -> Any:
         """Execute a single task with data injection."""
@@ -194,7 +418,7 @@ class TaskExecutor:
             self.logger.info(f"🚀 [EXECUTOR] Starting task {task.id}: {task.service}.{task.method}")
             
             # Inject data from previous tasks
-            injected_params = self._inject_data(task.parameters, previous_results)
+            injected_params = self._inject_data(task, previous_results)
             
             # Phase 1F: session_get_proposed_titlesのsse_session_idを実際のセッションIDで置き換え
             if task.method == "session_get_proposed_titles" and task_chain_manager and task_chain_manager.sse_session_id:
@@ -211,9 +435,16 @@ class TaskExecutor:
             if task_chain_manager and task_chain_manager.sse_session_id and task.method == "generate_proposals":
                 injected_params["sse_session_id"] = task_chain_manager.sse_session_id
             
-            result = await self.service_coordinator.execute_service(
-                task.service, task.method, injected_params, token
-            )
+            result = None
+            prefetch = task_chain_manager.inventory_prefetch if task_chain_manager else None
+            if prefetch is not None and self.inventory_prefetcher and prefetch.matches(task, injected_params):
+                # 計画と並行して先読みした在庫を利用（古い・失敗した場合は通常通り実行）
+                result = await self.inventory_prefetcher.claim(prefetch)
+            
+            if result is None:
+                result = await self.service_coordinator.execute_service(
+                    task.service, task.method, injected_params, token
+                )
             
             self.logger.info(f"📤 [EXECUTOR] Task {task.id} output result: {result}")
             self.logger.info(f"✅ [EXECUTOR] Task {task.id} completed successfully")
@@ -223,239 +454,15 @@ class TaskExecutor:
             self.logger.error(f"❌ [EXECUTOR] Task {task.id} failed: {str(e)}")
             raise
     
-    def _inject_data(self, parameters: Dict[str, Any], previous_results: Dict[str, Any]) -> Dict[str, Any]:
-        """Inject data from previous task results into parameters (辞書構造対応版)."""
-        injected = parameters.copy()
-        
-        
-        for key, value in parameters.items():
-            self.logger.info(f"🔍 [EXECUTOR] Processing parameter: key={key}, value={value}, type={type(value)}")
-            
-            # Phase 1F: セッションコンテキスト参照の処理（"session.context.xxx"形式）
-            if isinstance(value, str) and value.startswith("session.context."):
-                self.logger.info(f"🔍 [EXECUTOR] Detected session context reference: {value}")
-                # この時点では文字列のまま保持（エージェントで実際にセッションから取得する）
-                # injected[key] = value  # 既にvalueが設定されているため変更不要
-                continue
-            
-            if isinstance(value, str):
-                # 結合演算: "task1.result.data + task2.result.data"
-                if " + " in value and ".result." in value:
-                    self.logger.info(f"🔍 [EXECUTOR] Match: concatenation operation ({value})")
-                    resolved_value = self._resolve_concatenation(value, previous_results)
-                    if resolved_value is not None:
-                        injected[key] = resolved_value
-                        self.logger.info(f"🔗 [EXECUTOR] Resolved concatenation '{value}' = {len(resolved_value)} items")
-                
-                # 辞書フィールド参照: "task2.result.main_dish"
-                elif ".result." in value and value.endswith((".main_dish", ".side_dish", ".soup")):
-                    self.logger.info(f"🔍 [EXECUTOR] Match: dict field reference ({value})")
-                    field_value = self._extract_field_from_result(value, previous_results)
-                    injected[key] = field_value
-                    self.logger.info(f"🔗 [EXECUTOR] Extracted field '{value}' = '{field_value}'")
-                
-                # 複数フィールド参照: "task2.result.main_dish,task3.result.main_dish"
-                elif "," in value and ".result." in value:
-                    self.logger.info(f"🔍 [EXECUTOR] Match: multiple fields reference ({value})")
-                    field_values = self._extract_multiple_fields(value, previous_results)
-                    injected[key] = field_values
-                    self.logger.info(f"🔗 [EXECUTOR] Extracted multiple fields '{value}' = {field_values}")
-                
-                # ネストパス参照: "task2.result.data", "task1.result.success" など
-                elif ".result." in value:
-                    self.logger.info(f"🔍 [EXECUTOR] Match: nested path reference ({value})")
-                    resolved_value = self._extract_nested_path(value, previous_results)
-                    if resolved_value is not None:
-                        injected[key] = resolved_value
-                        self.logger.info(f"🔗 [EXECUTOR] Injected nested path '{value}' = {resolved_value}")
-                
-                # 単一タスク結果参照: "task1.result"
-                elif value.endswith(".result"):
-                    self.logger.info(f"🔍 [EXECUTOR] Match: single task result reference ({value})")
-                    task_ref = value[:-7]  # "task1.result" -> "task1"
-                    
-                    if task_ref in previous_results:
-                        # 在庫データから食材名リストを抽出
-                        inventory_data = previous_results[task_ref]
-                        
-                        if isinstance(inventory_data, dict) and inventory_data.get("success"):
-                            items = inventory_data.get("result", {}).get("data", [])
-                            item_names = [item.get("item_name") for item in items if item.get("item_name")]
-                            injected[key] = item_names
-                            self.logger.info(f"🔗 [EXECUTOR] Injected {len(item_names)} items from {task_ref} to {key}")
-                        else:
-                            self.logger.warning(f"⚠️ [EXECUTOR] Inventory data is not successful: {inventory_data}")
-                    else:
-                        self.logger.warning(f"⚠️ [EXECUTOR] Task reference not found in previous_results: {task_ref}")
-                else:
-                    self.logger.info(f"🔍 [EXECUTOR] No match: keeping original value ({value})")
-                    # その他の文字列はそのまま保持
-                    pass
-            
-            elif isinstance(value, list):
-                # 🆕 リスト型パラメータの処理を追加
-                resolved_list = []
-                
-                for item in value:
-                    if isinstance(item, str):
-                        # リスト内の各要素を解決
-                        if ".result." in item:
-                            # ネストされたパス（task2.result.data.main_dishなど）の場合は_extract_nested_pathを使用
-                            # シンプルなパス（task2.result.main_dish）の場合は_extract_field_from_resultを使用
-                            dot_count = item.count(".")
-                            if dot_count >= 3 and item.endswith((".main_dish", ".side_dish", ".soup")):
-                                # ネストされたパスの場合
-                                field_value = self._extract_nested_path(item, previous_results)
-                                resolved_list.append(field_value if field_value is not None else "")
-                                self.logger.info(f"🔗 [EXECUTOR] Resolved nested path list item '{item}' = '{field_value}'")
-                            elif item.endswith((".main_dish", ".side_dish", ".soup")):
-                                # シンプルなパスの場合
-                                field_value = self._extract_field_from_result(item, previous_results)
-                                resolved_list.append(field_value)
-                                self.logger.info(f"🔗 [EXECUTOR] Resolved list item '{item}' = '{field_value}'")
-                            elif item.endswith(".result"):
-                                # 単一タスク結果参照
-                                task_ref = item[:-7]
-                                if task_ref in previous_results:
-                                    task_result = previous_results[task_ref]
-                                    if isinstance(task_result, dict) and task_result.get("success"):
-                                        resolved_list.append(task_result.get("result", {}))
-                                        self.logger.info(f"🔗 [EXECUTOR] Resolved list item '{item}' = task result")
-                                else:
-                                    resolved_list.append(item)
-                            else:
-                                # その他の.result.を含む文字列はネストパスとして処理
-                                resolved_value = self._extract_nested_path(item, previous_results)
-                                resolved_list.append(resolved_value if resolved_value is not None else item)
-                                self.logger.info(f"🔗 [EXECUTOR] Resolved nested path list item '{item}' = '{resolved_value}'")
-                        else:
-                            # その他の文字列はそのまま
-                            resolved_list.append(item)
-                    else:
-                        # 文字列以外はそのまま
-                        resolved_list.append(item)
-                
-                injected[key] = resolved_list
-                self.logger.info(f"🔗 [EXECUTOR] Resolved list parameter '{key}' = {resolved_list}")
-            
-            else:
-                # その他の型はそのまま保持
-                pass
+    def _inject_data(self, task: Task, previous_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Inject data from previous task results into parameters (コンパイル済み参照式版)."""
+        compiled = task.compiled_parameters
+        if compiled is None or not compiled.matches(task.parameters):
+            # 確認後の再計画などでプランナーを経由しないタスク、またはパラメータ変更後は再コンパイル
+            compiled = compile_parameters(task.parameters)
+            task.compiled_parameters = compiled
         
+        injected = resolve_parameters(compiled, task.parameters, previous_results)
+        if compiled.refs:
+            self.logger.info(f"🔗 [EXECUTOR] Resolved {len(compiled.refs)} parameter references for {task.id}: {list(compiled.refs)}")
         return injected
-    
-    def _extract_field_from_result(self, value: str, previous_results: Dict[str, Any]) -> str:
-        """辞書構造から特定フィールドを抽出"""
-        # "task2.result.main_dish" -> task2のmain_dishフィールドを抽出
-        parts = value.split(".")
-        task_id = parts[0]
-        field_name = parts[2]  # main_dish, side_dish, soup
-        
-        
-        if task_id in previous_results:
-            task_result = previous_results[task_id]
-            
-            if isinstance(task_result, dict) and task_result.get("success"):
-                data = task_result.get("result", {}).get("data", {})
-                field_value = data.get(field_name, "")
-                self.logger.info(f"🔗 [EXECUTOR] Extracted '{field_name}' = '{field_value}'")
-                return field_value
-            else:
-                self.logger.warning(f"⚠️ [EXECUTOR] Task result is not successful: {task_result}")
-        else:
-            self.logger.warning(f"⚠️ [EXECUTOR] Task '{task_id}' not found in previous_results")
-        
-        return ""
-    
-    def _extract_multiple_fields(self, value: str, previous_results: Dict[str, Any]) -> List[str]:
-        """複数の辞書フィールドを抽出してリスト化"""
-        field_refs = [ref.strip() for ref in value.split(",")]
-        results = []
-        
-        
-        for field_ref in field_refs:
-            if ".result." in field_ref:
-                field_value = self._extract_field_from_result(field_ref, previous_results)
-                if field_value:  # 空文字列は除外
-                    results.append(field_value)
-                    self.logger.info(f"🔗 [EXECUTOR] Added field value: '{field_value}'")
-                else:
-                    # 空文字列の場合はスキップ
-                    pass
-        
-        self.logger.info(f"🔗 [EXECUTOR] Final extracted values: {results}")
-        return results
-    
-    def _extract_nested_path(self, path: str, previous_results: Dict[str, Any]) -> Any:
-        """ネストされたパスを解決（任意の深さに対応: task2.result.data.candidates など）"""
-        parts = path.split(".")
-        if len(parts) < 2:
-            self.logger.warning(f"⚠️ [EXECUTOR] Invalid nested path format: {path}")
-            return None
-        
-        task_id = parts[0]  # "task2"
-        path_after_task = parts[1:]  # ["result", "data", "candidates"]
-        
-        self.logger.info(f"🔍 [EXECUTOR] Extracting nested path: {path}")
-        self.logger.info(f"🔍 [EXECUTOR] task_id={task_id}, nested_path={'.'.join(path_after_task)}")
-        
-        if task_id not in previous_results:
-            self.logger.warning(f"⚠️ [EXECUTOR] Task '{task_id}' not found")
-            return None
-        
-        task_result = previous_results[task_id]
-        
-        # 再帰的にパスを辿る
-        current_value = task_result
-        
-        for key in path_after_task:
-            if isinstance(current_value, dict):
-                if key in current_value:
-                    current_value = current_value[key]
-                    self.logger.info(f"🔗 [EXECUTOR] Traversing to '{key}': found {type(current_value).__name__}")
-                else:
-                    self.logger.warning(f"⚠️ [EXECUTOR] Key '{key}' not found in {list(current_value.keys())}")
-                    return None
-            else:
-                self.logger.warning(f"⚠️ [EXECUTOR] Cannot traverse '{key}' from {type(current_value).__name__}")
-                return None
-        
-        self.logger.info(f"✅ [EXECUTOR] Successfully extracted: {type(current_value).__name__}")
-        
-        # Phase 3A Fix: candidatesが辞書のリストの場合、titleのリストに変換
-        if isinstance(current_value, list) and len(current_value) > 0 and isinstance(current_value[0], dict):
-            if "title" in current_value[0]:
-                titles = [item["title"] for item in current_value if "title" in item]
-                self.logger.info(f"🔧 [EXECUTOR] Converted candidates list to title list: {len(titles)} titles")
-                return titles
-        
-        return current_value
-    
-    def _resolve_concatenation(self, expression: str, previous_results: Dict[str, Any]) -> Optional[list]:
-        """結合演算を解決（例: "task1.result.data + task2.result.data"）"""
-        try:
-            parts = expression.split(" + ")
-            result_list = []
-            
-            for part in parts:
-                part = part.strip()
-                # ネストパス参照として解決
-                resolved_value = self._extract_nested_path(part, previous_results)
-                
-                if resolved_value is not None:
-                    # リストの場合は拡張、それ以外は追加
-                    if isinstance(resolved_value, list):
-                        result_list.extend(resolved_value)
-                        self.logger.info(f"🔗 [EXECUTOR] Extended {len(resolved_value)} items from {part}")
-                    else:
-                        result_list.append(resolved_value)
-                        self.logger.info(f"🔗 [EXECUTOR] Added item from {part}")
-                else:
-                    self.logger.warning(f"⚠️ [EXECUTOR] Could not resolve part: {part}")
-            
-            self.logger.info(f"✅ [EXECUTOR] Concatenation result: {len(result_list)} items")
-            return result_list
-            
-        except Exception as e:
-            self.logger.error(f"❌ [EXECUTOR] Error in _resolve_concatenation: {e}")
-            return None
@@ -10,7 +10,7 @@ This handler manages the confirmation flow including:
 
 from typing import Optional, Dict, Any, Callable
 from datetime import datetime
-from ..models import TaskChainManager, ExecutionResult
+from ..models import TaskChainManager, ExecutionResult, RequestContext
 from services.confirmation_service import ConfirmationService
 from services.session_service import SessionService
 from ..executor import TaskExecutor
@@ -174,7 +174,9 @@ class ConfirmationHandler:
                     # 統合されたリクエストで通常のプランニングループを実行
                     self.logger.info(f"▶️ [CONFIRMATION] Resuming planning loop with integrated request: {integrated_request}")
                     if self.process_request_callback:
-                        result = await self.process_request_callback(integrated_request, user_id, token, sse_session_id, False)
+                        result = await self.process_request_callback(
+                            integrated_request, RequestContext(user_id, token, sse_session_id), False
+                        )
                         return result
                     else:
                         self.logger.error(f"❌ [CONFIRMATION] process_request_callback not set")
@@ -8,7 +8,7 @@ This handler manages:
 """
 
 from typing import Optional, Dict, Any, Callable
-from ..models import TaskChainManager
+from ..models import TaskChainManager, RequestContext
 from services.session_service import SessionService
 from config.loggers import GenericLogger
 from .stage_manager import StageManager
@@ -375,9 +375,7 @@ class SelectionHandler:
             
             result = await self.process_request_callback(
                 additional_request,
-                user_id,
-                token,
-                sse_session_id,  # 新しいSSEセッションID（フロントエンドから渡される）
+                RequestContext(user_id, token, sse_session_id),  # 新しいSSEセッションID（フロントエンドから渡される）
                 is_confirmation_response=False
             )
             
@@ -0,0 +1,154 @@
+"""
+InventoryPrefetcher: Speculative inventory fetch for the core layer.
+
+Proposal and menu plans almost always start with
+inventory_service.get_inventory. The prefetcher starts that read in parallel
+with planning, and the executor satisfies the matching task from the
+prefetched result instead of calling the service again.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from .models import Task
+from .service_coordinator import ServiceCoordinator
+from config.loggers import GenericLogger
+
+# 環境変数を読み込み
+load_dotenv()
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """Retrieve a finished prefetch's exception so it is not logged as unhandled."""
+    if not future.cancelled():
+        future.exception()
+
+
+class InventoryPrefetch:
+    """A single in-flight (or finished) speculative inventory fetch for one request."""
+
+    def __init__(self, user_id: str, future: asyncio.Task):
+        self.user_id = user_id
+        self.future = future
+        self.started_at = time.monotonic()
+        self.claimed = False
+        # 古すぎて使わなかった場合（staleとして計上済みのためwastedには数えない）
+        self.stale = False
+
+    def matches(self, task: Task, parameters: Dict[str, Any]) -> bool:
+        """Whether the task is the same inventory read as this prefetch."""
+        return (
+            task.service == "inventory_service"
+            and task.method == "get_inventory"
+            # 依存タスク（在庫追加など）の後に読む場合は先読み結果では代替できない
+            and not task.dependencies
+            # 全列の先読み結果は列を絞った取得（fields指定）の代わりにもなる
+            and set(parameters) <= {"user_id", "fields"}
+            and parameters.get("user_id", self.user_id) == self.user_id
+        )
+
+
+class InventoryPrefetcher:
+    """Starts speculative inventory reads and tracks hit/waste counters."""
+
+    # 計画の先頭で在庫を取得するパターン（追加提案は在庫を再取得しない）
+    PREFETCH_PATTERNS = frozenset({"main", "sub", "soup", "menu"})
+
+    def __init__(self, service_coordinator: ServiceCoordinator, request_analyzer=None):
+        self.logger = GenericLogger("core", "inventory_prefetch")
+        self.service_coordinator = service_coordinator
+        self.request_analyzer = request_analyzer
+        # キルスイッチ（falseで先読みしない）
+        self.enabled = os.getenv("INVENTORY_PREFETCH_ENABLED", "true").lower() == "true"
+        # 先読み結果を利用できる最大経過秒数（これより古い結果は使わずに再取得）
+        self.max_age = float(os.getenv("INVENTORY_PREFETCH_MAX_AGE", "15"))
+        self.stats = {"started": 0, "hits": 0, "stale": 0, "failed": 0, "wasted": 0}
+
+    def start(self, user_request: str, user_id: str, token: str, sse_session_id: Optional[str] = None) -> Optional[InventoryPrefetch]:
+        """
+        Start a speculative inventory read if the request is predicted to need one.
+
+        Args:
+            user_request: User's natural language request
+            user_id: User identifier
+            token: Authentication token
+            sse_session_id: SSE session ID
+
+        Returns:
+            InventoryPrefetch handle, or None if no prefetch was started
+        """
+        if not self.enabled or self.request_analyzer is None:
+            return None
+
+        try:
+            pattern = self.request_analyzer.analyze(user_request, user_id, sse_session_id)["pattern"]
+        except Exception as e:
+            self.logger.warning(f"⚠️ [PREFETCH] Pattern prediction failed, skipping prefetch: {e}")
+            return None
+
+        if pattern not in self.PREFETCH_PATTERNS:
+            return None
+
+        future = asyncio.create_task(self.service_coordinator.execute_service(
+            "inventory_service", "get_inventory", {"user_id": user_id}, token
+        ))
+        self.stats["started"] += 1
+        self.logger.info(f"⚡ [PREFETCH] Speculative inventory fetch started (pattern={pattern})")
+        return InventoryPrefetch(user_id, future)
+
+    async def claim(self, prefetch: InventoryPrefetch) -> Optional[Any]:
+        """
+        Take the prefetched result for a matching task.
+
+        Returns:
+            The prefetched get_inventory result, or None if it is stale or failed
+            (the caller then executes the task normally)
+        """
+        age = time.monotonic() - prefetch.started_at
+        if age > self.max_age:
+            if not prefetch.stale:
+                prefetch.stale = True
+                self.stats["stale"] += 1
+            self.logger.info(f"⏰ [PREFETCH] Prefetched inventory is stale ({age:.1f}s), refetching")
+            return None
+
+        try:
+            result = await asyncio.shield(prefetch.future)
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.warning(f"⚠️ [PREFETCH] Speculative inventory fetch failed, refetching: {e}")
+            return None
+
+        if not isinstance(result, dict) or not result.get("success"):
+            self.stats["failed"] += 1
+            self.logger.warning(f"⚠️ [PREFETCH] Speculative inventory fetch returned an error, refetching")
+            return None
+
+        if not prefetch.claimed:
+            prefetch.claimed = True
+            self.stats["hits"] += 1
+        self.logger.info(f"✅ [PREFETCH] Served get_inventory from prefetch ({age:.2f}s old)")
+        return result
+
+    def release(self, prefetch: Optional[InventoryPrefetch]) -> None:
+        """
+        Finish a request's prefetch, counting it as wasted if no task used it.
+
+        An unfinished fetch is left to complete and its result is dropped:
+        cancelling it would tear down the warm MCP session it is running on.
+        """
+        if prefetch is None:
+            return
+        # 未取得の例外による警告を抑止（未完了の場合は完了時に取得）
+        prefetch.future.add_done_callback(_consume_exception)
+        if not prefetch.claimed and not prefetch.stale:
+            self.stats["wasted"] += 1
+            self.logger.info(f"🗑️ [PREFETCH] Prefetched inventory was not used")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for tuning (hit_rate = hits / started)."""
+        stats = dict(self.stats)
+        stats["hit_rate"] = round(self.stats["hits"] / self.stats["started"], 3) if self.stats["started"] else 0.0
+        return stats
@@ -6,6 +6,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional
 from enum import Enum
 from config.loggers import GenericLogger
+from .param_resolver import CompiledParameters
 
 
 class TaskStatus(Enum):
@@ -29,6 +30,17 @@ class Task:
     status: TaskStatus = TaskStatus.PENDING
     result: Any = None
     error: Optional[str] = None
+    # プランニング時にコンパイルした参照式（executorで未設定・変更時は再コンパイル）
+    compiled_parameters: Optional[CompiledParameters] = field(default=None, repr=False, compare=False)
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    """Per-request identity passed through the agent (user, auth token, SSE session)."""
+    
+    user_id: str
+    token: str
+    sse_session_id: Optional[str] = None
 
 
 @dataclass
@@ -51,6 +63,8 @@ class TaskChainManager:
         self.is_paused = False
         self.current_step = 0
         self.total_steps = 0
+        # 計画と並行して開始した在庫の先読み（core.inventory_prefetch.InventoryPrefetch）
+        self.inventory_prefetch: Optional[Any] = None
         self.logger = GenericLogger("core", "task_manager")
     
     def set_tasks(self, tasks: List[Task]) -> None:
@@ -67,6 +81,16 @@ class TaskChainManager:
             task_name = self._get_task_display_name(first_task)
             self.send_progress(first_task.id, "開始", f"{task_name}を開始します")
     
+    def add_task(self, task: Task) -> None:
+        """Append a task planned while execution is already running (streaming planning)."""
+        self.tasks.append(task)
+        self.total_steps = len(self.tasks)
+        
+        # 最初のタスク受信時に初期進捗を送信
+        if self.sse_session_id and self.total_steps == 1:
+            task_name = self._get_task_display_name(task)
+            self.send_progress(task.id, "開始", f"{task_name}を開始します")
+    
     def _get_task_display_name(self, task: Task) -> str:
         """Get a user-friendly display name for a task."""
         # サービス名を正規化（小文字を大文字に変換）
@@ -0,0 +1,258 @@
+"""
+Parameter reference resolver for the core layer.
+
+This module compiles task parameter references such as
+"task2.result.data + task3.result.data" or "task2.result.main_dish" into a
+small typed AST once, and evaluates it against previous task results.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+
+_DISH_SUFFIXES = (".main_dish", ".side_dish", ".soup")
+
+
+class _Sentinel:
+    """評価結果のマーカー（元の値を保持 / リストに追加しない）"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+KEEP = _Sentinel("KEEP")
+SKIP = _Sentinel("SKIP")
+
+
+@dataclass(frozen=True)
+class Literal:
+    """参照を含まない値（リスト要素）"""
+    value: Any
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        return self.value
+
+
+@dataclass(frozen=True)
+class PathRef:
+    """ネストパス参照: "task2.result.data.candidates"
+
+    辞書のみを辿り、見つからない（またはNoneの）場合はdefaultを返す。
+    辞書のリストで先頭要素に"title"がある場合はtitleのリストに変換する。
+    """
+    task_id: str
+    keys: Tuple[str, ...]
+    default: Any = None
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        if self.task_id not in results:
+            return self.default
+
+        current = results[self.task_id]
+        for key in self.keys:
+            if not isinstance(current, dict) or key not in current:
+                return self.default
+            current = current[key]
+
+        if current is None:
+            return self.default
+
+        if isinstance(current, list) and current and isinstance(current[0], dict) and "title" in current[0]:
+            return [item["title"] for item in current if "title" in item]
+
+        return current
+
+
+@dataclass(frozen=True)
+class FieldRef:
+    """辞書フィールド参照: "task2.result.main_dish" → result.data["main_dish"]"""
+    task_id: str
+    field_name: str
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        task_result = results.get(self.task_id)
+        if isinstance(task_result, dict) and task_result.get("success"):
+            return task_result.get("result", {}).get("data", {}).get(self.field_name, "")
+        return ""
+
+
+@dataclass(frozen=True)
+class MultiFieldRef:
+    """複数フィールド参照: "task2.result.main_dish,task3.result.main_dish"（空値は除外）"""
+    fields: Tuple[FieldRef, ...]
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        values = []
+        for field_ref in self.fields:
+            value = field_ref.evaluate(results)
+            if value:
+                values.append(value)
+        return values
+
+
+@dataclass(frozen=True)
+class ConcatRef:
+    """結合演算: "task1.result.data + task2.result.data"（リストは展開、それ以外は追加）"""
+    parts: Tuple[PathRef, ...]
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        try:
+            values = []
+            for part in self.parts:
+                value = part.evaluate(results)
+                if value is None:
+                    continue
+                if isinstance(value, list):
+                    values.extend(value)
+                else:
+                    values.append(value)
+            return values
+        except Exception:
+            return KEEP
+
+
+@dataclass(frozen=True)
+class ItemNamesRef:
+    """単一タスク結果参照: "task1.result" → 在庫データの食材名リスト"""
+    task_id: str
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        task_result = results.get(self.task_id)
+        if self.task_id not in results or not (isinstance(task_result, dict) and task_result.get("success")):
+            return KEEP
+        items = task_result.get("result", {}).get("data", [])
+        return [item.get("item_name") for item in items if item.get("item_name")]
+
+
+@dataclass(frozen=True)
+class TaskResultRef:
+    """リスト要素の単一タスク結果参照: "task1.result" → resultオブジェクト"""
+    task_id: str
+    source: str
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        if self.task_id not in results:
+            return self.source
+        task_result = results[self.task_id]
+        if isinstance(task_result, dict) and task_result.get("success"):
+            return task_result.get("result", {})
+        return SKIP
+
+
+@dataclass(frozen=True)
+class ListRef:
+    """リスト型パラメータ（要素ごとに解決して新しいリストを作る）"""
+    items: Tuple[Any, ...]
+
+    def evaluate(self, results: Dict[str, Any]) -> Any:
+        values = []
+        for item in self.items:
+            value = item.evaluate(results)
+            if value is not SKIP:
+                values.append(value)
+        return values
+
+
+@dataclass(frozen=True)
+class CompiledParameters:
+    """コンパイル済みパラメータ（コンパイル元のスナップショットと参照ノード）"""
+    source: Dict[str, Any]
+    refs: Dict[str, Any] = field(default_factory=dict)
+
+    def matches(self, parameters: Dict[str, Any]) -> bool:
+        """コンパイル後にパラメータが変更されていないか"""
+        return self.source == parameters
+
+
+def _compile_path(path: str, default: Any = None) -> Optional[PathRef]:
+    parts = path.split(".")
+    if len(parts) < 2:
+        return None
+    return PathRef(parts[0], tuple(parts[1:]), default)
+
+
+def _compile_field(ref: str) -> FieldRef:
+    parts = ref.split(".")
+    return FieldRef(parts[0], parts[2])
+
+
+def _compile_string(value: str) -> Any:
+    """文字列パラメータをコンパイル（参照でなければNone）"""
+    if value.startswith("session.context."):
+        # セッションコンテキスト参照はエージェントで解決する
+        return None
+
+    if ".result." in value:
+        if " + " in value:
+            parts = (_compile_path(part.strip()) for part in value.split(" + "))
+            return ConcatRef(tuple(part for part in parts if part is not None))
+        if value.endswith(_DISH_SUFFIXES):
+            return _compile_field(value)
+        if "," in value:
+            refs = (ref.strip() for ref in value.split(","))
+            return MultiFieldRef(tuple(_compile_field(ref) for ref in refs if ".result." in ref))
+        return _compile_path(value, KEEP)
+
+    if value.endswith(".result"):
+        return ItemNamesRef(value[:-7])
+
+    return None
+
+
+def _compile_list_item(item: Any) -> Any:
+    if not isinstance(item, str) or ".result." not in item:
+        return Literal(item)
+
+    if item.endswith(_DISH_SUFFIXES):
+        if item.count(".") >= 3:
+            return _compile_path(item, "")
+        return _compile_field(item)
+    if item.endswith(".result"):
+        return TaskResultRef(item[:-7], item)
+    return _compile_path(item, item)
+
+
+def compile_parameters(parameters: Dict[str, Any]) -> CompiledParameters:
+    """
+    タスクパラメータ内の参照式をコンパイル
+
+    Args:
+        parameters: タスクパラメータ
+
+    Returns:
+        参照を含むキーだけをノードに変換したCompiledParameters
+    """
+    refs = {}
+    for key, value in parameters.items():
+        if isinstance(value, str):
+            node = _compile_string(value)
+            if node is not None:
+                refs[key] = node
+        elif isinstance(value, list):
+            refs[key] = ListRef(tuple(_compile_list_item(item) for item in value))
+
+    source = {key: list(value) if isinstance(value, list) else value for key, value in parameters.items()}
+    return CompiledParameters(source=source, refs=refs)
+
+
+def resolve_parameters(compiled: CompiledParameters, parameters: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    コンパイル済みの参照を前タスクの結果で解決
+
+    Args:
+        compiled: compile_parametersの結果
+        parameters: タスクパラメータ
+        results: 前タスクの結果（タスクID → 結果）
+
+    Returns:
+        参照を解決したパラメータ（解決できない参照は元の値のまま）
+    """
+    injected = parameters.copy()
+    for key, node in compiled.refs.items():
+        value = node.evaluate(results)
+        if value is not KEEP:
+            injected[key] = value
+    return injected
@@ -7,8 +7,9 @@ with proper dependency resolution.
 
 import uuid
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator
 from .models import Task, TaskStatus
+from .param_resolver import compile_parameters
 from .exceptions import PlanningError
 from .service_coordinator import ServiceCoordinator
 from services.llm_service import LLMService
@@ -18,10 +19,10 @@ from config.loggers import GenericLogger
 class ActionPlanner:
     """Plans and decomposes user requests into executable tasks."""
     
-    def __init__(self):
+    def __init__(self, llm_service: Optional[LLMService] = None, service_coordinator: Optional[ServiceCoordinator] = None):
         self.logger = GenericLogger("core", "planner")
-        self.llm_service = LLMService()
-        self.service_coordinator = ServiceCoordinator()
+        self.llm_service = llm_service or LLMService()
+        self.service_coordinator = service_coordinator or ServiceCoordinator()
         self.service_registry = self._build_service_registry()
     
     def _build_service_registry(self) -> Dict[str, Dict[str, Any]]:
@@ -138,30 +139,68 @@ class ActionPlanner:
             self.logger.error(f"❌ [PLANNER] Task planning failed: {str(e)}")
             raise PlanningError(f"Failed to plan tasks: {str(e)}")
     
-    def _create_tasks_from_descriptions(self, descriptions: List[Dict], user_id: str) -> List[Task]:
-        """Convert task descriptions to Task objects."""
-        tasks = []
+    async def plan_stream(self, user_request: str, user_id: str, sse_session_id: str = None) -> AsyncIterator[Task]:
+        """
+        Plan tasks while the LLM is still generating the plan.
+        
+        Each task is yielded as soon as the LLM has finished writing it, so the
+        executor can start it before the rest of the plan is known.
         
-        for desc in descriptions:
-            # LLMが生成したtask1, task2形式のIDをそのまま使用
-            task_id = desc.get("id", f"task{len(tasks)+1}")
-            service = desc.get("service")
-            method = desc.get("method")
-            parameters = desc.get("parameters", {})
+        Args:
+            user_request: User's natural language request
+            user_id: User identifier
+            sse_session_id: SSE session ID (for additional proposal context)
             
-            # 常に実際のuser_idで上書き（LLMが生成した"user123"等を置き換え）
-            parameters["user_id"] = user_id
+        Yields:
+            Tasks in plan order
+        """
+        try:
+            self.logger.info(f"🎯 [PLANNER] Starting streaming task planning for user {user_id}")
+            self.logger.info(f"📝 [PLANNER] User request: '{user_request}'")
             
-            task = Task(
-                id=task_id,
-                service=service,
-                method=method,
-                parameters=parameters,
-                dependencies=desc.get("dependencies", [])
-            )
-            tasks.append(task)
+            tools_description = self.service_coordinator.get_available_tools_description()
+            
+            count = 0
+            async for desc in self.llm_service.stream_decompose_tasks(
+                user_request, tools_description, user_id, sse_session_id
+            ):
+                count += 1
+                task = self._create_task_from_description(desc, user_id, count)
+                self.logger.info(f"  {count}. {task.service}.{task.method} (id: {task.id}, deps: {task.dependencies})")
+                yield task
+            
+            self.logger.info(f"✅ [PLANNER] Streaming task planning completed: {count} tasks")
+            
+        except Exception as e:
+            self.logger.error(f"❌ [PLANNER] Streaming task planning failed: {str(e)}")
+            raise PlanningError(f"Failed to plan tasks: {str(e)}")
+    
+    def _create_tasks_from_descriptions(self, descriptions: List[Dict], user_id: str) -> List[Task]:
+        """Convert task descriptions to Task objects."""
+        return [
+            self._create_task_from_description(desc, user_id, index)
+            for index, desc in enumerate(descriptions, 1)
+        ]
+    
+    def _create_task_from_description(self, desc: Dict, user_id: str, index: int) -> Task:
+        """Convert a single task description (index-th in the plan) to a Task object."""
+        # LLMが生成したtask1, task2形式のIDをそのまま使用
+        task_id = desc.get("id", f"task{index}")
+        service = desc.get("service")
+        method = desc.get("method")
+        parameters = desc.get("parameters", {})
         
-        return tasks
+        # 常に実際のuser_idで上書き（LLMが生成した"user123"等を置き換え）
+        parameters["user_id"] = user_id
+        
+        return Task(
+            id=task_id,
+            service=service,
+            method=method,
+            parameters=parameters,
+            dependencies=desc.get("dependencies", []),
+            compiled_parameters=compile_parameters(parameters)
+        )
     
     def _resolve_dependencies(self, tasks: List[Task]) -> List[Task]:
         """Resolve task dependencies and update dependency IDs."""
@@ -12,9 +12,9 @@ from config.loggers import GenericLogger
 class ResponseFormatter:
     """Formats final responses using LLM."""
     
-    def __init__(self):
+    def __init__(self, llm_service: Optional[LLMService] = None):
         self.logger = GenericLogger("core", "response_formatter")
-        self.llm_service = LLMService()
+        self.llm_service = llm_service or LLMService()
     
     async def format(self, execution_results: dict, sse_session_id: str = None) -> tuple[str, Optional[Dict[str, Any]]]:
         """Format execution results into natural language response."""
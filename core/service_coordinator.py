@@ -6,7 +6,7 @@ Core LayerとService Layerの橋渡しを担当
 ToolRouterの一元管理とサービス呼び出しの調整を提供
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from services.tool_router import ToolRouter
 from config.loggers import GenericLogger
 
@@ -14,9 +14,14 @@ from config.loggers import GenericLogger
 class ServiceCoordinator:
     """サービス調整クラス - ToolRouterの一元管理とサービス呼び出しの調整"""
     
-    def __init__(self):
-        """初期化"""
-        self.tool_router = ToolRouter()
+    def __init__(self, tool_router: Optional[ToolRouter] = None):
+        """
+        初期化
+        
+        Args:
+            tool_router: 共有するToolRouter（省略時は新規作成）
+        """
+        self.tool_router = tool_router or ToolRouter()
         self.logger = GenericLogger("core", "service_coordinator")
     
     async def execute_service(self, service: str, method: str, parameters: Dict[str, Any], token: str) -> Any:
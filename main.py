@@ -17,6 +17,7 @@ from config.logging import setup_logging
 from api.middleware import AuthenticationMiddleware, LoggingMiddleware
 from api.routes import chat_router, health_router, recipe_router, menu_router, inventory_router
 from api.models import ErrorResponse
+from api.utils.agent_provider import create_agent, close_agent
 
 # 環境変数の読み込み
 load_dotenv()
@@ -35,22 +36,13 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 [API] Morizo AI v2 starting...")
     
     try:
-        # サービスの初期化
+        # サービスの初期化（ワーカー単位で1回だけ構築し、全リクエストで共有）
         logger.info("🔧 [API] Initializing services...")
         
-        # Core層の初期化確認
-        from core.agent import TrueReactAgent
-        agent = TrueReactAgent()
+        # Core層・Service層・MCP層を1つのサービスグラフとして構築
+        app.state.agent = create_agent()
         logger.info("✅ [API] Core layer initialized")
-        
-        # Service層の初期化確認
-        from services.tool_router import ToolRouter
-        tool_router = ToolRouter()
         logger.info("✅ [API] Service layer initialized")
-        
-        # MCP層の初期化確認
-        from mcp_servers.client import MCPClient
-        mcp_client = MCPClient()
         logger.info("✅ [API] MCP layer initialized")
         
         logger.info("🎉 [API] All services initialized successfully")
@@ -63,14 +55,15 @@ async def lifespan(app: FastAPI):
     
     # 終了時の処理
     logger.info("🛑 [API] Morizo AI v2 shutting down...")
+    await close_agent(app.state.agent)
 
 
 # FastAPIアプリケーションの作成
 app = FastAPI(
     title="Morizo AI v2",
     description="Smart Pantry MVPのAIエージェント",
-    version="2.0.0"
-    # lifespan=lifespan  # 一時的に無効化
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -7,9 +7,13 @@ This module provides the MCP client for tool communication with authentication.
 import os
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
 
+from config.clients import get_supabase_client
 from config.loggers import GenericLogger
+from mcp_servers.session_pool import get_session_pool, close_session_pools
+from mcp_servers.token_verifier import get_token_verifier
+from mcp_servers.supabase_pool import SupabaseRequestClient, get_supabase_pool
 
 # .envファイルを読み込み
 load_dotenv()
@@ -33,9 +37,6 @@ class MCPClient:
         
         self._client: Optional[Client] = None
         
-        # FastMCPクライアントの初期化（サーバーファイルパスを指定）
-        self.mcp_clients = {}
-        
         # 各FastMCPサーバーへの接続設定
         self.servers = {
             "inventory": "mcp_servers/inventory_mcp.py",
@@ -43,6 +44,18 @@ class MCPClient:
             "recipe_history": "mcp_servers/recipe_history_mcp.py"
         }
         
+        # 各サーバーのトランスポート（MCP_INPROCESS_SERVERSに列挙したサーバーはAPIプロセス内で実行）
+        inprocess_servers = {
+            name.strip() for name in os.getenv("MCP_INPROCESS_SERVERS", "").split(",") if name.strip()
+        }
+        unknown_servers = inprocess_servers - set(self.servers)
+        if unknown_servers:
+            raise ValueError(f"Unknown MCP servers in MCP_INPROCESS_SERVERS: {sorted(unknown_servers)}")
+        self.server_transports = {
+            name: "inprocess" if name in inprocess_servers else "stdio"
+            for name in self.servers
+        }
+        
         # ツール名とMCPサーバーの対応表
         self.tool_server_mapping = {
             "inventory_add": "inventory",
@@ -73,55 +86,53 @@ class MCPClient:
     def get_supabase_client(self) -> Client:
         """Supabaseクライアントを取得"""
         if self._client is None:
-            self._client = create_client(self.supabase_url, self.supabase_key)
+            self._client = get_supabase_client()
         return self._client
     
     def verify_auth_token(self, token: str) -> bool:
-        """認証トークンを検証"""
+        """認証トークンを検証（共有キャッシュ・ローカルJWT検証を使用）"""
         try:
             # 空トークンや無効なトークンのチェック
             if not token or token.strip() == "":
                 self.logger.warning("⚠️ [MCP] Empty or invalid token provided")
                 return False
             
-            client = self.get_supabase_client()
-            user = client.auth.get_user(token)
-            is_valid = user is not None
+            is_valid = get_token_verifier().verify_sync(token) is not None
             self.logger.info(f"🔐 [MCP] Token verification: {'Valid' if is_valid else 'Invalid'}")
             return is_valid
         except Exception as e:
             self.logger.error(f"❌ [MCP] Token verification failed: {e}")
             return False
     
-    def get_authenticated_client(self, token: str) -> Client:
-        """認証済みのSupabaseクライアントを取得"""
+    async def verify_auth_token_async(self, token: str) -> bool:
+        """認証トークンを検証（非同期版：リモート検証時もイベントループをブロックしない）"""
+        try:
+            if not token or token.strip() == "":
+                self.logger.warning("⚠️ [MCP] Empty or invalid token provided")
+                return False
+            
+            is_valid = await get_token_verifier().verify(token) is not None
+            self.logger.debug(f"🔐 [MCP] Token verification: {'Valid' if is_valid else 'Invalid'}")
+            return is_valid
+        except Exception as e:
+            self.logger.error(f"❌ [MCP] Token verification failed: {e}")
+            return False
+    
+    def get_authenticated_client(self, token: str) -> SupabaseRequestClient:
+        """認証済みのSupabaseクライアントを取得（共有クライアントの認証状態は変更しない）"""
         if not self.verify_auth_token(token):
             raise ValueError("Invalid authentication token")
         
-        client = self.get_supabase_client()
-        client.auth.set_session(token)
+        client = get_supabase_pool().get_client(token)
         self.logger.info("🔐 [MCP] Authenticated client created")
         return client
     
-    async def _get_mcp_client(self, server_name: str):
-        """指定されたサーバー名のMCPクライアントを取得（stdio接続）"""
-        if server_name not in self.mcp_clients:
-            server_path = self.servers[server_name]
-            
-            try:
-                # FastMCPクライアントでサーバーファイルにstdio接続
-                from fastmcp.client import Client
-                self.mcp_clients[server_name] = Client(server_path)
-                self.logger.info(f"🔧 [MCP] MCP client created for {server_name} via stdio")
-                
-            except Exception as e:
-                self.logger.error(f"❌ [MCP] Failed to create MCP client for {server_name}: {e}")
-                raise
-        
-        return self.mcp_clients[server_name]
+    def _get_session_pool(self, server_name: str):
+        """指定されたサーバー名のセッションプールを取得（接続を再利用）"""
+        return get_session_pool(server_name, self.servers[server_name], self.server_transports[server_name])
     
     async def call_tool(self, tool_name: str, parameters: Dict[str, Any], token: str) -> Dict[str, Any]:
-        """FastMCPクライアントでツールを呼び出し（stdio接続）"""
+        """FastMCPクライアントでツールを呼び出し（stdio接続またはインプロセス接続）"""
         self.logger.info(f"🔧 [MCP] Calling tool: {tool_name}")
         self.logger.debug(f"📝 [MCP] Parameters: {parameters}")
         
@@ -129,7 +140,7 @@ class MCPClient:
             # 認証確認（空トークンの場合は警告して続行）
             if not token or token.strip() == "":
                 self.logger.warning("⚠️ [MCP] No token provided, proceeding without authentication")
-            elif not self.verify_auth_token(token):
+            elif not await self.verify_auth_token_async(token):
                 raise ValueError("Authentication failed")
             
             # ツール名から適切なサーバーを特定
@@ -137,15 +148,15 @@ class MCPClient:
             if not server_name:
                 raise ValueError(f"Unknown tool: {tool_name}")
             
-            # FastMCPクライアントを取得
-            mcp_client = await self._get_mcp_client(server_name)
+            # セッションプールを取得
+            session_pool = self._get_session_pool(server_name)
             
             # token を parameters に追加
             parameters_with_token = parameters.copy()
             parameters_with_token['token'] = token
 
-            # stdio接続でツールを呼び出し
-            async with mcp_client:
+            # プールのウォームセッションでツールを呼び出し
+            async with session_pool.session() as mcp_client:
                 call_result = await mcp_client.call_tool(tool_name, parameters_with_token)
             
             # CallToolResultから実際のデータを抽出
@@ -185,11 +196,10 @@ class MCPClient:
                 "tool": tool_name
             }
     
-    def cleanup(self):
+    async def cleanup(self):
         """リソースのクリーンアップ"""
         self.logger.info("🔧 [MCP] MCPクライアントのクリーンアップ")
-        # 必要に応じてリソースのクリーンアップ処理を追加
-        self.mcp_clients.clear()
+        await close_session_pools()
 
 
 # テスト実行
@@ -0,0 +1,152 @@
+"""
+Morizo AI v2 - Embedding Cache
+
+This module provides a process-wide cache of query embeddings keyed on
+(embedding model, normalized text): an in-memory LRU backed by a persistent
+SQLite key-value file, so repeated RAG queries skip the embedding API call
+even across restarts.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from config.loggers import GenericLogger
+
+# .envファイルを読み込み
+load_dotenv()
+
+
+def normalize_embedding_text(text: str) -> str:
+    """キャッシュキー用にテキストを正規化（前後の空白を除去し、連続する空白を1つにまとめる）"""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    埋め込みベクトルのキャッシュ（メモリ上のLRU + SQLiteの永続ファイル）
+
+    キーは (モデル名, 正規化済みテキスト) のハッシュ。メモリにない場合は永続ファイルを参照し、
+    見つかればメモリにも載せる。埋め込みモデルが変わった場合は別のキーになるため、古いベクトルは使われない。
+    """
+
+    def __init__(self):
+        self.logger = GenericLogger("mcp", "embedding_cache", initialize_logging=False)
+        # メモリ上に保持する最大件数（0でキャッシュしない）
+        self.max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+        # 永続ファイルのパス（空の場合はメモリのみ）
+        self.path = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if self.max_entries > 0 and self.path:
+            self._db = self._open_db(self.path)
+
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _open_db(self, path: str) -> Optional[sqlite3.Connection]:
+        """永続ファイルを開く（開けない場合はメモリのみで動作）"""
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            return db
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️ [EmbeddingCache] Failed to open {path}, using memory only: {e}")
+            return None
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """(モデル名, 正規化済みテキスト) からキャッシュキーを生成"""
+        return hashlib.sha256(f"{model}\0{normalize_embedding_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """キャッシュ済みのベクトルを取得（ない場合はNone）"""
+        if self.max_entries <= 0:
+            return None
+        key = self.make_key(model, text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return list(vector)
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"⚠️ [EmbeddingCache] Failed to read cache file: {e}")
+                    row = None
+                if row is not None:
+                    vector = array("d", row[0]).tolist()
+                    self._remember(key, vector)
+                    self.stats["disk_hits"] += 1
+                    return list(vector)
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        """ベクトルをメモリと永続ファイルに保存"""
+        if self.max_entries <= 0:
+            return
+        key = self.make_key(model, text)
+        vector = [float(value) for value in vector]
+        with self._lock:
+            self._remember(key, vector)
+            self.stats["writes"] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        (key, array("d", vector).tobytes())
+                    )
+                except sqlite3.Error as e:
+                    self.logger.warning(f"⚠️ [EmbeddingCache] Failed to write cache file: {e}")
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """メモリ上のLRUに追加（ロック取得済みで呼び出す）"""
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """メモリ上のキャッシュを破棄（永続ファイルは残す）"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """キャッシュの統計（hit_rate = (hits + disk_hits) / (hits + disk_hits + misses)）"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._cache)
+        stats["persistent"] = self._db is not None
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """プロセス共有の埋め込みキャッシュを取得"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
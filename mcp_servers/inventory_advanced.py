@@ -6,8 +6,10 @@ This module provides advanced operations for inventory management including batc
 
 from typing import Dict, Any, List, Optional
 from supabase import Client
+from postgrest.exceptions import APIError
 
 from config.loggers import GenericLogger
+from mcp_servers.utils import execute_query
 
 
 class InventoryAdvanced:
@@ -45,7 +47,7 @@ class InventoryAdvanced:
                 return {"success": False, "error": "No update data provided"}
             
             # データベース一括更新
-            result = client.table("inventory").update(update_data).eq("user_id", user_id).eq("item_name", item_name).execute()
+            result = await execute_query(client.table("inventory").update(update_data).eq("user_id", user_id).eq("item_name", item_name))
             
             self.logger.info(f"✅ [ADVANCED] Updated {len(result.data)} items")
             return {"success": True, "data": result.data}
@@ -68,34 +70,17 @@ class InventoryAdvanced:
         try:
             self.logger.info(f"✏️ [ADVANCED] Updating oldest item by name: {item_name}")
             
-            # 最古のアイテムを取得
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).order("created_at", desc=False).limit(1).execute()
-            
-            if not result.data:
-                return {"success": False, "error": "No items found"}
-            
-            oldest_item = result.data[0]
-            item_id = oldest_item["id"]
-            
-            # 更新データの準備
-            update_data = {}
-            if quantity is not None:
-                update_data["quantity"] = quantity
-            if unit is not None:
-                update_data["unit"] = unit
-            if storage_location is not None:
-                update_data["storage_location"] = storage_location
-            if expiry_date is not None:
-                update_data["expiry_date"] = expiry_date
-            
+            update_data = self._build_update_data(quantity, unit, storage_location, expiry_date)
             if not update_data:
                 return {"success": False, "error": "No update data provided"}
             
-            # 最古アイテムを更新
-            update_result = client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", item_id).execute()
+            # 最古アイテムの選択と更新を1回のRPCで実行
+            rows = await self._update_ordered(client, user_id, item_name, update_data, latest=False)
+            if not rows:
+                return {"success": False, "error": "No items found"}
             
-            self.logger.info(f"✅ [ADVANCED] Updated oldest item: {item_id}")
-            return {"success": True, "data": update_result.data[0]}
+            self.logger.info(f"✅ [ADVANCED] Updated oldest item: {rows[0]['id']}")
+            return {"success": True, "data": rows[0]}
             
         except Exception as e:
             self.logger.error(f"❌ [ADVANCED] Failed to update oldest item: {e}")
@@ -115,34 +100,17 @@ class InventoryAdvanced:
         try:
             self.logger.info(f"✏️ [ADVANCED] Updating latest item by name: {item_name}")
             
-            # 最新のアイテムを取得
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).order("created_at", desc=True).limit(1).execute()
-            
-            if not result.data:
-                return {"success": False, "error": "No items found"}
-            
-            latest_item = result.data[0]
-            item_id = latest_item["id"]
-            
-            # 更新データの準備
-            update_data = {}
-            if quantity is not None:
-                update_data["quantity"] = quantity
-            if unit is not None:
-                update_data["unit"] = unit
-            if storage_location is not None:
-                update_data["storage_location"] = storage_location
-            if expiry_date is not None:
-                update_data["expiry_date"] = expiry_date
-            
+            update_data = self._build_update_data(quantity, unit, storage_location, expiry_date)
             if not update_data:
                 return {"success": False, "error": "No update data provided"}
             
-            # 最新アイテムを更新
-            update_result = client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", item_id).execute()
+            # 最新アイテムの選択と更新を1回のRPCで実行
+            rows = await self._update_ordered(client, user_id, item_name, update_data, latest=True)
+            if not rows:
+                return {"success": False, "error": "No items found"}
             
-            self.logger.info(f"✅ [ADVANCED] Updated latest item: {item_id}")
-            return {"success": True, "data": update_result.data[0]}
+            self.logger.info(f"✅ [ADVANCED] Updated latest item: {rows[0]['id']}")
+            return {"success": True, "data": rows[0]}
             
         except Exception as e:
             self.logger.error(f"❌ [ADVANCED] Failed to update latest item: {e}")
@@ -153,14 +121,14 @@ class InventoryAdvanced:
         try:
             self.logger.info(f"🗑️ [ADVANCED] Batch deleting items by name: {item_name}")
             
-            # 削除対象のアイテムを取得（削除前に確認）
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).execute()
+            # 削除対象のアイテムを取得（削除前に確認、存在確認のみのためIDだけ取得）
+            result = await execute_query(client.table("inventory").select("id").eq("user_id", user_id).eq("item_name", item_name))
             
             if not result.data:
                 return {"success": False, "error": "No items found"}
             
             # 一括削除実行
-            delete_result = client.table("inventory").delete().eq("user_id", user_id).eq("item_name", item_name).execute()
+            delete_result = await execute_query(client.table("inventory").delete().eq("user_id", user_id).eq("item_name", item_name))
             
             self.logger.info(f"✅ [ADVANCED] Deleted {len(delete_result.data)} items")
             return {"success": True, "data": delete_result.data}
@@ -174,20 +142,13 @@ class InventoryAdvanced:
         try:
             self.logger.info(f"🗑️ [ADVANCED] Deleting oldest item by name: {item_name}")
             
-            # 最古のアイテムを取得
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).order("created_at", desc=False).limit(1).execute()
-            
-            if not result.data:
+            # 最古アイテムの選択と削除を1回のRPCで実行
+            rows = await self._delete_ordered(client, user_id, item_name, latest=False)
+            if not rows:
                 return {"success": False, "error": "No items found"}
             
-            oldest_item = result.data[0]
-            item_id = oldest_item["id"]
-            
-            # 最古アイテムを削除
-            delete_result = client.table("inventory").delete().eq("user_id", user_id).eq("id", item_id).execute()
-            
-            self.logger.info(f"✅ [ADVANCED] Deleted oldest item: {item_id}")
-            return {"success": True, "data": delete_result.data[0]}
+            self.logger.info(f"✅ [ADVANCED] Deleted oldest item: {rows[0]['id']}")
+            return {"success": True, "data": rows[0]}
             
         except Exception as e:
             self.logger.error(f"❌ [ADVANCED] Failed to delete oldest item: {e}")
@@ -198,24 +159,110 @@ class InventoryAdvanced:
         try:
             self.logger.info(f"🗑️ [ADVANCED] Deleting latest item by name: {item_name}")
             
-            # 最新のアイテムを取得
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).order("created_at", desc=True).limit(1).execute()
-            
-            if not result.data:
+            # 最新アイテムの選択と削除を1回のRPCで実行
+            rows = await self._delete_ordered(client, user_id, item_name, latest=True)
+            if not rows:
                 return {"success": False, "error": "No items found"}
             
-            latest_item = result.data[0]
-            item_id = latest_item["id"]
-            
-            # 最新アイテムを削除
-            delete_result = client.table("inventory").delete().eq("user_id", user_id).eq("id", item_id).execute()
-            
-            self.logger.info(f"✅ [ADVANCED] Deleted latest item: {item_id}")
-            return {"success": True, "data": delete_result.data[0]}
+            self.logger.info(f"✅ [ADVANCED] Deleted latest item: {rows[0]['id']}")
+            return {"success": True, "data": rows[0]}
             
         except Exception as e:
             self.logger.error(f"❌ [ADVANCED] Failed to delete latest item: {e}")
             return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    def _build_update_data(
+        quantity: Optional[float],
+        unit: Optional[str],
+        storage_location: Optional[str],
+        expiry_date: Optional[str]
+    ) -> Dict[str, Any]:
+        """更新データの準備（指定された項目のみ）"""
+        update_data = {}
+        if quantity is not None:
+            update_data["quantity"] = quantity
+        if unit is not None:
+            update_data["unit"] = unit
+        if storage_location is not None:
+            update_data["storage_location"] = storage_location
+        if expiry_date is not None:
+            update_data["expiry_date"] = expiry_date
+        return update_data
+    
+    @staticmethod
+    def _is_missing_function(error: APIError) -> bool:
+        """RPC関数が未作成（マイグレーション未適用）のエラーか"""
+        return error.code == "PGRST202"
+    
+    async def _update_ordered(
+        self,
+        client: Client,
+        user_id: str,
+        item_name: str,
+        update_data: Dict[str, Any],
+        latest: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        最古/最新アイテム1件を原子的に更新（inventory_update_by_name_ordered）
+        
+        選択と更新は1トランザクションで行われ、同時実行中の別リクエストが
+        ロックしている行は飛ばされる（FOR UPDATE SKIP LOCKED）。
+        
+        Returns:
+            更新された行のリスト（対象がなければ空）
+        """
+        try:
+            result = await execute_query(client.rpc("inventory_update_by_name_ordered", {
+                "p_user_id": user_id,
+                "p_item_name": item_name,
+                "p_updates": update_data,
+                "p_latest": latest
+            }))
+            return result.data or []
+        except APIError as e:
+            if not self._is_missing_function(e):
+                raise
+            self.logger.warning(f"⚠️ [ADVANCED] inventory_update_by_name_ordered is not deployed, falling back to select + update")
+        
+        # フォールバック: 対象の取得と更新を別々に実行（非原子的）
+        result = await execute_query(client.table("inventory").select("id").eq("user_id", user_id).eq("item_name", item_name).order("created_at", desc=latest).limit(1))
+        if not result.data:
+            return []
+        update_result = await execute_query(client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", result.data[0]["id"]))
+        return update_result.data
+    
+    async def _delete_ordered(
+        self,
+        client: Client,
+        user_id: str,
+        item_name: str,
+        latest: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        最古/最新アイテム1件を原子的に削除（inventory_delete_by_name_ordered）
+        
+        Returns:
+            削除された行のリスト（対象がなければ空）
+        """
+        try:
+            result = await execute_query(client.rpc("inventory_delete_by_name_ordered", {
+                "p_user_id": user_id,
+                "p_item_name": item_name,
+                "p_latest": latest
+            }))
+            return result.data or []
+        except APIError as e:
+            if not self._is_missing_function(e):
+                raise
+            self.logger.warning(f"⚠️ [ADVANCED] inventory_delete_by_name_ordered is not deployed, falling back to select + delete")
+        
+        # フォールバック: 対象の取得と削除を別々に実行（非原子的）
+        result = await execute_query(client.table("inventory").select("id").eq("user_id", user_id).eq("item_name", item_name).order("created_at", desc=latest).limit(1))
+        if not result.data:
+            return []
+        delete_result = await execute_query(client.table("inventory").delete().eq("user_id", user_id).eq("id", result.data[0]["id"]))
+        return delete_result.data
 
 
 if __name__ == "__main__":
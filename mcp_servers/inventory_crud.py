@@ -4,11 +4,33 @@ Morizo AI v2 - Inventory CRUD Operations
 This module provides basic CRUD operations for inventory management.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from supabase import Client
+from postgrest.exceptions import APIError
 
 from config.loggers import GenericLogger
+from mcp_servers.utils import execute_query, insert_bisecting
+
+# fieldsで指定できる在庫テーブルの列
+INVENTORY_COLUMNS = ("id", "user_id", "item_name", "quantity", "unit", "storage_location", "expiry_date", "created_at", "updated_at")
+
+# 曖昧性チェック（複数件時の候補一覧）で使用する列
+AMBIGUITY_CHECK_COLUMNS = "id,item_name,quantity,unit,storage_location,expiry_date,created_at"
+
+
+def build_inventory_select(fields: Optional[List[str]] = None) -> str:
+    """fields（列名のリストまたはカンマ区切り文字列）から在庫テーブルのselect句を組み立てる（未指定・有効な列がない場合は全列）"""
+    if not fields:
+        return "*"
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    columns = []
+    for field in fields:
+        field = field.strip()
+        if field in INVENTORY_COLUMNS and field not in columns:
+            columns.append(field)
+    return ",".join(columns) if columns else "*"
 
 
 class InventoryCRUD:
@@ -44,7 +66,7 @@ class InventoryCRUD:
                 data["expiry_date"] = expiry_date
             
             # データベースに挿入
-            result = client.table("inventory").insert(data).execute()
+            result = await execute_query(client.table("inventory").insert(data))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Item added successfully: {result.data[0]['id']}")
@@ -60,10 +82,14 @@ class InventoryCRUD:
         self,
         client: Client,
         user_id: str,
-        items: List[Dict[str, Any]]
+        items: List[Dict[str, Any]],
+        rows: Optional[List[int]] = None
     ) -> Dict[str, Any]:
         """在庫にアイテムを一括追加
         
+        一括挿入が失敗した場合は、チャンクを二分割して再挿入することで
+        不正な行だけを特定する（1行ずつの挿入より問い合わせ回数が少ない）。
+        
         Args:
             client: Supabaseクライアント
             user_id: ユーザーID
@@ -77,6 +103,7 @@ class InventoryCRUD:
                         "expiry_date": Optional[str]
                     }
                 ]
+            rows: エラー報告に使う各アイテムの行番号（省略時は1始まりの連番）
         
         Returns:
             {
@@ -116,27 +143,29 @@ class InventoryCRUD:
                 
                 data_list.append(data)
             
-            # 一括挿入
-            try:
-                result = client.table("inventory").insert(data_list).execute()
-                
-                if result.data:
-                    success_count = len(result.data)
-                    self.logger.info(f"✅ [CRUD] {success_count} items added successfully")
-                    return {
-                        "success": True,
-                        "total": len(items),
-                        "success_count": success_count,
-                        "error_count": 0,
-                        "errors": []
-                    }
-                else:
-                    raise Exception("No data returned from insert")
-                    
-            except Exception as db_error:
-                # DBエラーの場合、個別に処理を試みる
-                self.logger.warning(f"⚠️ [CRUD] Bulk insert failed, trying individual inserts: {db_error}")
-                return await self._add_items_individually(client, user_id, items)
+            if rows is None:
+                rows = list(range(1, len(items) + 1))
+            
+            # 一括挿入（失敗時は二分割して不正な行を特定）
+            inserted, failures = await insert_bisecting(client, "inventory", data_list)
+            success_count = len(data_list) - len(failures)
+            errors = [
+                {"row": rows[index], "item_name": data_list[index].get("item_name"), "error": error}
+                for index, error in sorted(failures.items())
+            ]
+            
+            if errors:
+                self.logger.warning(f"⚠️ [CRUD] {success_count} items added, {len(errors)} items failed")
+            else:
+                self.logger.info(f"✅ [CRUD] {success_count} items added successfully")
+            
+            return {
+                "success": success_count > 0,
+                "total": len(items),
+                "success_count": success_count,
+                "error_count": len(errors),
+                "errors": errors
+            }
                 
         except Exception as e:
             self.logger.error(f"❌ [CRUD] Failed to add items in bulk: {e}")
@@ -148,57 +177,13 @@ class InventoryCRUD:
                 "errors": [{"row": None, "item_name": None, "error": str(e)}]
             }
     
-    async def _add_items_individually(
-        self,
-        client: Client,
-        user_id: str,
-        items: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        """個別にアイテムを追加（フォールバック）"""
-        success_count = 0
-        errors = []
-        
-        for idx, item in enumerate(items, 1):
-            try:
-                result = await self.add_item(
-                    client=client,
-                    user_id=user_id,
-                    item_name=item.get("item_name"),
-                    quantity=item.get("quantity"),
-                    unit=item.get("unit", "個"),
-                    storage_location=item.get("storage_location", "冷蔵庫"),
-                    expiry_date=item.get("expiry_date")
-                )
-                
-                if result.get("success"):
-                    success_count += 1
-                else:
-                    errors.append({
-                        "row": idx,
-                        "item_name": item.get("item_name"),
-                        "error": result.get("error", "Unknown error")
-                    })
-            except Exception as e:
-                errors.append({
-                    "row": idx,
-                    "item_name": item.get("item_name"),
-                    "error": str(e)
-                })
-        
-        return {
-            "success": success_count > 0,
-            "total": len(items),
-            "success_count": success_count,
-            "error_count": len(errors),
-            "errors": errors
-        }
-    
     async def get_all_items(
         self, 
         client: Client, 
         user_id: str,
         sort_by: Optional[str] = "created_at",
-        sort_order: Optional[str] = "desc"
+        sort_order: Optional[str] = "desc",
+        fields: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """ユーザーの全在庫アイテムを取得
         
@@ -207,6 +192,7 @@ class InventoryCRUD:
             user_id: ユーザーID
             sort_by: ソート対象カラム (item_name, quantity, created_at, storage_location, expiry_date)
             sort_order: ソート順序 (asc, desc)
+            fields: 取得する列（省略時は全列）
         """
         try:
             self.logger.info(f"📋 [CRUD] Getting all items for user: {user_id}, sort_by={sort_by}, sort_order={sort_order}")
@@ -223,7 +209,7 @@ class InventoryCRUD:
                 self.logger.warning(f"⚠️ [CRUD] Invalid sort_order, using default: desc")
             
             # Supabaseクエリビルダー
-            query = client.table("inventory").select("*").eq("user_id", user_id)
+            query = client.table("inventory").select(build_inventory_select(fields)).eq("user_id", user_id)
             
             # ソート順を適用
             if sort_order == "desc":
@@ -231,7 +217,7 @@ class InventoryCRUD:
             else:
                 query = query.order(sort_by, desc=False)
             
-            result = query.execute()
+            result = await execute_query(query)
             
             self.logger.info(f"✅ [CRUD] Retrieved {len(result.data)} items")
             return {"success": True, "data": result.data}
@@ -240,12 +226,12 @@ class InventoryCRUD:
             self.logger.error(f"❌ [CRUD] Failed to get items: {e}")
             return {"success": False, "error": str(e)}
     
-    async def get_items_by_name(self, client: Client, user_id: str, item_name: str) -> Dict[str, Any]:
-        """指定されたアイテム名の在庫一覧を取得"""
+    async def get_items_by_name(self, client: Client, user_id: str, item_name: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """指定されたアイテム名の在庫一覧を取得（fields: 取得する列、省略時は全列）"""
         try:
             self.logger.info(f"🔍 [CRUD] Getting items by name: {item_name}")
             
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).execute()
+            result = await execute_query(client.table("inventory").select(build_inventory_select(fields)).eq("user_id", user_id).eq("item_name", item_name))
             
             self.logger.info(f"✅ [CRUD] Retrieved {len(result.data)} items")
             return {"success": True, "data": result.data}
@@ -254,12 +240,12 @@ class InventoryCRUD:
             self.logger.error(f"❌ [CRUD] Failed to get items by name: {e}")
             return {"success": False, "error": str(e)}
     
-    async def get_item_by_id(self, client: Client, user_id: str, item_id: str) -> Dict[str, Any]:
-        """特定の在庫アイテムを1件取得"""
+    async def get_item_by_id(self, client: Client, user_id: str, item_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """特定の在庫アイテムを1件取得（fields: 取得する列、省略時は全列）"""
         try:
             self.logger.info(f"🔍 [CRUD] Getting item by ID: {item_id}")
             
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("id", item_id).execute()
+            result = await execute_query(client.table("inventory").select(build_inventory_select(fields)).eq("user_id", user_id).eq("id", item_id))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Item retrieved successfully")
@@ -303,7 +289,7 @@ class InventoryCRUD:
                 return {"success": False, "error": "No update data provided"}
             
             # データベース更新
-            result = client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", item_id).execute()
+            result = await execute_query(client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", item_id))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Item updated successfully")
@@ -320,7 +306,7 @@ class InventoryCRUD:
         try:
             self.logger.info(f"🗑️ [CRUD] Deleting item by ID: {item_id}")
             
-            result = client.table("inventory").delete().eq("user_id", user_id).eq("id", item_id).execute()
+            result = await execute_query(client.table("inventory").delete().eq("user_id", user_id).eq("id", item_id))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Item deleted successfully")
@@ -332,6 +318,87 @@ class InventoryCRUD:
             self.logger.error(f"❌ [CRUD] Failed to delete item by ID: {e}")
             return {"success": False, "error": str(e)}
     
+    async def apply_quantity_changes(
+        self,
+        client: Client,
+        user_id: str,
+        quantities: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """ID指定で在庫数量を一括反映（数量0は削除）
+        
+        削除と数量更新を inventory_apply_quantities RPC の1回の呼び出し
+        （1トランザクション）で反映する。
+        
+        Args:
+            client: Supabaseクライアント
+            user_id: ユーザーID
+            quantities: 在庫ID → 反映後の数量
+        
+        Returns:
+            {
+                "success": bool,
+                "deleted_ids": List[str],
+                "updated_ids": List[str],
+                "error": Optional[str]
+            }
+        """
+        try:
+            delete_ids = [item_id for item_id, quantity in quantities.items() if quantity == 0]
+            updates = [
+                {"id": item_id, "quantity": quantity}
+                for item_id, quantity in quantities.items() if quantity != 0
+            ]
+            self.logger.info(f"📦 [CRUD] Applying quantity changes: delete={len(delete_ids)}, update={len(updates)}")
+            
+            if not quantities:
+                return {"success": True, "deleted_ids": [], "updated_ids": []}
+            
+            try:
+                result = await execute_query(client.rpc("inventory_apply_quantities", {
+                    "p_user_id": user_id,
+                    "p_delete_ids": delete_ids,
+                    "p_updates": updates
+                }))
+                rows = result.data or []
+                deleted_ids = [row["id"] for row in rows if row["action"] == "deleted"]
+                updated_ids = [row["id"] for row in rows if row["action"] == "updated"]
+            except APIError as e:
+                # RPC関数が未作成（マイグレーション未適用）の場合は一括削除 + 数量ごとの一括更新
+                if e.code != "PGRST202":
+                    raise
+                self.logger.warning(f"⚠️ [CRUD] inventory_apply_quantities is not deployed, falling back to bulk delete + update")
+                deleted_ids, updated_ids = await self._apply_quantity_changes_fallback(client, user_id, delete_ids, updates)
+            
+            self.logger.info(f"✅ [CRUD] Applied quantity changes: deleted={len(deleted_ids)}, updated={len(updated_ids)}")
+            return {"success": True, "deleted_ids": deleted_ids, "updated_ids": updated_ids}
+        
+        except Exception as e:
+            self.logger.error(f"❌ [CRUD] Failed to apply quantity changes: {e}")
+            return {"success": False, "deleted_ids": [], "updated_ids": [], "error": str(e)}
+    
+    async def _apply_quantity_changes_fallback(
+        self,
+        client: Client,
+        user_id: str,
+        delete_ids: List[str],
+        updates: List[Dict[str, Any]]
+    ) -> Tuple[List[str], List[str]]:
+        """一括削除と数量ごとの一括更新（非トランザクション）"""
+        deleted_ids = []
+        if delete_ids:
+            result = await execute_query(client.table("inventory").delete().eq("user_id", user_id).in_("id", delete_ids))
+            deleted_ids = [row["id"] for row in result.data or []]
+        
+        ids_by_quantity: Dict[float, List[str]] = {}
+        for update in updates:
+            ids_by_quantity.setdefault(update["quantity"], []).append(update["id"])
+        
+        updated_ids = []
+        for quantity, ids in ids_by_quantity.items():
+            result = await execute_query(client.table("inventory").update({"quantity": quantity}).eq("user_id", user_id).in_("id", ids))
+            updated_ids.extend(row["id"] for row in result.data or [])
+        return deleted_ids, updated_ids
+
     async def update_item_by_name_with_ambiguity_check(
         self, 
         client: Client, 
@@ -347,7 +414,7 @@ class InventoryCRUD:
             self.logger.info(f"🔍 [CRUD] Searching items by name for ambiguity check: {item_name}")
             
             # 1. 名前でアイテムを検索
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).execute()
+            result = await execute_query(client.table("inventory").select(AMBIGUITY_CHECK_COLUMNS).eq("user_id", user_id).eq("item_name", item_name))
             
             if not result.data:
                 return {"success": False, "error": f"Item '{item_name}' not found"}
@@ -372,7 +439,7 @@ class InventoryCRUD:
                     update_data["expiry_date"] = expiry_date
                 
                 # 更新実行
-                update_result = client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", item_id).execute()
+                update_result = await execute_query(client.table("inventory").update(update_data).eq("user_id", user_id).eq("id", item_id))
                 
                 if update_result.data:
                     self.logger.info(f"✅ [CRUD] Item updated successfully")
@@ -419,7 +486,7 @@ class InventoryCRUD:
             self.logger.info(f"🔍 [CRUD] Searching items by name for ambiguity check: {item_name}")
             
             # 1. 名前でアイテムを検索
-            result = client.table("inventory").select("*").eq("user_id", user_id).eq("item_name", item_name).execute()
+            result = await execute_query(client.table("inventory").select(AMBIGUITY_CHECK_COLUMNS).eq("user_id", user_id).eq("item_name", item_name))
             
             if not result.data:
                 return {"success": False, "error": "No items found"}
@@ -429,7 +496,7 @@ class InventoryCRUD:
             if len(items) == 1:
                 # 2. 1件のみの場合は直接削除
                 item_id = items[0]["id"]
-                delete_result = client.table("inventory").delete().eq("user_id", user_id).eq("id", item_id).execute()
+                delete_result = await execute_query(client.table("inventory").delete().eq("user_id", user_id).eq("id", item_id))
                 
                 self.logger.info(f"✅ [CRUD] Single item deleted: {item_id}")
                 return {"success": True, "data": delete_result.data[0]}
@@ -9,7 +9,7 @@ import os
 # プロジェクトルートをPythonのモジュール検索パスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 from supabase import create_client, Client
 from fastmcp import FastMCP
@@ -70,15 +70,15 @@ async def inventory_add(
 
 
 @mcp.tool()
-async def inventory_list(user_id: str, token: str = "") -> Dict[str, Any]:
-    """ユーザーの全在庫アイテムを取得"""
+async def inventory_list(user_id: str, fields: Optional[List[str]] = None, token: str = "") -> Dict[str, Any]:
+    """ユーザーの全在庫アイテムを取得（fields: 取得する列、例: ["item_name"]。省略時は全列）"""
     logger.info(f"🔧 [INVENTORY] Starting inventory_list for user: {user_id}")
     
     try:
         client = get_authenticated_client(user_id, token)
         logger.info(f"🔐 [INVENTORY] Authenticated client created for user: {user_id}")
         
-        result = await crud.get_all_items(client, user_id)
+        result = await crud.get_all_items(client, user_id, fields=fields)
         logger.info(f"✅ [INVENTORY] inventory_list completed successfully")
         logger.debug(f"📊 [INVENTORY] List result: {result}")
         
@@ -90,15 +90,15 @@ async def inventory_list(user_id: str, token: str = "") -> Dict[str, Any]:
 
 
 @mcp.tool()
-async def inventory_list_by_name(user_id: str, item_name: str, token: str = "") -> Dict[str, Any]:
-    """指定したアイテム名の在庫アイテムを取得"""
+async def inventory_list_by_name(user_id: str, item_name: str, fields: Optional[List[str]] = None, token: str = "") -> Dict[str, Any]:
+    """指定したアイテム名の在庫アイテムを取得（fields: 取得する列。省略時は全列）"""
     logger.info(f"🔧 [INVENTORY] Starting inventory_list_by_name for user: {user_id}, item: {item_name}")
     
     try:
         client = get_authenticated_client(user_id, token)
         logger.info(f"🔐 [INVENTORY] Authenticated client created for user: {user_id}")
         
-        result = await crud.get_items_by_name(client, user_id, item_name)
+        result = await crud.get_items_by_name(client, user_id, item_name, fields=fields)
         logger.info(f"✅ [INVENTORY] inventory_list_by_name completed successfully")
         logger.debug(f"📊 [INVENTORY] List by name result: {result}")
         
@@ -110,15 +110,15 @@ async def inventory_list_by_name(user_id: str, item_name: str, token: str = "")
 
 
 @mcp.tool()
-async def inventory_get(user_id: str, item_id: str, token: str = "") -> Dict[str, Any]:
-    """指定したIDの在庫アイテムを取得"""
+async def inventory_get(user_id: str, item_id: str, fields: Optional[List[str]] = None, token: str = "") -> Dict[str, Any]:
+    """指定したIDの在庫アイテムを取得（fields: 取得する列。省略時は全列）"""
     logger.info(f"🔧 [INVENTORY] Starting inventory_get for user: {user_id}, item_id: {item_id}")
     
     try:
         client = get_authenticated_client(user_id, token)
         logger.info(f"🔐 [INVENTORY] Authenticated client created for user: {user_id}")
         
-        result = await crud.get_item_by_id(client, user_id, item_id)
+        result = await crud.get_item_by_id(client, user_id, item_id, fields=fields)
         logger.info(f"✅ [INVENTORY] inventory_get completed successfully")
         logger.debug(f"📊 [INVENTORY] Get result: {result}")
         
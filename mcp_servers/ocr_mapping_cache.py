@@ -0,0 +1,120 @@
+"""
+Morizo AI v2 - OCR Mapping Cache
+
+This module provides a per-user in-memory cache of the OCR item-name mapping
+table (original_name -> normalized_name) with TTL and write-through updates.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from config.loggers import GenericLogger
+
+# .envファイルを読み込み
+load_dotenv()
+
+
+class OCRMappingCache:
+    """
+    ユーザー単位の変換テーブルキャッシュ
+
+    ユーザーの変換テーブル全体を1回のクエリで読み込み、TTLの間保持する。
+    このプロセスでの追加・更新・削除はキャッシュにも反映する（write-through）。
+    他プロセスでの変更はTTL経過後の再読み込みで反映される。
+    """
+
+    def __init__(self):
+        self.logger = GenericLogger("mcp", "ocr_mapping_cache", initialize_logging=False)
+        # キャッシュの有効秒数（0でキャッシュしない）
+        self.ttl = float(os.getenv("OCR_MAPPING_CACHE_TTL", "300"))
+        self.max_users = int(os.getenv("OCR_MAPPING_CACHE_MAX_USERS", "1000"))
+
+        # ユーザーID → (有効期限, {original_name: normalized_name})
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+        # ユーザーID → 世代番号（読み込み中に書き込みがあった場合、古い読み込み結果を保存しない）
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def get(self, user_id: str) -> Optional[Dict[str, str]]:
+        """キャッシュ済みの変換テーブルを取得（未読み込み・期限切れはNone）"""
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self._cache.pop(user_id, None)
+                self.stats["misses"] += 1
+                return None
+            self._cache.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return dict(entry[1])
+
+    def generation(self, user_id: str) -> int:
+        """読み込み開始時の世代番号を取得（store() に渡す）"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def store(self, user_id: str, mappings: Dict[str, str], generation: int) -> None:
+        """DBから読み込んだ変換テーブルを保存（読み込み中に書き込みがあった場合は保存しない）"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return
+            self._cache[user_id] = (time.monotonic() + self.ttl, dict(mappings))
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_users:
+                evicted_user_id, _ = self._cache.popitem(last=False)
+                self._generations.pop(evicted_user_id, None)
+
+    def put(self, user_id: str, original_name: str, normalized_name: str) -> None:
+        """変換の追加・更新をキャッシュに反映"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.stats["writes"] += 1
+            entry = self._cache.get(user_id)
+            if entry is not None:
+                entry[1][original_name] = normalized_name
+
+    def remove(self, user_id: str, original_name: str) -> None:
+        """変換の削除をキャッシュに反映"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.stats["writes"] += 1
+            entry = self._cache.get(user_id)
+            if entry is not None:
+                entry[1].pop(original_name, None)
+
+    def invalidate(self, user_id: str) -> None:
+        """ユーザーのキャッシュを破棄"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._cache.pop(user_id, None)
+
+    def get_stats(self) -> Dict[str, float]:
+        """キャッシュの統計（hit_rate = hits / (hits + misses)）"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["users"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_ocr_mapping_cache: Optional[OCRMappingCache] = None
+_ocr_mapping_cache_lock = threading.Lock()
+
+
+def get_ocr_mapping_cache() -> OCRMappingCache:
+    """プロセス共有の変換テーブルキャッシュを取得"""
+    global _ocr_mapping_cache
+    if _ocr_mapping_cache is None:
+        with _ocr_mapping_cache_lock:
+            if _ocr_mapping_cache is None:
+                _ocr_mapping_cache = OCRMappingCache()
+    return _ocr_mapping_cache
@@ -8,6 +8,8 @@ from typing import Dict, Any, List, Optional
 from supabase import Client
 
 from config.loggers import GenericLogger
+from mcp_servers.utils import execute_query
+from mcp_servers.ocr_mapping_cache import get_ocr_mapping_cache
 
 
 class OCRMappingCRUD:
@@ -15,6 +17,7 @@ class OCRMappingCRUD:
     
     def __init__(self):
         self.logger = GenericLogger("mcp", "ocr_mapping_crud", initialize_logging=False)
+        self.cache = get_ocr_mapping_cache()
     
     async def add_mapping(
         self,
@@ -50,12 +53,13 @@ class OCRMappingCRUD:
             
             # UPSERT（既に存在する場合は更新、存在しない場合は挿入）
             # UNIQUE(user_id, original_name)制約があるため、upsertを使用
-            result = client.table("ocr_item_mappings").upsert(
+            result = await execute_query(client.table("ocr_item_mappings").upsert(
                 data,
                 on_conflict="user_id,original_name"
-            ).execute()
+            ))
             
             if result.data:
+                self.cache.put(user_id, data["original_name"], data["normalized_name"])
                 self.logger.info(f"✅ [CRUD] OCR mapping added/updated successfully: {result.data[0]['id']}")
                 return {
                     "success": True,
@@ -95,11 +99,11 @@ class OCRMappingCRUD:
         try:
             self.logger.debug(f"🔍 [CRUD] Getting OCR mapping: user_id={user_id}, original_name='{original_name}'")
             
-            result = client.table("ocr_item_mappings").select("*").eq(
+            result = await execute_query(client.table("ocr_item_mappings").select("*").eq(
                 "user_id", user_id
             ).eq(
                 "original_name", original_name.strip()
-            ).execute()
+            ))
             
             if result.data and len(result.data) > 0:
                 self.logger.debug(f"✅ [CRUD] OCR mapping found: {result.data[0]['id']}")
@@ -143,9 +147,9 @@ class OCRMappingCRUD:
         try:
             self.logger.info(f"🔍 [CRUD] Getting all OCR mappings for user: {user_id}")
             
-            result = client.table("ocr_item_mappings").select("*").eq(
+            result = await execute_query(client.table("ocr_item_mappings").select("*").eq(
                 "user_id", user_id
-            ).order("created_at", desc=True).execute()
+            ).order("created_at", desc=True))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Retrieved {len(result.data)} OCR mappings")
@@ -168,6 +172,56 @@ class OCRMappingCRUD:
                 "error": str(e)
             }
     
+    async def get_user_mappings(
+        self,
+        client: Client,
+        user_id: str
+    ) -> Dict[str, Any]:
+        """ユーザーの変換テーブルを辞書で取得（キャッシュ利用）
+        
+        キャッシュにない場合は1回のクエリで全件を読み込み、キャッシュに保存する。
+        
+        Args:
+            client: Supabaseクライアント
+            user_id: ユーザーID
+            
+        Returns:
+            {
+                "success": bool,
+                "data": Dict[str, str],  # original_name -> normalized_name
+                "error": Optional[str]
+            }
+        """
+        mappings = self.cache.get(user_id)
+        if mappings is not None:
+            self.logger.debug(f"⚡ [CRUD] OCR mappings served from cache: {len(mappings)} entries")
+            return {
+                "success": True,
+                "data": mappings
+            }
+        
+        try:
+            generation = self.cache.generation(user_id)
+            result = await execute_query(client.table("ocr_item_mappings").select(
+                "original_name, normalized_name"
+            ).eq("user_id", user_id))
+            
+            mappings = {row["original_name"]: row["normalized_name"] for row in result.data or []}
+            self.cache.store(user_id, mappings, generation)
+            self.logger.debug(f"✅ [CRUD] Loaded {len(mappings)} OCR mappings for user: {user_id}")
+            return {
+                "success": True,
+                "data": mappings
+            }
+                
+        except Exception as e:
+            self.logger.error(f"❌ [CRUD] Failed to load OCR mappings: {e}")
+            return {
+                "success": False,
+                "data": {},
+                "error": str(e)
+            }
+    
     async def update_mapping(
         self,
         client: Client,
@@ -209,11 +263,12 @@ class OCRMappingCRUD:
             
             # 更新
             mapping_id = get_result["data"]["id"]
-            result = client.table("ocr_item_mappings").update({
+            result = await execute_query(client.table("ocr_item_mappings").update({
                 "normalized_name": normalized_name.strip()
-            }).eq("id", mapping_id).execute()
+            }).eq("id", mapping_id))
             
             if result.data:
+                self.cache.put(user_id, original_name.strip(), normalized_name.strip())
                 self.logger.info(f"✅ [CRUD] OCR mapping updated successfully: {mapping_id}")
                 return {
                     "success": True,
@@ -252,12 +307,13 @@ class OCRMappingCRUD:
         try:
             self.logger.info(f"🗑️ [CRUD] Deleting OCR mapping: '{original_name}'")
             
-            result = client.table("ocr_item_mappings").delete().eq(
+            result = await execute_query(client.table("ocr_item_mappings").delete().eq(
                 "user_id", user_id
             ).eq(
                 "original_name", original_name.strip()
-            ).execute()
+            ))
             
+            self.cache.remove(user_id, original_name.strip())
             self.logger.info(f"✅ [CRUD] OCR mapping deleted successfully")
             return {
                 "success": True
@@ -7,8 +7,20 @@ This module provides basic CRUD operations for recipe history management.
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from supabase import Client
+from postgrest.exceptions import APIError
 
 from config.loggers import GenericLogger
+from mcp_servers.utils import execute_query, insert_bisecting
+
+# 献立履歴の取得で使用する列
+HISTORY_COLUMNS = "id,title,source,url,cooked_at,ingredients_deleted"
+
+# タイトルのプレフィックスによるカテゴリ判定
+CATEGORY_PREFIX_MAP = {
+    "main": "主菜: ",
+    "sub": "副菜: ",
+    "soup": "汁物: "
+}
 
 
 class RecipeHistoryCRUD:
@@ -45,7 +57,7 @@ class RecipeHistoryCRUD:
                 data["ingredients"] = ingredients
             
             # データベースに挿入
-            result = client.table("recipe_historys").insert(data).execute()
+            result = await execute_query(client.table("recipe_historys").insert(data))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Recipe history added successfully: {result.data[0]['id']}")
@@ -57,12 +69,93 @@ class RecipeHistoryCRUD:
             self.logger.error(f"❌ [CRUD] Failed to add recipe history: {e}")
             return {"success": False, "error": str(e)}
     
+    async def add_histories_bulk(
+        self,
+        client: Client,
+        user_id: str,
+        histories: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """レシピ履歴を一括追加（1回のinsert、失敗時は二分割して不正な行を特定）
+        
+        Args:
+            client: Supabaseクライアント
+            user_id: ユーザーID
+            histories: レシピ履歴のリスト
+                [
+                    {
+                        "title": str,
+                        "source": str,
+                        "url": Optional[str],
+                        "ingredients": Optional[List[str]],
+                        "id": Optional[str]  # 省略時はDBで採番
+                    }
+                ]
+        
+        Returns:
+            {
+                "success": bool,
+                "total": int,
+                "success_count": int,
+                "error_count": int,
+                "data": List[Optional[Dict[str, Any]]],  # historiesと同じ順序（失敗した行はNone）
+                "errors": List[Dict[str, Any]]  # {"index", "title", "error"}
+            }
+        """
+        try:
+            self.logger.info(f"📝 [CRUD] Adding {len(histories)} recipe histories in bulk")
+            
+            # データ準備（複数行insertのため全行で同じ列を持たせる）
+            data_list = []
+            for history in histories:
+                data = {
+                    "user_id": user_id,
+                    "title": history.get("title"),
+                    "source": history.get("source"),
+                    "url": history.get("url") or None,
+                    "ingredients": history.get("ingredients") or None
+                }
+                if history.get("id"):
+                    data["id"] = history["id"]
+                data_list.append(data)
+            
+            inserted, failures = await insert_bisecting(client, "recipe_historys", data_list)
+            errors = [
+                {"index": index, "title": data_list[index]["title"], "error": error}
+                for index, error in sorted(failures.items())
+            ]
+            success_count = len(histories) - len(errors)
+            
+            if errors:
+                self.logger.warning(f"⚠️ [CRUD] {success_count} recipe histories added, {len(errors)} failed")
+            else:
+                self.logger.info(f"✅ [CRUD] {success_count} recipe histories added successfully")
+            
+            return {
+                "success": success_count > 0 or not histories,
+                "total": len(histories),
+                "success_count": success_count,
+                "error_count": len(errors),
+                "data": inserted,
+                "errors": errors
+            }
+        
+        except Exception as e:
+            self.logger.error(f"❌ [CRUD] Failed to add recipe histories in bulk: {e}")
+            return {
+                "success": False,
+                "total": len(histories),
+                "success_count": 0,
+                "error_count": len(histories),
+                "data": [None] * len(histories),
+                "errors": [{"index": index, "title": history.get("title"), "error": str(e)} for index, history in enumerate(histories)]
+            }
+    
     async def get_all_histories(self, client: Client, user_id: str) -> Dict[str, Any]:
         """ユーザーの全レシピ履歴を取得"""
         try:
             self.logger.info(f"📋 [CRUD] Getting all recipe histories for user: {user_id}")
             
-            result = client.table("recipe_historys").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+            result = await execute_query(client.table("recipe_historys").select("*").eq("user_id", user_id).order("created_at", desc=True))
             
             self.logger.info(f"✅ [CRUD] Retrieved {len(result.data)} recipe histories")
             return {"success": True, "data": result.data}
@@ -76,7 +169,7 @@ class RecipeHistoryCRUD:
         try:
             self.logger.info(f"🔍 [CRUD] Getting recipe history by ID: {history_id}")
             
-            result = client.table("recipe_historys").select("*").eq("user_id", user_id).eq("id", history_id).execute()
+            result = await execute_query(client.table("recipe_historys").select("*").eq("user_id", user_id).eq("id", history_id))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Recipe history retrieved successfully")
@@ -114,7 +207,7 @@ class RecipeHistoryCRUD:
                 return {"success": False, "error": "No update data provided"}
             
             # データベース更新
-            result = client.table("recipe_historys").update(update_data).eq("user_id", user_id).eq("id", history_id).execute()
+            result = await execute_query(client.table("recipe_historys").update(update_data).eq("user_id", user_id).eq("id", history_id))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Recipe history updated successfully")
@@ -131,7 +224,7 @@ class RecipeHistoryCRUD:
         try:
             self.logger.info(f"🗑️ [CRUD] Deleting recipe history by ID: {history_id}")
             
-            result = client.table("recipe_historys").delete().eq("user_id", user_id).eq("id", history_id).execute()
+            result = await execute_query(client.table("recipe_historys").delete().eq("user_id", user_id).eq("id", history_id))
             
             if result.data:
                 self.logger.info(f"✅ [CRUD] Recipe history deleted successfully")
@@ -176,11 +269,11 @@ class RecipeHistoryCRUD:
             }
             
             # 指定期間内のレシピを取得
-            result = client.table("recipe_historys")\
+            query = client.table("recipe_historys")\
                 .select("title")\
                 .eq("user_id", user_id)\
-                .gte("cooked_at", cutoff_date.isoformat())\
-                .execute()
+                .gte("cooked_at", cutoff_date.isoformat())
+            result = await execute_query(query)
             
             # カテゴリでフィルタリング
             category_prefix = category_prefix_map.get(category)
@@ -198,6 +291,167 @@ class RecipeHistoryCRUD:
             self.logger.error(f"❌ [CRUD] Failed to get recent recipe titles: {e}")
             return {"success": False, "error": str(e), "data": []}
     
+    async def get_histories_by_date(
+        self,
+        client: Client,
+        user_id: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        category: Optional[str] = None,
+        cursor: Optional[Dict[str, str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """日付ごとにまとめたレシピ履歴を新しい順に取得（キーセットページネーション）
+        
+        Args:
+            client: Supabaseクライアント
+            user_id: ユーザーID
+            start: 期間の開始日時（ISO形式、この日時を含む）
+            end: 期間の終了日時（ISO形式、この日時を含まない）
+            category: カテゴリ絞り込み（"main", "sub", "soup"）
+            cursor: 前ページの next_cursor（{"cooked_at": str, "id": str}）
+            limit: 1ページの日付数（省略時は期間内のすべての日付）
+        
+        Returns:
+            {
+                "success": bool,
+                "data": [
+                    {
+                        "date": str,  # YYYY-MM-DD
+                        "recipes": [{"category", "title", "source", "url", "history_id"}],
+                        "ingredients_deleted": bool  # その日のすべてのレシピが削除済みの場合のみTrue
+                    }
+                ],
+                "next_cursor": Optional[Dict[str, str]]  # 次ページがない場合はNone
+            }
+        """
+        try:
+            self.logger.info(f"📋 [CRUD] Getting recipe histories by date: start={start}, end={end}, category={category}, limit={limit}")
+            
+            # 次ページの有無を判定するため1日分多く取得
+            fetch_limit = limit + 1 if limit else None
+            
+            try:
+                result = await execute_query(client.rpc("recipe_history_by_date", {
+                    "p_user_id": user_id,
+                    "p_from": start,
+                    "p_to": end,
+                    "p_category": category,
+                    "p_cursor_cooked_at": cursor["cooked_at"] if cursor else None,
+                    "p_cursor_id": cursor["id"] if cursor else None,
+                    "p_limit": fetch_limit
+                }))
+                entries = [
+                    {
+                        "date": row["cooked_date"],
+                        "recipes": row["recipes"] or [],
+                        "ingredients_deleted": bool(row["ingredients_deleted"]),
+                        "cursor": {"cooked_at": row["cursor_cooked_at"], "id": row["cursor_id"]}
+                    }
+                    for row in result.data or []
+                ]
+            except APIError as e:
+                # RPC関数が未作成（マイグレーション未適用）の場合は行単位で取得してグループ化
+                if e.code != "PGRST202":
+                    raise
+                self.logger.warning(f"⚠️ [CRUD] recipe_history_by_date is not deployed, falling back to keyset row scan")
+                entries = await self._get_histories_by_date_fallback(client, user_id, start, end, category, cursor, fetch_limit)
+            
+            next_cursor = None
+            if limit and len(entries) > limit:
+                entries = entries[:limit]
+                next_cursor = entries[-1]["cursor"]
+            for entry in entries:
+                del entry["cursor"]
+            
+            self.logger.info(f"✅ [CRUD] Retrieved {len(entries)} history dates (has_next={next_cursor is not None})")
+            return {"success": True, "data": entries, "next_cursor": next_cursor}
+        
+        except Exception as e:
+            self.logger.error(f"❌ [CRUD] Failed to get recipe histories by date: {e}")
+            return {"success": False, "error": str(e), "data": [], "next_cursor": None}
+    
+    async def _get_histories_by_date_fallback(
+        self,
+        client: Client,
+        user_id: str,
+        start: Optional[str],
+        end: Optional[str],
+        category: Optional[str],
+        cursor: Optional[Dict[str, str]],
+        max_dates: Optional[int],
+        batch_size: int = 200
+    ) -> List[Dict[str, Any]]:
+        """(cooked_at, id) の降順に行を少しずつ取得し、max_dates日分そろった時点で打ち切る"""
+        entries: List[Dict[str, Any]] = []
+        after = cursor
+        done = False
+        
+        while not done:
+            query = client.table("recipe_historys")\
+                .select(HISTORY_COLUMNS)\
+                .eq("user_id", user_id)\
+                .not_.is_("cooked_at", "null")
+            if start:
+                query = query.gte("cooked_at", start)
+            if end:
+                query = query.lt("cooked_at", end)
+            if after:
+                query = query.or_(
+                    f'cooked_at.lt."{after["cooked_at"]}",'
+                    f'and(cooked_at.eq."{after["cooked_at"]}",id.lt.{after["id"]})'
+                )
+            query = query.order("cooked_at", desc=True).order("id", desc=True).limit(batch_size)
+            result = await execute_query(query)
+            rows = result.data or []
+            
+            for row in rows:
+                date_key = self._history_date(row["cooked_at"])
+                if not entries or entries[-1]["date"] != date_key:
+                    # 降順に走査しているため、新しい日付が現れた時点で前の日付はすべて取得済み
+                    if max_dates and len(entries) >= max_dates:
+                        done = True
+                        break
+                    entries.append({"date": date_key, "recipes": [], "flags": [], "cursor": None})
+                entry = entries[-1]
+                
+                # ingredients_deletedはカテゴリ絞り込み前のすべてのレシピで判定
+                entry["flags"].append(row.get("ingredients_deleted") or False)
+                entry["ingredients_deleted"] = all(entry["flags"])
+                entry["cursor"] = {"cooked_at": row["cooked_at"], "id": row["id"]}
+                
+                title = row.get("title", "")
+                recipe_category = next(
+                    (cat for cat, prefix in CATEGORY_PREFIX_MAP.items() if title.startswith(prefix)),
+                    None
+                )
+                if category and recipe_category != category:
+                    continue
+                entry["recipes"].append({
+                    "category": recipe_category,
+                    "title": title,
+                    "source": row.get("source") or "web",
+                    "url": row.get("url"),
+                    "history_id": row["id"]
+                })
+            
+            if len(rows) < batch_size:
+                break
+            after = {"cooked_at": rows[-1]["cooked_at"], "id": rows[-1]["id"]}
+        
+        for entry in entries:
+            del entry["flags"]
+        return entries
+    
+    @staticmethod
+    def _history_date(cooked_at: str) -> str:
+        """cooked_at（ISO形式）からUTCの日付（YYYY-MM-DD）を取得"""
+        cooked_at_dt = datetime.fromisoformat(cooked_at.replace("Z", "+00:00"))
+        # タイムゾーン情報を削除して日付のみ取得
+        if cooked_at_dt.tzinfo:
+            cooked_at_dt = cooked_at_dt.replace(tzinfo=None)
+        return cooked_at_dt.date().isoformat()
+    
     async def update_ingredients_deleted(
         self,
         client: Client,
@@ -218,24 +472,24 @@ class RecipeHistoryCRUD:
                 return {"success": False, "error": "Invalid date format (YYYY-MM-DD required)"}
             
             # 指定日付のレシピ履歴を取得
-            result = client.table("recipe_historys")\
+            query = client.table("recipe_historys")\
                 .select("id")\
                 .eq("user_id", user_id)\
                 .gte("cooked_at", start_datetime.isoformat())\
-                .lte("cooked_at", end_datetime.isoformat())\
-                .execute()
+                .lte("cooked_at", end_datetime.isoformat())
+            result = await execute_query(query)
             
             if not result.data:
                 self.logger.warning(f"⚠️ [CRUD] No recipe histories found for date: {date}")
                 return {"success": True, "data": [], "updated_count": 0}
             
             # ingredients_deletedフラグを更新
-            update_result = client.table("recipe_historys")\
+            query = client.table("recipe_historys")\
                 .update({"ingredients_deleted": deleted})\
                 .eq("user_id", user_id)\
                 .gte("cooked_at", start_datetime.isoformat())\
-                .lte("cooked_at", end_datetime.isoformat())\
-                .execute()
+                .lte("cooked_at", end_datetime.isoformat())
+            update_result = await execute_query(query)
             
             updated_count = len(update_result.data) if update_result.data else 0
             self.logger.info(f"✅ [CRUD] Updated {updated_count} recipe histories")
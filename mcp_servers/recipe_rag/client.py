@@ -7,7 +7,7 @@ Recipe RAG クライアント
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 from openai import AsyncOpenAI
@@ -28,6 +28,10 @@ if not root_logger.handlers:
 from .search import RecipeSearchEngine
 from .menu_format import MenuFormatter
 from .llm_solver import LLMConstraintSolver
+from .embeddings import CachedEmbeddings
+from .vector_index import NumpyVectorIndex
+from .ingredient_index import IngredientIndex, load_ingredient_indexes
+from mcp_servers.embedding_cache import get_embedding_cache
 
 
 class RecipeRAGClient:
@@ -44,9 +48,20 @@ class RecipeRAGClient:
         
         # 環境変数から埋め込みモデルを取得
         embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-        self.embeddings = OpenAIEmbeddings(model=embedding_model)
+        # 3つのベクトルストアで共有する埋め込みキャッシュ（同じクエリはAPIを呼び出さない）
+        self.embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(model=embedding_model), embedding_model, get_embedding_cache()
+        )
         self._vectorstores = None
         
+        # 検索インデックス（chroma: Chromaで検索、numpy: 全件をメモリ上の行列に読み込んで厳密検索）
+        self.vector_index_backend = os.getenv("RECIPE_VECTOR_INDEX_BACKEND", "chroma").lower()
+        self.vector_index_dtype = os.getenv("RECIPE_VECTOR_INDEX_DTYPE", "float32").lower()
+        
+        # 検索モード（vector: ベクトル検索のみ、hybrid: 食材の転置インデックスとベクトル検索を統合）
+        self.search_mode = os.getenv("RECIPE_SEARCH_MODE", "vector").lower()
+        self.ingredient_index_path = os.getenv("RECIPE_INGREDIENT_INDEX_PATH", "./recipe_ingredient_index.json")
+        
         # LLMクライアントの初期化
         self.llm_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.llm_client = AsyncOpenAI()
@@ -55,8 +70,15 @@ class RecipeRAGClient:
         self._search_engine = None
         self._menu_formatter = None
         self._llm_solver = None
+        
+        # メモリ上のインデックスはMCPサーバー起動時に読み込む（失敗した場合は初回検索時に再試行）
+        if self.vector_index_backend == "numpy":
+            try:
+                self._get_vectorstores()
+            except Exception as e:
+                logger.error(f"❌ [RAG] Failed to preload in-memory vector indexes: {e}")
     
-    def _get_vectorstores(self) -> Dict[str, Chroma]:
+    def _get_vectorstores(self) -> Dict[str, Union[Chroma, NumpyVectorIndex]]:
         """3つのベクトルストアの取得（遅延初期化）"""
         if self._vectorstores is None:
             try:
@@ -78,19 +100,38 @@ class RecipeRAGClient:
                 logger.info(f"  主菜: {self.vector_db_path_main}")
                 logger.info(f"  副菜: {self.vector_db_path_sub}")
                 logger.info(f"  汁物: {self.vector_db_path_soup}")
+                
+                if self.vector_index_backend == "numpy":
+                    self._vectorstores = {
+                        category: NumpyVectorIndex.from_chroma(vectorstore, self.vector_index_dtype)
+                        for category, vectorstore in self._vectorstores.items()
+                    }
             except Exception as e:
+                self._vectorstores = None
                 logger.error(f"ベクトルストア読み込みエラー: {e}")
                 raise
         return self._vectorstores
     
+    def _get_ingredient_indexes(self) -> Dict[str, IngredientIndex]:
+        """カテゴリ別の食材の転置インデックスを読み込む（ハイブリッド検索時のみ）"""
+        if self.search_mode != "hybrid":
+            return {}
+        try:
+            return load_ingredient_indexes(self.ingredient_index_path)
+        except Exception as e:
+            # 転置インデックスがない場合はベクトル検索のみで動作
+            logger.warning(f"⚠️ [RAG] Ingredient index unavailable, falling back to vector search: {e}")
+            return {}
+    
     def _get_search_engines(self) -> Dict[str, RecipeSearchEngine]:
         """3つの検索エンジンの取得（遅延初期化）"""
         if not hasattr(self, '_search_engines') or self._search_engines is None:
             vectorstores = self._get_vectorstores()
+            ingredient_indexes = self._get_ingredient_indexes()
             self._search_engines = {
-                "main": RecipeSearchEngine(vectorstores["main"]),
-                "sub": RecipeSearchEngine(vectorstores["sub"]),
-                "soup": RecipeSearchEngine(vectorstores["soup"])
+                "main": RecipeSearchEngine(vectorstores["main"], ingredient_indexes.get("main")),
+                "sub": RecipeSearchEngine(vectorstores["sub"], ingredient_indexes.get("sub")),
+                "soup": RecipeSearchEngine(vectorstores["soup"], ingredient_indexes.get("soup"))
             }
         return self._search_engines
     
@@ -131,11 +172,15 @@ class RecipeRAGClient:
             
             search_engines = self._get_search_engines()
             
+            # クエリは3つのベクトルDBで共通のため、埋め込みは1回だけ計算
+            queries = RecipeSearchEngine.build_queries(ingredients, menu_type)
+            query_vectors = await self.embeddings.aembed_documents(queries)
+            
             # 3つのベクトルDBで並列検索
             async def search_category(category: str, search_engine: RecipeSearchEngine):
                 try:
                     results = await search_engine.search_similar_recipes(
-                        ingredients, menu_type, excluded_recipes, limit
+                        ingredients, menu_type, excluded_recipes, limit, query_vectors=query_vectors
                     )
                     return category, results
                 except Exception as e:
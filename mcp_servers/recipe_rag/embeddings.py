@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+キャッシュ付き埋め込み関数
+
+ベクトルストアの埋め込み関数をラップし、同じクエリの埋め込みAPI呼び出しを省略する
+"""
+
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from config.loggers import GenericLogger
+from mcp_servers.embedding_cache import EmbeddingCache, normalize_embedding_text
+
+logger = GenericLogger("mcp", "recipe_rag", initialize_logging=False)
+
+
+class CachedEmbeddings(Embeddings):
+    """埋め込みキャッシュを参照してからAPIを呼び出す埋め込み関数"""
+    
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        """
+        初期化
+        
+        Args:
+            embeddings: ラップする埋め込み関数
+            model: 埋め込みモデル名（キャッシュキーに含める）
+            cache: 埋め込みキャッシュ
+        """
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+    
+    def embed_query(self, text: str) -> List[float]:
+        """クエリの埋め込み（キャッシュにない場合のみAPIを呼び出す）"""
+        vector = self.cache.get(self.model, text)
+        if vector is not None:
+            return vector
+        
+        vector = self.embeddings.embed_query(normalize_embedding_text(text))
+        self.cache.put(self.model, text, vector)
+        return vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """文書の埋め込み（キャッシュにないものだけをまとめてAPIに送る）"""
+        vectors: List[List[float]] = [None] * len(texts)
+        missing = {}
+        for index, text in enumerate(texts):
+            vector = self.cache.get(self.model, text)
+            if vector is not None:
+                vectors[index] = vector
+            else:
+                missing.setdefault(normalize_embedding_text(text), []).append(index)
+        
+        if missing:
+            missing_texts = list(missing)
+            logger.debug(f"🔍 [RAG] Embedding {len(missing_texts)}/{len(texts)} uncached texts")
+            for text, vector in zip(missing_texts, self.embeddings.embed_documents(missing_texts)):
+                self.cache.put(self.model, text, vector)
+                for index in missing[text]:
+                    vectors[index] = vector
+        
+        return vectors
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+食材の転置インデックス
+
+正規化済み食材 → レシピの転置インデックスで、在庫食材を含むレシピを字句一致で検索する。
+ベクトルDBと同じレシピデータ（me2you/recipe_data.jsonl）から
+scripts/build_vector_db_by_category.py で構築し、JSONファイルとして保存する。
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from config.loggers import GenericLogger
+from .matching import MAIN_INGREDIENT_WEIGHT, normalize_ingredient, tokenize_ingredients
+
+logger = GenericLogger("mcp", "recipe_rag", initialize_logging=False)
+
+INDEX_FORMAT_VERSION = 1
+
+
+class IngredientIndex:
+    """1カテゴリ（主菜・副菜・汁物）分の食材の転置インデックス"""
+    
+    def __init__(self, recipes: List[Dict[str, Any]], postings: Dict[str, List[int]] = None):
+        """
+        初期化
+        
+        Args:
+            recipes: レシピのリスト（{"content": ベクトルDBの文書, "metadata": ベクトルDBのメタデータ}）
+            postings: 正規化済み食材 → recipes内の位置のリスト（省略時はrecipesから構築）
+        """
+        self.recipes = recipes
+        if postings is None:
+            postings = {}
+            for position, recipe in enumerate(recipes):
+                tokens = recipe["metadata"].get("ingredient_tokens")
+                tokens = tokens.split() if tokens is not None else tokenize_ingredients(recipe["content"].split(" | ")[0])
+                for token in tokens:
+                    postings.setdefault(token, []).append(position)
+        self.postings = postings
+    
+    def __len__(self) -> int:
+        return len(self.recipes)
+    
+    def search(self, ingredients: List[str], main_ingredient: str = None, k: int = 50) -> List[Document]:
+        """
+        在庫食材を含むレシピを検索
+        
+        在庫食材と完全一致（正規化後）する食材の数でスコアリングし、主要食材は重みを付ける。
+        主要食材は部分一致（「鶏肉」→「鶏もも肉」など）も対象にする。
+        
+        Args:
+            ingredients: 在庫食材リスト
+            main_ingredient: 主要食材
+            k: 取得件数
+        
+        Returns:
+            スコア順のレシピ（ベクトルストアの検索結果と同じ形式）
+        """
+        scores: Dict[int, float] = {}
+        normalized_main = normalize_ingredient(main_ingredient) if main_ingredient else ""
+        
+        for token in dict.fromkeys(normalize_ingredient(item) for item in ingredients):
+            if token == normalized_main:
+                continue
+            for position in self.postings.get(token, ()):
+                scores[position] = scores.get(position, 0.0) + 1.0
+        
+        if normalized_main:
+            # 主要食材を含むレシピ（部分一致を含む）に1回だけ重みを加算
+            main_positions = set()
+            for token, positions in self.postings.items():
+                if normalized_main in token:
+                    main_positions.update(positions)
+            for position in main_positions:
+                scores[position] = scores.get(position, 0.0) + MAIN_INGREDIENT_WEIGHT
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [
+            Document(page_content=self.recipes[position]["content"], metadata=self.recipes[position]["metadata"])
+            for position, _ in ranked
+        ]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON保存用の辞書に変換"""
+        return {"recipes": self.recipes, "postings": self.postings}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IngredientIndex":
+        """to_dict() の辞書から復元"""
+        return cls(data["recipes"], data.get("postings"))
+
+
+def save_ingredient_indexes(path: str, indexes: Dict[str, IngredientIndex]) -> None:
+    """カテゴリ別の転置インデックスをJSONファイルに保存"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    data = {
+        "version": INDEX_FORMAT_VERSION,
+        "categories": {category: index.to_dict() for category, index in indexes.items()}
+    }
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temporary_path, path)
+
+
+def load_ingredient_indexes(path: str) -> Dict[str, IngredientIndex]:
+    """JSONファイルからカテゴリ別の転置インデックスを読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != INDEX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported ingredient index version: {data.get('version')}")
+    indexes = {category: IngredientIndex.from_dict(index) for category, index in data["categories"].items()}
+    logger.info(
+        f"✅ [RAG] Loaded ingredient indexes from {path}: "
+        f"{', '.join(f'{category}={len(index)}' for category, index in indexes.items())}"
+    )
+    return indexes
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], limit: int, k: int = 60) -> List[Document]:
+    """
+    複数の検索結果をReciprocal Rank Fusionで統合
+    
+    各結果リストでの順位rに対して 1 / (k + r) を合計し、合計の大きい順に並べる。
+    同じレシピの判定には original_index（なければタイトル）を使用する。
+    
+    Args:
+        result_lists: 検索結果のリスト（それぞれ近い順）
+        limit: 返す最大件数
+        k: RRFの定数
+    
+    Returns:
+        統合後の検索結果
+    """
+    fused: Dict[Any, Tuple[float, int, Document]] = {}
+    order = 0
+    for results in result_lists:
+        for rank, document in enumerate(results, 1):
+            metadata = document.metadata
+            key = metadata.get("original_index", metadata.get("title", document.page_content))
+            score, first_seen, first_document = fused.get(key, (0.0, order, document))
+            fused[key] = (score + 1.0 / (k + rank), first_seen, first_document)
+            order += 1
+    ranked = sorted(fused.values(), key=lambda item: (-item[0], item[1]))
+    return [document for _, _, document in ranked[:limit]]
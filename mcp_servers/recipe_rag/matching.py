@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+食材マッチング
+
+在庫食材とレシピ食材の部分マッチングスコアを、候補レシピ全件に対して一括で計算する
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# 主要食材の重み
+MAIN_INGREDIENT_WEIGHT = 5.0
+
+
+def normalize_ingredient(ingredient):
+    """食材名を正規化（カタカナに統一）"""
+    if not ingredient:
+        return ""
+    
+    # ひらがなをカタカナに変換
+    result = ""
+    for char in ingredient:
+        if 'ぁ' <= char <= 'ん':
+            # ひらがなをカタカナに変換
+            katakana_char = chr(ord(char) - ord('ぁ') + ord('ァ'))
+            result += katakana_char
+        else:
+            result += char
+    return result
+
+
+def tokenize_ingredients(ingredients_text: str) -> Tuple[str, ...]:
+    """
+    レシピの食材文字列を正規化済みトークンに変換（重複なし・出現順）
+    
+    ベクトルDB構築時にメタデータ（ingredient_tokens）として保存し、検索時の正規化を省略する。
+    """
+    return tuple(dict.fromkeys(normalize_ingredient(word) for word in ingredients_text.split()))
+
+
+class IngredientMatcher:
+    """
+    在庫食材リストに対する候補レシピの一括スコアリング
+    
+    候補レシピに出現する語彙ごとに在庫食材との完全一致・部分一致を1回だけ判定し、
+    候補×語彙の行列との積で全候補のマッチ状況をまとめて求める。
+    """
+    
+    def __init__(self, inventory: List[str], main_ingredient: str = None):
+        """
+        初期化
+        
+        Args:
+            inventory: 在庫食材リスト（重複除去済み）
+            main_ingredient: 主要食材
+        """
+        self.inventory = list(inventory)
+        self.main_ingredient = main_ingredient
+        self.normalized_inventory = [normalize_ingredient(item) for item in self.inventory]
+        self.normalized_main = normalize_ingredient(main_ingredient) if main_ingredient else ""
+        
+        # 完全一致・部分一致した場合の在庫食材ごとの重み
+        is_main = np.array(
+            [bool(main_ingredient) and item == self.normalized_main for item in self.normalized_inventory],
+            dtype=bool
+        )
+        self.exact_weights = np.where(is_main, MAIN_INGREDIENT_WEIGHT, 1.0)
+        self.partial_weights = np.where(is_main, MAIN_INGREDIENT_WEIGHT * 0.5, 0.5)
+        # マッチした在庫食材が主要食材を含むか（主要食材判定用）
+        self.inventory_has_main = np.array(
+            [bool(self.normalized_main) and self.normalized_main in item for item in self.normalized_inventory],
+            dtype=bool
+        )
+        
+        # スコアの正規化（主要食材が在庫に含まれる場合は主要食材の重みを考慮）
+        if main_ingredient and main_ingredient in self.inventory:
+            self.max_score = MAIN_INGREDIENT_WEIGHT + len(self.inventory) - 1
+        else:
+            self.max_score = float(len(self.inventory))
+    
+    def score(self, candidates: Sequence[Sequence[str]]) -> List[Tuple[float, List[str], bool]]:
+        """
+        候補レシピ全件のマッチングスコアを計算
+        
+        Args:
+            candidates: 候補レシピごとの正規化済み食材トークン
+        
+        Returns:
+            候補ごとの (マッチングスコア, マッチした在庫食材リスト, 主要食材を含むか)
+        """
+        if not candidates:
+            return []
+        if not self.inventory:
+            return [(0.0, [], self._has_main_in_tokens(tokens)) for tokens in candidates]
+        
+        # 候補に出現する語彙
+        vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        columns: List[int] = []
+        for row, tokens in enumerate(candidates):
+            for token in tokens:
+                column = vocabulary.setdefault(token, len(vocabulary))
+                rows.append(row)
+                columns.append(column)
+        
+        # 候補×語彙の出現行列
+        occurrence = np.zeros((len(candidates), len(vocabulary)), dtype=np.float32)
+        occurrence[rows, columns] = 1.0
+        
+        # 語彙×在庫食材の完全一致・部分一致（語彙ごとに1回だけ判定）
+        exact = np.zeros((len(vocabulary), len(self.inventory)), dtype=np.float32)
+        partial = np.zeros((len(vocabulary), len(self.inventory)), dtype=np.float32)
+        word_has_main = np.zeros(len(vocabulary), dtype=np.float32)
+        for word, column in vocabulary.items():
+            for index, item in enumerate(self.normalized_inventory):
+                if item == word:
+                    exact[column, index] = 1.0
+                elif item in word or word in item:
+                    partial[column, index] = 1.0
+            if self.normalized_main and self.normalized_main in word:
+                word_has_main[column] = 1.0
+        
+        # 完全一致しなかった在庫食材のみ部分一致として数える
+        exact_hits = (occurrence @ exact) > 0
+        partial_hits = ((occurrence @ partial) > 0) & ~exact_hits
+        scores = (exact_hits @ self.exact_weights + partial_hits @ self.partial_weights) / self.max_score
+        matched = exact_hits | partial_hits
+        has_main = ((occurrence @ word_has_main) > 0) | (matched & self.inventory_has_main).any(axis=1)
+        
+        results = []
+        for row, tokens in enumerate(candidates):
+            if not tokens:
+                results.append((0.0, [], False))
+                continue
+            matched_items = [self.inventory[index] for index in np.flatnonzero(matched[row])]
+            results.append((float(scores[row]), matched_items, bool(has_main[row])))
+        return results
+    
+    def _has_main_in_tokens(self, tokens: Sequence[str]) -> bool:
+        """レシピ食材に主要食材が含まれるか"""
+        return bool(self.normalized_main) and any(self.normalized_main in token for token in tokens)
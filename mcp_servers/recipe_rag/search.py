@@ -5,38 +5,61 @@
 ChromaDBを使用したレシピの類似検索と部分マッチング機能を提供
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Union
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 from config.loggers import GenericLogger
 import unicodedata
 
-logger = GenericLogger("mcp", "recipe_rag", initialize_logging=False)
-
+from .matching import IngredientMatcher, normalize_ingredient, tokenize_ingredients
+from .vector_index import NumpyVectorIndex
+from .ingredient_index import IngredientIndex, reciprocal_rank_fusion
 
-def normalize_ingredient(ingredient):
-    """食材名を正規化（カタカナに統一）"""
-    if not ingredient:
-        return ""
-    
-    # ひらがなをカタカナに変換
-    result = ""
-    for char in ingredient:
-        if 'ぁ' <= char <= 'ん':
-            # ひらがなをカタカナに変換
-            katakana_char = chr(ord(char) - ord('ぁ') + ord('ァ'))
-            result += katakana_char
-        else:
-            result += char
-    return result
+logger = GenericLogger("mcp", "recipe_rag", initialize_logging=False)
 
 
 class RecipeSearchEngine:
     """レシピ検索エンジン"""
     
-    def __init__(self, vectorstore: Chroma):
-        """初期化"""
+    # ハイブリッド検索: ベクトル検索の取得件数（limitの倍数）、転置インデックスの取得件数（limitの倍数）、RRFの定数
+    HYBRID_VECTOR_K_FACTOR = 5
+    HYBRID_LEXICAL_K_FACTOR = 10
+    RRF_K = 60
+    
+    def __init__(self, vectorstore: Union[Chroma, NumpyVectorIndex], ingredient_index: IngredientIndex = None):
+        """
+        初期化
+        
+        Args:
+            vectorstore: ChromaのベクトルストアまたはNumpyVectorIndex
+            ingredient_index: 食材の転置インデックス（指定した場合はハイブリッド検索）
+        """
         self.vectorstore = vectorstore
+        self.ingredient_index = ingredient_index
+        # 食材文字列 → 正規化済みトークン（メタデータにトークンがない場合に使用）
+        self._token_cache: Dict[str, Tuple[str, ...]] = {}
+    
+    @staticmethod
+    def build_queries(
+        ingredients: List[str],
+        menu_type: str,
+        main_ingredient: str = None
+    ) -> List[str]:
+        """
+        ベクトル検索のクエリを構築
+        
+        主要食材がある場合は [主要食材のみのクエリ, 在庫食材込みのクエリ]、ない場合は [在庫食材のクエリ]。
+        クエリは主菜・副菜・汁物のベクトルストアで共通のため、埋め込みを1回計算すれば全ストアで使える。
+        """
+        # 重複を除去（順序を保持して、同じ在庫からは常に同じクエリになるようにする）
+        normalized_ingredients = list(dict.fromkeys(ingredients))
+        if main_ingredient:
+            normalized_main = normalize_ingredient(main_ingredient)
+            return [
+                f"{normalized_main} {normalized_main} {normalized_main} {menu_type}",
+                f"{normalized_main} {normalized_main} {' '.join(normalized_ingredients)} {menu_type}"
+            ]
+        return [f"{' '.join(normalized_ingredients)} {menu_type}"]
     
     async def search_similar_recipes(
         self,
@@ -44,7 +67,8 @@ class RecipeSearchEngine:
         menu_type: str,
         excluded_recipes: List[str] = None,
         limit: int = 5,
-        main_ingredient: str = None
+        main_ingredient: str = None,
+        query_vectors: List[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         在庫食材に基づく類似レシピ検索（部分マッチング機能付き）
@@ -55,6 +79,7 @@ class RecipeSearchEngine:
             excluded_recipes: 除外するレシピタイトル
             limit: 検索結果の最大件数
             main_ingredient: 主要食材
+            query_vectors: build_queries() のクエリの埋め込み（省略時はこのエンジンで計算）
         
         Returns:
             検索結果のリスト
@@ -67,7 +92,8 @@ class RecipeSearchEngine:
                 excluded_recipes=excluded_recipes,
                 limit=limit,
                 min_match_score=0.05,  # 低い閾値で幅広く検索
-                main_ingredient=main_ingredient
+                main_ingredient=main_ingredient,
+                query_vectors=query_vectors
             )
             
             # 既存のAPIとの互換性のため、不要なフィールドを削除
@@ -96,7 +122,8 @@ class RecipeSearchEngine:
         excluded_recipes: List[str] = None,
         limit: int = 5,
         min_match_score: float = 0.1,
-        main_ingredient: str = None
+        main_ingredient: str = None,
+        query_vectors: List[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         在庫食材の部分マッチングでレシピを検索
@@ -108,26 +135,34 @@ class RecipeSearchEngine:
             limit: 検索結果の最大件数
             min_match_score: 最小マッチングスコア
             main_ingredient: 主要食材
+            query_vectors: build_queries() のクエリの埋め込み（省略時はこのエンジンで計算）
         
         Returns:
             検索結果のリスト（マッチングスコア付き）
         """
         try:
             # 在庫食材の重複を除去して正規化
-            normalized_ingredients = list(set(ingredients))
+            normalized_ingredients = list(dict.fromkeys(ingredients))
             
+            # クエリの埋め込みは1回のAPI呼び出しでまとめて計算
+            if query_vectors is None:
+                queries = self.build_queries(ingredients, menu_type, main_ingredient)
+                query_vectors = self.vectorstore.embeddings.embed_documents(queries)
+            
+            if self.ingredient_index is not None:
+                # ハイブリッド検索: 少なめのベクトル検索結果と転置インデックスの結果をRRFで統合
+                vector_results = self._search_by_vectors(
+                    query_vectors, [limit * self.HYBRID_VECTOR_K_FACTOR] * len(query_vectors)
+                )
+                lexical_results = self.ingredient_index.search(
+                    normalized_ingredients, main_ingredient, k=limit * self.HYBRID_LEXICAL_K_FACTOR
+                )
+                results = reciprocal_rank_fusion(vector_results + [lexical_results], limit * 20, k=self.RRF_K)
             # 主要食材がある場合は2段階検索を実行
-            if main_ingredient:
-                # 主要食材を正規化
-                normalized_main = normalize_ingredient(main_ingredient)
-                
+            elif main_ingredient:
                 # 第1段階: 主要食材のみでの検索（多めに取得）
-                main_query = f"{normalized_main} {normalized_main} {normalized_main} {menu_type}"
-                main_results = self.vectorstore.similarity_search(main_query, k=limit * 15)
-                
                 # 第2段階: 在庫食材込みでの検索
-                inventory_query = f"{normalized_main} {normalized_main} {' '.join(normalized_ingredients)} {menu_type}"
-                inventory_results = self.vectorstore.similarity_search(inventory_query, k=limit * 10)
+                main_results, inventory_results = self._search_by_vectors(query_vectors, [limit * 15, limit * 10])
                 
                 # 結果をマージ（重複除去）
                 all_results = main_results + inventory_results
@@ -142,11 +177,16 @@ class RecipeSearchEngine:
                             break
             else:
                 # 主要食材指定なしの場合は従来通り
-                query = f"{' '.join(normalized_ingredients)} {menu_type}"
-                results = self.vectorstore.similarity_search(query, k=limit * 4)
+                results = self._search_by_vectors(query_vectors, [limit * 4])[0]
             
-            # 部分マッチングでフィルタリングとスコアリング
-            scored_results = []
+            # 除外レシピのタイトルを正規化（プレフィックスを除去、大文字小文字を無視、空白を除去）
+            excluded_titles = {
+                excluded.replace("主菜: ", "").replace("副菜: ", "").replace("汁物: ", "").strip().lower()
+                for excluded in (excluded_recipes or [])
+            }
+            
+            # 除外レシピを除いた候補を抽出
+            candidates = []
             
             for i, result in enumerate(results):
                 try:
@@ -161,78 +201,56 @@ class RecipeSearchEngine:
                         if len(parts) >= 1:
                             title = parts[0].strip()
                     
-                    # 除外レシピチェック
-                    if excluded_recipes:
-                        # タイトルを正規化（大文字小文字を無視、空白を除去）
-                        normalized_title = title.strip().lower()
-                        is_excluded = False
-                        for excluded in excluded_recipes:
-                            # プレフィックスを除去して正規化
-                            normalized_excluded = excluded.replace("主菜: ", "").replace("副菜: ", "").replace("汁物: ", "").strip().lower()
-                            # 完全一致のみで判定（部分一致は使用しない）
-                            if normalized_title == normalized_excluded:
-                                is_excluded = True
-                                break
-                        if is_excluded:
-                            continue
+                    # 除外レシピチェック（完全一致のみで判定、部分一致は使用しない）
+                    if title.strip().lower() in excluded_titles:
+                        continue
                     
                     # レシピの食材部分を抽出
                     parts = content.split(' | ')
                     recipe_ingredients = parts[0] if len(parts) > 0 else ""
                     
-                    # 部分マッチングスコアを計算
-                    match_score, matched_ingredients = self._calculate_match_score(
-                        recipe_ingredients, normalized_ingredients, main_ingredient
-                    )
+                    candidates.append((i, result, title, recipe_ingredients, self._recipe_tokens(metadata, recipe_ingredients)))
                     
-                    # 最小スコア以上のレシピのみを追加
-                    if match_score >= min_match_score:
-                        formatted_result = {
-                            "title": title,
-                            "category": metadata.get('recipe_category', ''),
-                            "category_detail": metadata.get('category_detail', ''),
-                            "main_ingredients": metadata.get('main_ingredients', ''),
-                            "original_index": metadata.get('original_index', 0),
-                            "content": content,
-                            "match_score": match_score,
-                            "matched_ingredients": matched_ingredients,
-                            "recipe_ingredients": recipe_ingredients
-                        }
-                        scored_results.append(formatted_result)
-                        
                 except Exception as e:
                     logger.warning(f"結果処理エラー: {e}")
                     continue
             
-            # マッチングスコア順にソート（タイトルで二次ソートして安定化）
-            scored_results.sort(key=lambda x: (-x['match_score'], x['title']))
+            # 部分マッチングスコアを全候補まとめて計算
+            matcher = IngredientMatcher(normalized_ingredients, main_ingredient)
+            scores = matcher.score([tokens for _, _, _, _, tokens in candidates])
+            
+            scored_results = []
+            for (rank, result, title, recipe_ingredients, _), (match_score, matched_ingredients, has_main_ingredient) in zip(candidates, scores):
+                # 最小スコア以上のレシピのみを追加
+                if match_score >= min_match_score:
+                    metadata = result.metadata
+                    formatted_result = {
+                        "title": title,
+                        "category": metadata.get('recipe_category', ''),
+                        "category_detail": metadata.get('category_detail', ''),
+                        "main_ingredients": metadata.get('main_ingredients', ''),
+                        "original_index": metadata.get('original_index', 0),
+                        "content": result.page_content,
+                        "match_score": match_score,
+                        "matched_ingredients": matched_ingredients,
+                        "recipe_ingredients": recipe_ingredients
+                    }
+                    scored_results.append((formatted_result, has_main_ingredient, rank))
+            
+            if self.ingredient_index is not None:
+                # マッチングスコア順にソート（同スコアはRRFの順位、タイトルの順で安定化）
+                scored_results.sort(key=lambda x: (-x[0]['match_score'], x[2], x[0]['title']))
+            else:
+                # マッチングスコア順にソート（タイトルで二次ソートして安定化）
+                scored_results.sort(key=lambda x: (-x[0]['match_score'], x[0]['title']))
             
             # 主要食材がある場合は、主要食材を含むレシピを優先
             if main_ingredient:
-                # 主要食材を含むレシピと含まないレシピに分類
-                recipes_with_main = []
-                recipes_without_main = []
-                
-                for result in scored_results:
-                    # 主要食材のマッチング判定
-                    recipe_ingredients = result.get('recipe_ingredients', '')
-                    matched_ingredients = result.get('matched_ingredients', [])
-                    
-                    # 正規化による主要食材判定
-                    has_main_ingredient = self._has_main_ingredient_normalized(
-                        main_ingredient, recipe_ingredients, matched_ingredients
-                    )
-                    
-                    if has_main_ingredient:
-                        recipes_with_main.append(result)
-                    else:
-                        recipes_without_main.append(result)
-                
                 # 主要食材ありのレシピのみを返す（主要食材なしは除外）
-                final_results = recipes_with_main[:limit]
+                final_results = [result for result, has_main_ingredient, _ in scored_results if has_main_ingredient][:limit]
             else:
                 # 主要食材指定なしの場合は従来通り
-                final_results = scored_results[:limit]
+                final_results = [result for result, _, _ in scored_results[:limit]]
             
             return final_results
             
@@ -240,87 +258,28 @@ class RecipeSearchEngine:
             logger.error(f"部分マッチング検索エラー: {e}")
             raise
     
-    def _has_main_ingredient_normalized(self, main_ingredient, recipe_ingredients, matched_ingredients):
-        """正規化による主要食材判定"""
-        normalized_main = normalize_ingredient(main_ingredient)
-        
-        # レシピ食材を正規化してチェック
-        recipe_words = recipe_ingredients.split()
-        for word in recipe_words:
-            normalized_word = normalize_ingredient(word)
-            # 完全一致または部分一致
-            if normalized_main == normalized_word or normalized_main in normalized_word:
-                return True
-        
-        # マッチした食材を正規化してチェック
-        for matched in matched_ingredients:
-            if normalized_main in normalize_ingredient(matched):
-                return True
-        
-        return False
+    def _search_by_vectors(self, query_vectors: List[List[float]], ks: List[int]) -> List[List[Any]]:
+        """複数クエリのベクトル検索（バッチ検索に対応したインデックスでは1回の行列積で検索）"""
+        if hasattr(self.vectorstore, "similarity_search_by_vectors"):
+            return self.vectorstore.similarity_search_by_vectors(query_vectors, ks)
+        return [
+            self.vectorstore.similarity_search_by_vector(query_vector, k=k)
+            for query_vector, k in zip(query_vectors, ks)
+        ]
     
-    def _calculate_match_score(
-        self, 
-        recipe_ingredients: str, 
-        normalized_ingredients: List[str],
-        main_ingredient: str = None
-    ) -> tuple[float, List[str]]:
+    def _recipe_tokens(self, metadata: Dict[str, Any], recipe_ingredients: str) -> Tuple[str, ...]:
         """
-        マッチングスコアを計算
-        
-        Args:
-            recipe_ingredients: レシピの食材文字列
-            normalized_ingredients: 正規化された在庫食材リスト
-            main_ingredient: 主要食材
+        レシピの正規化済み食材トークンを取得
         
-        Returns:
-            (マッチングスコア, マッチした食材リスト)
+        ベクトルDB構築時にメタデータ（ingredient_tokens）に保存したものを使用し、
+        保存されていない場合（古いベクトルDB）は食材文字列から計算してキャッシュする
         """
-        if not recipe_ingredients or not normalized_ingredients:
-            return 0.0, []
-        
-        recipe_words = recipe_ingredients.split()
-        matched_count = 0
-        total_inventory = len(normalized_ingredients)
-        matched_items = []
-        
-        # 主要食材の重み付け
-        main_ingredient_weight = 5.0  # 主要食材の重み
-        
-        for inventory_item in normalized_ingredients:
-            normalized_inventory = normalize_ingredient(inventory_item)
-            is_main_ingredient = main_ingredient and normalize_ingredient(inventory_item) == normalize_ingredient(main_ingredient)
-            
-            # 完全マッチ（正規化後）
-            matched = False
-            for word in recipe_words:
-                normalized_word = normalize_ingredient(word)
-                if normalized_inventory == normalized_word:
-                    weight = main_ingredient_weight if is_main_ingredient else 1.0
-                    matched_count += weight
-                    matched_items.append(inventory_item)
-                    matched = True
-                    break
-            
-            # 部分マッチ（正規化後）
-            if not matched:
-                for word in recipe_words:
-                    normalized_word = normalize_ingredient(word)
-                    if normalized_inventory in normalized_word or normalized_word in normalized_inventory:
-                        weight = main_ingredient_weight * 0.5 if is_main_ingredient else 0.5
-                        matched_count += weight
-                        matched_items.append(inventory_item)
-                        break
-        
-        # スコア計算: マッチした食材数 / 在庫食材数
-        # 主要食材がある場合は、主要食材の重みを考慮した正規化
-        if main_ingredient and main_ingredient in normalized_ingredients:
-            # 主要食材がある場合: (主要食材の重み + その他の食材数) / (主要食材の重み + その他の食材数)
-            other_ingredients_count = len(normalized_ingredients) - 1
-            max_possible_score = main_ingredient_weight + other_ingredients_count
-            match_score = matched_count / max_possible_score if max_possible_score > 0 else 0.0
-        else:
-            # 主要食材がない場合: 従来の計算
-            match_score = matched_count / total_inventory if total_inventory > 0 else 0.0
+        tokens = metadata.get('ingredient_tokens')
+        if tokens is not None:
+            return tuple(tokens.split())
         
-        return match_score, matched_items
+        tokens = self._token_cache.get(recipe_ingredients)
+        if tokens is None:
+            tokens = tokenize_ingredients(recipe_ingredients)
+            self._token_cache[recipe_ingredients] = tokens
+        return tokens
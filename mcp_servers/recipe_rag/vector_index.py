@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+メモリ上のベクトルインデックス
+
+Chromaの永続ディレクトリから全レシピの埋め込みとメタデータを読み込み、
+連続したNumPy行列に対する行列ベクトル積 + argpartition で厳密なtop-k検索を行う
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.loggers import GenericLogger
+
+logger = GenericLogger("mcp", "recipe_rag", initialize_logging=False)
+
+# float16で保持する場合に、float32へ変換しながら積を計算する行数
+_FLOAT16_BLOCK_ROWS = 4096
+
+
+class NumpyVectorIndex:
+    """
+    Chromaのベクトルストアと同じ検索インターフェースを持つメモリ上の厳密検索インデックス
+    
+    RecipeSearchEngine が使用する embeddings / similarity_search_by_vector に加えて、
+    複数クエリをまとめて検索する similarity_search_by_vectors を提供する。
+    距離はChromaのコレクション設定（hnsw:space の l2 / ip / cosine）に合わせる。
+    """
+    
+    def __init__(
+        self,
+        ids: Sequence[str],
+        embeddings: Any,
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        documents: Sequence[Optional[str]],
+        embedding_function: Embeddings,
+        space: str = "l2",
+        dtype: str = "float32"
+    ):
+        """
+        初期化
+        
+        Args:
+            ids: レコードID
+            embeddings: 埋め込みベクトル（件数×次元）
+            metadatas: メタデータ
+            documents: 文書（page_content）
+            embedding_function: クエリの埋め込み関数
+            space: 距離（"l2", "ip", "cosine"）
+            dtype: 行列の型（"float32" または "float16"）
+        """
+        if space not in ("l2", "ip", "cosine"):
+            raise ValueError(f"Unsupported distance space: {space}")
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        
+        self.ids = list(ids)
+        self.metadatas = [metadata or {} for metadata in metadatas]
+        self.documents = [document or "" for document in documents]
+        self.embedding_function = embedding_function
+        self.space = space
+        
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = matrix.reshape(len(self.ids), 0)
+        if space == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1.0, norms)
+        # l2: |q - x|^2 = |q|^2 - 2q・x + |x|^2 のうち、順位に関係する |x|^2 を事前計算
+        self.squared_norms = np.einsum("ij,ij->i", matrix, matrix) if space == "l2" else None
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float16 if dtype == "float16" else np.float32)
+    
+    @classmethod
+    def from_chroma(cls, vectorstore: Any, dtype: str = "float32") -> "NumpyVectorIndex":
+        """Chromaのベクトルストア（永続ディレクトリ）から全件を読み込んで構築"""
+        start = time.perf_counter()
+        data = vectorstore.get(include=["embeddings", "metadatas", "documents"])
+        collection_metadata = getattr(vectorstore._collection, "metadata", None) or {}
+        index = cls(
+            ids=data["ids"],
+            embeddings=data["embeddings"] if data.get("embeddings") is not None else [],
+            metadatas=data.get("metadatas") or [None] * len(data["ids"]),
+            documents=data.get("documents") or [None] * len(data["ids"]),
+            embedding_function=vectorstore.embeddings,
+            space=collection_metadata.get("hnsw:space", "l2"),
+            dtype=dtype
+        )
+        logger.info(
+            f"✅ [RAG] Loaded {len(index)} vectors into memory "
+            f"({index.matrix.nbytes / 1024 / 1024:.1f} MiB, {dtype}, {index.space}) in {time.perf_counter() - start:.2f}s"
+        )
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def embeddings(self) -> Embeddings:
+        """クエリの埋め込み関数（Chromaと同じ属性名）"""
+        return self.embedding_function
+    
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """クエリ×全件の類似度（大きいほど近い）"""
+        if queries.shape[1] != self.matrix.shape[1]:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match index dimension {self.matrix.shape[1]}")
+        
+        if self.space == "cosine":
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms == 0, 1.0, norms)
+        
+        if self.matrix.dtype == np.float32:
+            products = queries @ self.matrix.T
+        else:
+            # float16はBLASを使えないため、ブロックごとにfloat32へ変換して計算
+            products = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+            for start in range(0, len(self), _FLOAT16_BLOCK_ROWS):
+                block = self.matrix[start:start + _FLOAT16_BLOCK_ROWS].astype(np.float32)
+                products[:, start:start + len(block)] = queries @ block.T
+        
+        if self.space == "l2":
+            return 2.0 * products - self.squared_norms
+        return products
+    
+    def similarity_search_by_vectors(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: Union[int, Sequence[int]] = 4
+    ) -> List[List[Document]]:
+        """
+        複数クエリをまとめて検索（1回の行列積）
+        
+        Args:
+            embeddings: クエリの埋め込みベクトルのリスト
+            k: 各クエリの取得件数（クエリごとに指定する場合はリスト）
+        
+        Returns:
+            クエリごとの検索結果（近い順）
+        """
+        ks = [k] * len(embeddings) if isinstance(k, int) else list(k)
+        if len(embeddings) == 0 or len(self) == 0:
+            return [[] for _ in ks]
+        
+        scores = self._scores(np.asarray(embeddings, dtype=np.float32))
+        results = []
+        for row, count in zip(scores, ks):
+            count = min(count, len(self))
+            if count <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-row, count - 1)[:count]
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append([
+                Document(page_content=self.documents[index], metadata=self.metadatas[index])
+                for index in top
+            ])
+        return results
+    
+    def similarity_search_by_vector(self, embedding: Sequence[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        """埋め込みベクトルで検索（Chromaと同じインターフェース）"""
+        return self.similarity_search_by_vectors([embedding], k)[0]
+    
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """テキストで検索（Chromaと同じインターフェース）"""
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k)
@@ -0,0 +1,268 @@
+"""
+Morizo AI v2 - MCP Session Pool
+
+This module provides a pool of long-lived FastMCP client sessions per MCP server.
+"""
+
+import asyncio
+import importlib
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from config.loggers import GenericLogger
+
+# .envファイルを読み込み
+load_dotenv()
+
+
+class MCPSessionPool:
+    """
+    MCPサーバー1つ分のセッションプール
+
+    接続済みのFastMCPクライアントをN個まで保持し、
+    ツール呼び出しごとに貸し出し・返却する。
+    サーバープロセスを起動したまま再利用するため、
+    RAGのベクトルストア等のウォーム状態が呼び出し間で維持される。
+
+    transport:
+        "stdio": サーバーファイルを子プロセスとして起動しstdioで接続
+        "inprocess": サーバーモジュールのFastMCPアプリをAPIプロセス内に読み込み、
+                     インメモリで接続（プロセス間通信を経由しない）
+    """
+
+    TRANSPORTS = ("stdio", "inprocess")
+
+    def __init__(
+        self,
+        server_name: str,
+        server_path: str,
+        transport: str = "stdio",
+        size: int = 2,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 60.0
+    ):
+        self.server_name = server_name
+        self.server_path = server_path
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"Unknown MCP transport for {server_name}: {transport}")
+        self.transport = transport
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.logger = GenericLogger("mcp", "session_pool")
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+        # 貸し出し枠（貸し出し中のセッション数の上限）。返却・破棄のどちらでも枠を戻し、待機中の呼び出しを起こす
+        self._slots = asyncio.Semaphore(self.size)
+        self._last_used: Dict[int, float] = {}
+        self._closed = False
+
+    def _create_transport(self):
+        """設定されたトランスポートを生成"""
+        from fastmcp.client.transports import FastMCPTransport, PythonStdioTransport
+
+        if self.transport == "inprocess":
+            # "mcp_servers/inventory_mcp.py" → "mcp_servers.inventory_mcp" の `mcp` を直接マウント
+            module_name = os.path.splitext(self.server_path)[0].replace("/", ".")
+            server_module = importlib.import_module(module_name)
+            return FastMCPTransport(server_module.mcp)
+
+        return PythonStdioTransport(self.server_path)
+
+    async def _create_session(self):
+        """新しいセッションを起動して接続"""
+        from fastmcp.client import Client
+
+        client = Client(self._create_transport())
+        await client.__aenter__()
+        self._last_used[id(client)] = time.monotonic()
+        self.logger.info(f"🔧 [MCP] Warm session started for {self.server_name} ({self.transport})")
+        return client
+
+    async def _discard_session(self, client) -> None:
+        """セッションを破棄（サーバープロセスも終了）"""
+        self._last_used.pop(id(client), None)
+        try:
+            await client.close()
+        except Exception as e:
+            self.logger.warning(f"⚠️ [MCP] Error while closing session for {self.server_name}: {e}")
+
+    async def _is_healthy(self, client) -> bool:
+        """セッションの死活確認（一定時間未使用の場合のみping）"""
+        if not client.is_connected():
+            return False
+
+        idle_seconds = time.monotonic() - self._last_used.get(id(client), 0.0)
+        if idle_seconds < self.health_check_interval:
+            return True
+
+        try:
+            return await asyncio.wait_for(client.ping(), timeout=5.0)
+        except Exception as e:
+            self.logger.warning(f"⚠️ [MCP] Health check failed for {self.server_name}: {e}")
+            return False
+
+    async def acquire(self):
+        """セッションを貸し出す（空きがなければ返却・破棄を待つ）"""
+        if self._closed:
+            raise RuntimeError(f"Session pool for {self.server_name} is closed")
+
+        # 枠を確保してから、待機中のセッションを使うか新規起動する
+        # （待機中のセッション + 貸し出し中のセッションは常にsize以下）
+        await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        try:
+            if self._closed:
+                raise RuntimeError(f"Session pool for {self.server_name} is closed")
+
+            client = None
+            if not self._idle.empty():
+                client = self._idle.get_nowait()
+                if not await self._is_healthy(client):
+                    self.logger.warning(f"⚠️ [MCP] Restarting unhealthy session for {self.server_name}")
+                    await self._discard_session(client)
+                    self._created -= 1
+                    client = None
+
+            if client is None:
+                self._created += 1
+                try:
+                    client = await self._create_session()
+                except BaseException:
+                    self._created -= 1
+                    raise
+
+            return client
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, client, discard: bool = False) -> None:
+        """セッションを返却（discard=Trueの場合は破棄して枠を空ける）"""
+        try:
+            if discard or self._closed:
+                await self._discard_session(client)
+                self._created -= 1
+                if discard:
+                    self.logger.warning(f"⚠️ [MCP] Session discarded for {self.server_name}")
+                return
+
+            self._last_used[id(client)] = time.monotonic()
+            self._idle.put_nowait(client)
+        finally:
+            # 破棄した場合も枠を戻し、待機中の呼び出しが新しいセッションを起動できるようにする
+            self._slots.release()
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        セッションを貸し出すコンテキストマネージャ
+
+        ツール自体のエラー（ToolError）ではセッションを維持し、
+        通信断などそれ以外の例外ではセッションを破棄して次回再起動する。
+        呼び出し側のキャンセル（並行タスクの中断など）では、接続が切れていない限り維持する。
+        """
+        from fastmcp.exceptions import ToolError
+
+        client = await self.acquire()
+        discard = False
+        try:
+            yield client
+        except ToolError:
+            raise
+        except asyncio.CancelledError:
+            discard = not client.is_connected()
+            raise
+        except BaseException:
+            discard = True
+            raise
+        finally:
+            await self.release(client, discard=discard)
+
+    async def close(self) -> None:
+        """プール内の全セッションを終了"""
+        self._closed = True
+        while not self._idle.empty():
+            client = self._idle.get_nowait()
+            await self._discard_session(client)
+            self._created -= 1
+        self.logger.info(f"🔧 [MCP] Session pool closed for {self.server_name}")
+
+
+# プロセス内で共有するセッションプール（サーバー名 → プール）
+_session_pools: Dict[str, MCPSessionPool] = {}
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_logger = GenericLogger("mcp", "session_pool")
+
+
+async def _close_pools(pools: List[MCPSessionPool]) -> None:
+    """プールのリストを終了"""
+    for pool in pools:
+        await pool.close()
+
+
+def _retire_session_pools(pools: List[MCPSessionPool], loop: asyncio.AbstractEventLoop) -> None:
+    """
+    別のイベントループに紐づくプールを、そのループ上で終了（サーバープロセスを残さない）
+
+    セッションの接続タスクは作成時のループでしか動かないため、
+    実行中のループには終了処理を投入し、停止中のループは別スレッドで回して終了する。
+    終了済みのループ（asyncio.run 等）では、終了時に接続タスクがキャンセル済み。
+    """
+    if not pools:
+        return
+
+    names = ", ".join(pool.server_name for pool in pools)
+    if loop.is_closed():
+        _logger.info(f"🔧 [MCP] Dropped session pools of a closed event loop: {names}")
+    elif loop.is_running():
+        _logger.info(f"🔧 [MCP] Closing session pools on their previous event loop: {names}")
+        asyncio.run_coroutine_threadsafe(_close_pools(pools), loop)
+    else:
+        _logger.info(f"🔧 [MCP] Closing session pools of a stopped event loop: {names}")
+        threading.Thread(
+            target=loop.run_until_complete,
+            args=(_close_pools(pools),),
+            name="mcp-session-pool-close"
+        ).start()
+
+
+def get_session_pool(server_name: str, server_path: str, transport: str = "stdio") -> MCPSessionPool:
+    """
+    サーバー名に対応するセッションプールを取得
+
+    プールはイベントループに紐づくため、ループが変わった場合は作り直す。
+    """
+    global _pool_loop
+
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop:
+        if _pool_loop is not None:
+            _retire_session_pools(list(_session_pools.values()), _pool_loop)
+        _session_pools.clear()
+        _pool_loop = loop
+
+    if server_name not in _session_pools:
+        _session_pools[server_name] = MCPSessionPool(
+            server_name,
+            server_path,
+            transport=transport,
+            size=int(os.getenv("MCP_POOL_SIZE", "2")),
+            health_check_interval=float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "30")),
+            acquire_timeout=float(os.getenv("MCP_POOL_ACQUIRE_TIMEOUT", "60"))
+        )
+
+    return _session_pools[server_name]
+
+
+async def close_session_pools() -> None:
+    """全サーバーのセッションプールを終了"""
+    for pool in list(_session_pools.values()):
+        await pool.close()
+    _session_pools.clear()
@@ -0,0 +1,198 @@
+"""
+Morizo AI v2 - Supabase Client Pool
+
+This module provides one pooled HTTP transport per process for Supabase
+(PostgREST) access, and cheap per-request client views carrying the user's JWT.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from postgrest import SyncPostgrestClient
+from supabase_auth import SyncGoTrueClient
+
+from config.loggers import GenericLogger
+
+# .envファイルを読み込み
+load_dotenv()
+
+
+class SupabaseRequestClient:
+    """
+    リクエスト単位のSupabaseクライアントビュー
+
+    プロセス共有のHTTPクライアント（接続プール）を使い、ヘッダーだけを
+    リクエストごとに持つ。CRUDクラスが使用する table()/from_()/rpc() を提供する。
+    """
+
+    def __init__(self, rest_url: str, headers: Dict[str, str], http_client: httpx.Client):
+        self.postgrest = SyncPostgrestClient(rest_url, headers=headers, http_client=http_client)
+
+    def table(self, table_name: str):
+        """テーブル操作のクエリビルダーを取得（supabase.Client.table と同じ）"""
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        """テーブル操作のクエリビルダーを取得（supabase.Client.from_ と同じ）"""
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: Optional[Dict[Any, Any]] = None, count=None, head: bool = False, get: bool = False):
+        """ストアドファンクションを呼び出すクエリビルダーを取得（supabase.Client.rpc と同じ）"""
+        return self.postgrest.rpc(fn, params or {}, count, head, get)
+
+
+class SupabaseClientPool:
+    """
+    プロセス共有のSupabase接続プール
+
+    httpx.Client を1つだけ保持し（keep-alive、h2がインストールされていればHTTP/2）、
+    同時接続数に上限を設ける。ユーザーのJWTは get_client() が返すビューの
+    ヘッダーにのみ設定するため、リクエスト間で認証情報が混ざらない。
+    接続確立回数を計測し、接続の再利用率を get_stats() で返す。
+    """
+
+    def __init__(self):
+        self.logger = GenericLogger("mcp", "supabase_pool", initialize_logging=False)
+        self.supabase_url = os.getenv("SUPABASE_URL")
+        self.supabase_key = os.getenv("SUPABASE_KEY")
+        self.max_connections = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+        self.max_keepalive_connections = int(os.getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.keepalive_expiry = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+        self.timeout = float(os.getenv("SUPABASE_TIMEOUT", "120"))
+        self.http2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true" and self._h2_available()
+
+        self._http_client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self.stats = {"clients": 0, "requests": 0, "connections": 0}
+
+    @staticmethod
+    def _h2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """httpcoreのトレースフック（新規接続の確立を計測）"""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.stats["connections"] += 1
+
+    def _on_request(self, request: httpx.Request) -> None:
+        """リクエストフック（リクエスト数の計測とトレースフックの設定）"""
+        with self._lock:
+            self.stats["requests"] += 1
+        request.extensions["trace"] = self._trace
+
+    def _get_http_client(self) -> httpx.Client:
+        """共有HTTPクライアントを取得（初回呼び出し時に生成）"""
+        if self._http_client is None:
+            with self._lock:
+                if self._http_client is None:
+                    self._http_client = httpx.Client(
+                        http2=self.http2,
+                        timeout=self.timeout,
+                        follow_redirects=True,
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                            keepalive_expiry=self.keepalive_expiry
+                        ),
+                        event_hooks={"request": [self._on_request]}
+                    )
+                    self.logger.info(
+                        f"✅ [SupabasePool] HTTP transport initialized "
+                        f"(http2={self.http2}, max_connections={self.max_connections})"
+                    )
+        return self._http_client
+
+    def get_client(self, token: Optional[str] = None) -> SupabaseRequestClient:
+        """
+        ユーザーのJWTを設定したクライアントビューを取得
+
+        Args:
+            token: 認証トークン（省略時はSUPABASE_KEYの権限でアクセス）
+
+        Returns:
+            SupabaseRequestClient
+
+        Raises:
+            ValueError: 必要な環境変数が設定されていない場合
+        """
+        if not all([self.supabase_url, self.supabase_key]):
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY are required")
+
+        headers = {
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {token or self.supabase_key}",
+        }
+        with self._lock:
+            self.stats["clients"] += 1
+        return SupabaseRequestClient(
+            f"{self.supabase_url.rstrip('/')}/rest/v1", headers, self._get_http_client()
+        )
+
+    def get_auth_client(self) -> SyncGoTrueClient:
+        """
+        認証（GoTrue）APIのクライアントを呼び出しごとに生成
+
+        refresh_session() などはクライアントにセッションを保存するため、共有の
+        Supabaseクライアントではなく使い捨てのクライアントで呼び出す（HTTP接続はプールを共有）。
+
+        Returns:
+            セッションを永続化・自動更新しないSyncGoTrueClient
+
+        Raises:
+            ValueError: 必要な環境変数が設定されていない場合
+        """
+        if not all([self.supabase_url, self.supabase_key]):
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY are required")
+
+        return SyncGoTrueClient(
+            url=f"{self.supabase_url.rstrip('/')}/auth/v1",
+            headers={"apikey": self.supabase_key, "Authorization": f"Bearer {self.supabase_key}"},
+            auto_refresh_token=False,
+            persist_session=False,
+            http_client=self._get_http_client()
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """接続プールの統計（reuse_rate = 既存接続で処理したリクエストの割合）"""
+        with self._lock:
+            stats = dict(self.stats)
+        requests = stats["requests"]
+        stats["reuse_rate"] = round(1 - stats["connections"] / requests, 3) if requests else 0.0
+        stats["http2"] = self.http2
+        stats["max_connections"] = self.max_connections
+        return stats
+
+    def close(self) -> None:
+        """共有HTTPクライアントを閉じる（アプリケーション終了時）"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+
+_pool: Optional[SupabaseClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_supabase_pool() -> SupabaseClientPool:
+    """プロセス共有のSupabase接続プールを取得"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SupabaseClientPool()
+    return _pool
+
+
+def close_supabase_pool() -> None:
+    """プロセス共有のSupabase接続プールを閉じる"""
+    if _pool is not None:
+        _pool.close()
@@ -0,0 +1,298 @@
+"""
+Morizo AI v2 - Token Verifier
+
+This module provides a shared bearer-token verification layer with local JWT
+validation and a TTL cache, used by both the API layer and the MCP client.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+from dotenv import load_dotenv
+from supabase import Client, AuthApiError
+
+from config.clients import get_supabase_client
+from config.loggers import GenericLogger
+
+# .envファイルを読み込み
+load_dotenv()
+
+# JWKS（非対称鍵）で受け付ける署名アルゴリズム（ヘッダーのalgは信頼せず、この一覧とJWKのalgで固定）
+_JWKS_ALGORITHMS = ("RS256", "ES256")
+
+
+class _Undecided(Exception):
+    """ローカル検証で判定できない場合（リモート検証にフォールバック）"""
+    pass
+
+
+class _SigningKeyNotCached(Exception):
+    """JWKSの署名鍵がメモリ上にない場合（スレッドで取得してから再検証）"""
+    pass
+
+
+class TokenVerifier:
+    """
+    トークン検証クラス（ローカルJWT検証 + TTLキャッシュ）
+
+    検証順序:
+        1. キャッシュ（トークンのSHA-256ハッシュをキーに、無効トークンも短時間キャッシュ）
+        2. ローカルJWT検証（SUPABASE_JWT_SECRETによるHS256、またはJWKSによる非対称鍵）
+        3. Supabaseの auth.get_user(token)（ローカルで判定できない場合のみ）
+    """
+
+    def __init__(self):
+        self.logger = GenericLogger("mcp", "token_verifier")
+
+        self.supabase_url = os.getenv("SUPABASE_URL")
+        self.supabase_key = os.getenv("SUPABASE_KEY")
+        self.jwt_secret = os.getenv("SUPABASE_JWT_SECRET")
+        self.jwt_audience = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+        self.use_jwks = os.getenv("SUPABASE_JWT_USE_JWKS", "true").lower() == "true"
+
+        self.cache_ttl = float(os.getenv("AUTH_CACHE_TTL", "300"))
+        self.negative_cache_ttl = float(os.getenv("AUTH_NEGATIVE_CACHE_TTL", "30"))
+        self.cache_max_size = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+
+        # ハッシュ → (有効期限, ユーザー情報 or None)
+        self._cache: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._jwks_client: Optional[jwt.PyJWKClient] = None
+        # JWKSの署名鍵（kid → (有効期限, 鍵)）。取得（HTTP）はイベントループ外で行い、検証時はここから参照する
+        self.jwks_cache_ttl = float(os.getenv("SUPABASE_JWKS_CACHE_TTL", "300"))
+        self._signing_keys: Dict[Optional[str], Tuple[float, Any]] = {}
+        self._supabase: Optional[Client] = None
+
+        self.stats = {"hits": 0, "misses": 0, "local": 0, "remote": 0}
+
+    # --- キャッシュ ---
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, user_info = entry
+        if expires_at <= time.monotonic():
+            self._cache.pop(key, None)
+            return False, None
+
+        self._cache.move_to_end(key)
+        return True, user_info
+
+    def _cache_set(self, key: str, user_info: Optional[Dict[str, Any]], token_exp: Optional[float] = None) -> None:
+        ttl = self.cache_ttl if user_info else self.negative_cache_ttl
+        if token_exp is not None:
+            # トークン自体の有効期限を超えてキャッシュしない
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        self._cache[key] = (time.monotonic() + ttl, user_info)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_size:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        """キャッシュからトークンを削除（ログアウト時など）"""
+        self._cache.pop(self._token_key(token), None)
+
+    # --- 検証 ---
+
+    def _get_jwks_client(self) -> Optional[jwt.PyJWKClient]:
+        if self._jwks_client is None and self.use_jwks and self.supabase_url:
+            jwks_url = f"{self.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+            self._jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True)
+        return self._jwks_client
+
+    def _fetch_signing_key(self, token: str) -> jwt.PyJWK:
+        """
+        JWKSから署名鍵（JWK）を取得してメモリに保持（HTTP呼び出しを伴うため同期・スレッドで実行）
+
+        Raises:
+            _Undecided: JWKSが未設定、または鍵を取得できない場合
+        """
+        jwks_client = self._get_jwks_client()
+        if jwks_client is None:
+            raise _Undecided("JWKS not configured")
+        try:
+            key = jwks_client.get_signing_key_from_jwt(token)
+        except jwt.PyJWTError as e:
+            raise _Undecided(str(e))
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        self._signing_keys[kid] = (time.monotonic() + self.jwks_cache_ttl, key)
+        return key
+
+    def _cached_signing_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """メモリ上の署名鍵を取得（未取得・期限切れはNone）"""
+        entry = self._signing_keys.get(kid)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def _verify_local(self, token: str, signing_key: Optional[jwt.PyJWK] = None) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """
+        JWTの署名と有効期限をローカルで検証（ネットワーク呼び出しなし）
+
+        署名アルゴリズムはヘッダーのalgではなく、共有シークレットはHS256、
+        JWKSの鍵はJWKのアルゴリズム（_JWKS_ALGORITHMS のいずれか）に固定する。
+
+        Args:
+            token: JWT
+            signing_key: 取得済みの署名鍵（非対称鍵の場合。省略時はメモリ上の鍵を使用）
+
+        Returns:
+            (ユーザー情報 or None, トークンの有効期限(epoch秒))
+
+        Raises:
+            _Undecided: 検証鍵がなくローカルで判定できない場合
+            _SigningKeyNotCached: 署名鍵をJWKSから取得する必要がある場合
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            return None, None
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                raise _Undecided("SUPABASE_JWT_SECRET not set")
+            key = self.jwt_secret
+        elif algorithm in _JWKS_ALGORITHMS:
+            if self._get_jwks_client() is None:
+                raise _Undecided("JWKS not configured")
+            jwk = signing_key if signing_key is not None else self._cached_signing_key(header.get("kid"))
+            if jwk is None:
+                raise _SigningKeyNotCached(header.get("kid"))
+            if jwk.algorithm_name != algorithm:
+                self.logger.warning(f"⚠️ [Auth] JWT alg {algorithm} does not match signing key alg {jwk.algorithm_name}")
+                return None, None
+            key = jwk.key
+        else:
+            self.logger.warning(f"⚠️ [Auth] Unsupported JWT alg: {algorithm}")
+            return None, None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.jwt_audience,
+                options={"require": ["exp", "sub"]}
+            )
+        except jwt.PyJWTError as e:
+            self.logger.warning(f"⚠️ [Auth] Local JWT validation failed: {e}")
+            return None, None
+
+        user_info = {
+            "user_id": claims["sub"],
+            "email": claims.get("email"),
+            "created_at": None,
+            "last_sign_in": None
+        }
+        return user_info, float(claims["exp"])
+
+    def _get_supabase_client(self) -> Client:
+        if self._supabase is None:
+            self._supabase = get_supabase_client()
+            if self._supabase is None:
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY are required")
+        return self._supabase
+
+    def _verify_remote(self, token: str) -> Optional[Dict[str, Any]]:
+        """Supabaseでトークンを検証（同期）"""
+        try:
+            response = self._get_supabase_client().auth.get_user(token)
+        except AuthApiError as e:
+            # 401/403は無効トークンとして確定（ネガティブキャッシュ対象）、それ以外は再送出
+            if getattr(e, "status", None) in (401, 403):
+                return None
+            raise
+        if not response or not response.user:
+            return None
+
+        return {
+            "user_id": response.user.id,
+            "email": response.user.email,
+            "created_at": response.user.created_at,
+            "last_sign_in": response.user.last_sign_in_at
+        }
+
+    def _lookup(self, token: str) -> Tuple[bool, Optional[Dict[str, Any]], str]:
+        key = self._token_key(token)
+        hit, user_info = self._cache_get(key)
+        if hit:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+        return hit, user_info, key
+
+    async def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """トークンを検証してユーザー情報を取得（無効な場合はNone）"""
+        if not token or not token.strip():
+            return None
+
+        hit, user_info, key = self._lookup(token)
+        if hit:
+            return user_info
+
+        try:
+            try:
+                user_info, token_exp = self._verify_local(token)
+            except _SigningKeyNotCached:
+                # JWKSの取得（HTTP）はスレッドで行い、イベントループではメモリ上の検証のみ行う
+                signing_key = await asyncio.to_thread(self._fetch_signing_key, token)
+                user_info, token_exp = self._verify_local(token, signing_key)
+            self.stats["local"] += 1
+        except _Undecided:
+            # ブロッキングなHTTP呼び出しはスレッドに逃がす（ネットワークエラーはキャッシュしない）
+            user_info = await asyncio.to_thread(self._verify_remote, token)
+            token_exp = None
+            self.stats["remote"] += 1
+
+        self._cache_set(key, user_info, token_exp)
+        return user_info
+
+    def verify_sync(self, token: str) -> Optional[Dict[str, Any]]:
+        """トークンを検証してユーザー情報を取得（同期版）"""
+        if not token or not token.strip():
+            return None
+
+        hit, user_info, key = self._lookup(token)
+        if hit:
+            return user_info
+
+        try:
+            try:
+                user_info, token_exp = self._verify_local(token)
+            except _SigningKeyNotCached:
+                user_info, token_exp = self._verify_local(token, self._fetch_signing_key(token))
+            self.stats["local"] += 1
+        except _Undecided:
+            user_info = self._verify_remote(token)
+            token_exp = None
+            self.stats["remote"] += 1
+
+        self._cache_set(key, user_info, token_exp)
+        return user_info
+
+
+# グローバルトークン検証インスタンス
+_token_verifier: Optional[TokenVerifier] = None
+
+
+def get_token_verifier() -> TokenVerifier:
+    """トークン検証のシングルトン取得"""
+    global _token_verifier
+    if _token_verifier is None:
+        _token_verifier = TokenVerifier()
+    return _token_verifier
@@ -4,39 +4,106 @@ Morizo AI v2 - MCP Common Utilities
 This module provides common utilities for MCP servers.
 """
 
+import asyncio
 import os
-from typing import Optional
-from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from mcp_servers.supabase_pool import SupabaseRequestClient, get_supabase_pool
 
 # 環境変数の読み込み
 load_dotenv()
 
+# DBアクセス用スレッドプール（supabase-pyの同期I/Oをイベントループ外で実行）
+_db_executor: Optional[ThreadPoolExecutor] = None
 
-def get_authenticated_client(user_id: str, token: Optional[str] = None) -> Client:
+
+def get_authenticated_client(user_id: str, token: Optional[str] = None) -> SupabaseRequestClient:
     """
     認証済みのSupabaseクライアントを取得
     
+    プロセス共有の接続プールを使うリクエスト単位のビューを返す
+    （呼び出しごとにクライアント・HTTPセッションを生成しない）。
+    
     Args:
         user_id: ユーザーID（認証はAPI層で完了済み）
         token: 認証トークン（オプション）
     
     Returns:
-        Supabaseクライアント
+        Supabaseクライアント（table()/rpc() を提供）
         
     Raises:
         ValueError: 必要な環境変数が設定されていない場合
     """
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_KEY')
+    # トークンの検証はAPI層（TokenVerifier）で完了済みのため、JWTはヘッダーに設定するのみ
+    return get_supabase_pool().get_client(token)
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    """DBアクセス用の上限付きスレッドプールを取得（初回呼び出し時に生成）"""
+    global _db_executor
+    if _db_executor is None:
+        max_workers = int(os.getenv("DB_MAX_WORKERS", "16"))
+        _db_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+    return _db_executor
+
+
+async def execute_query(query: Any) -> Any:
+    """
+    Supabaseクエリをイベントループをブロックせずに実行
+    
+    supabase-pyの同期クエリ（query.execute()）を上限付きスレッドプールで実行し、
+    DBの往復待ちの間も他のリクエストの処理を進められるようにする。
+    
+    Args:
+        query: 実行するクエリビルダー（client.table(...).select(...) 等）
+    
+    Returns:
+        query.execute() の戻り値（APIResponse）
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_db_executor(), query.execute)
+
+
+async def insert_bisecting(
+    client: Any,
+    table: str,
+    data_list: List[Dict[str, Any]]
+) -> Tuple[List[Optional[Dict[str, Any]]], Dict[int, str]]:
+    """
+    複数行を1回のinsertで挿入し、失敗した場合は二分割して再帰的に挿入
+    
+    1回の insert は全件成功か全件失敗のため、失敗したチャンク（例外）を半分ずつ
+    再挿入すれば不正な行 k 件を約 k*log2(N) 回の問い合わせで特定できる。
+    insert が成功して返却行が少ない場合（RLSで挿入後の行が見えないなど）は
+    再挿入すると行が重複するため、全件成功・返却されなかった行はNoneとして扱う。
     
-    if not all([supabase_url, supabase_key]):
-        raise ValueError("SUPABASE_URL and SUPABASE_KEY are required")
+    Args:
+        client: Supabaseクライアント
+        table: テーブル名
+        data_list: 挿入する行のリスト
     
-    client = create_client(supabase_url, supabase_key)
+    Returns:
+        (data_listと同じ順序の挿入結果（失敗した行・返却されなかった行はNone）, 失敗した行のインデックス → エラーメッセージ)
+    """
+    if not data_list:
+        return [], {}
     
-    # 認証トークンが提供されている場合はセッションを設定
-    if token:
-        client.auth.set_session(token, "")
+    try:
+        result = await execute_query(client.table(table).insert(data_list))
+    except Exception as e:
+        if len(data_list) == 1:
+            return [None], {0: str(e)}
+    else:
+        rows = list(result.data or [])
+        if len(rows) == len(data_list):
+            return rows, {}
+        # 挿入は成功しているが返却行と入力行の対応が分からないため、IDは不明として扱う
+        return [None] * len(data_list), {}
     
-    return client
+    middle = len(data_list) // 2
+    left_rows, left_errors = await insert_bisecting(client, table, data_list[:middle])
+    right_rows, right_errors = await insert_bisecting(client, table, data_list[middle:])
+    errors = dict(left_errors)
+    errors.update({middle + index: error for index, error in right_errors.items()})
+    return left_rows + right_rows, errors
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+CRUD層のホットパスの負荷試験（スループット・レイテンシ分位点）
+
+scripts/local_supabase.py のスタンドインをインプロセスで起動し、
+CRUD層の主要な処理を指定した並行度で繰り返し実行して、
+操作ごとのスループットと p50 / p95 / p99 レイテンシを表示します。
+遅延・データ・乱数シードを固定するため、同じ引数であれば同じ条件で再計測できます。
+
+使用方法:
+    python scripts/benchmark_crud_hot_paths.py [--concurrency 16] [--iterations 50]
+        [--latency-ms 5] [--jitter-ms 2] [--tail-rate 0.01 --tail-ms 100]
+        [--items 200] [--histories 300] [--no-rpc] [--only inventory_list,history_by_date]
+
+Supabaseへの接続は不要です。--no-rpc を指定するとRPC関数が未作成の状態になり、
+フォールバック経路を計測します。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from local_supabase import LOCAL_ANON_KEY, LocalSupabase, generate_fixtures
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """昇順リストの分位点（最近傍法）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def measure(operation: Callable[[int, int], Awaitable[Any]], concurrency: int, iterations: int) -> Dict[str, float]:
+    """concurrency個のワーカーでiterations回ずつ実行して統計を返す"""
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        for iteration in range(iterations):
+            start = time.perf_counter()
+            result = await operation(worker_id, iteration)
+            latencies.append(time.perf_counter() - start)
+            if isinstance(result, dict) and not result.get("success", True):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def build_operations(server: LocalSupabase, emails: List[str]) -> Dict[str, Callable[[int, int], Awaitable[Any]]]:
+    """計測する操作（ワーカーごとに別ユーザーを割り当て、RLS・行数を分離）"""
+    from mcp_servers.inventory_crud import InventoryCRUD
+    from mcp_servers.ocr_mapping_crud import OCRMappingCRUD
+    from mcp_servers.recipe_history_crud import RecipeHistoryCRUD
+    from mcp_servers.token_verifier import TokenVerifier
+    from mcp_servers.utils import get_authenticated_client
+
+    users = [(server.user_id(email), server.issue_token(server.user_id(email), email)) for email in emails]
+    inventory = InventoryCRUD()
+    histories = RecipeHistoryCRUD()
+    mappings = OCRMappingCRUD()
+    # ローカル検証鍵なし・キャッシュなしで auth.get_user を毎回呼ぶ
+    verifier = TokenVerifier()
+    verifier.jwt_secret = None
+    verifier.use_jwks = False
+    verifier.cache_ttl = 0
+    verifier.negative_cache_ttl = 0
+
+    def user(worker_id: int):
+        user_id, token = users[worker_id % len(users)]
+        return user_id, get_authenticated_client(user_id, token)
+
+    async def inventory_list(worker_id: int, iteration: int):
+        user_id, client = user(worker_id)
+        return await inventory.get_all_items(client, user_id)
+
+    async def inventory_names(worker_id: int, iteration: int):
+        user_id, client = user(worker_id)
+        return await inventory.get_all_items(client, user_id, fields=["item_name"])
+
+    async def inventory_add_and_consume(worker_id: int, iteration: int):
+        user_id, client = user(worker_id)
+        item_name = f"bench-{worker_id}-{iteration}"
+        added = await inventory.add_items_bulk(client, user_id, [{"item_name": item_name, "quantity": 2}] * 5)
+        found = await inventory.get_items_by_name(client, user_id, item_name, fields=["id"])
+        # 追加した在庫を1件だけ減らし（更新）、残りは使い切る（削除）。削除分で行数の増加を抑える
+        ids = [row["id"] for row in found.get("data", [])]
+        quantities = {item_id: (1 if index == 0 else 0) for index, item_id in enumerate(ids)}
+        result = await inventory.apply_quantity_changes(client, user_id, quantities)
+        return {"success": added.get("success") and len(ids) == 5 and len(result.get("deleted_ids", [])) == 4}
+
+    async def history_by_date(worker_id: int, iteration: int):
+        user_id, client = user(worker_id)
+        return await histories.get_histories_by_date(client, user_id, start="2025-01-01T00:00:00", limit=14)
+
+    async def ocr_mappings(worker_id: int, iteration: int):
+        user_id, client = user(worker_id)
+        # キャッシュを破棄してDBからの読み込みを計測
+        mappings.cache.invalidate(user_id)
+        return await mappings.get_user_mappings(client, user_id)
+
+    async def token_verify(worker_id: int, iteration: int):
+        _, token = users[worker_id % len(users)]
+        user_info = await verifier.verify(token)
+        return {"success": user_info is not None}
+
+    return {
+        "inventory_list": inventory_list,
+        "inventory_names": inventory_names,
+        "inventory_add_and_consume": inventory_add_and_consume,
+        "history_by_date": history_by_date,
+        "ocr_mappings": ocr_mappings,
+        "token_verify": token_verify,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRUD層のホットパスの負荷試験")
+    parser.add_argument("--concurrency", type=int, default=16, help="並行ワーカー数（ワーカーごとに別ユーザー）")
+    parser.add_argument("--iterations", type=int, default=50, help="ワーカーごとの実行回数")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="スタンドインの固定遅延（ミリ秒）")
+    parser.add_argument("--jitter-ms", type=float, default=2.0, help="スタンドインのジッター最大値（ミリ秒）")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="テール遅延を加えるリクエストの割合（0〜1）")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="テール遅延（ミリ秒）")
+    parser.add_argument("--items", type=int, default=200, help="ユーザーごとの在庫数")
+    parser.add_argument("--histories", type=int, default=300, help="ユーザーごとのレシピ履歴数")
+    parser.add_argument("--mappings", type=int, default=100, help="ユーザーごとのOCR変換数")
+    parser.add_argument("--seed", type=int, default=0, help="遅延・データの乱数シード")
+    parser.add_argument("--no-rpc", action="store_true", help="RPC関数なし（フォールバック経路）で計測")
+    parser.add_argument("--only", help="計測する操作（カンマ区切り）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.FileHandler(os.devnull, encoding="utf-8")])
+
+    server = LocalSupabase(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tail_rate=args.tail_rate, tail_ms=args.tail_ms,
+        seed=args.seed, rpc=not args.no_rpc
+    ).start()
+    data, emails = generate_fixtures(args.concurrency, args.items, args.histories, args.mappings, args.seed)
+    server.store.load(data)
+
+    # 計測対象のモジュールが読み込む前に接続先を切り替える
+    os.environ["SUPABASE_URL"] = server.url
+    os.environ["SUPABASE_KEY"] = LOCAL_ANON_KEY
+    os.environ.setdefault("SUPABASE_MAX_CONNECTIONS", str(max(20, args.concurrency)))
+    os.environ.setdefault("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", str(max(20, args.concurrency)))
+
+    operations = build_operations(server, emails)
+    selected = args.only.split(",") if args.only else list(operations)
+
+    print(f"stand-in: {server.url} (rpc={'off' if args.no_rpc else 'on'}, latency {args.latency_ms:.1f} ms + U(0, {args.jitter_ms:.1f}) ms, "
+          f"tail {args.tail_rate:.1%} x {args.tail_ms:.0f} ms)")
+    print(f"workload: {args.concurrency} workers x {args.iterations} iterations, "
+          f"{args.items} items / {args.histories} histories / {args.mappings} mappings per user")
+    print(f"{'operation':<28}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+
+    async def run_all():
+        for name in selected:
+            # ウォームアップ（接続確立）
+            await operations[name](0, -1)
+            stats = await measure(operations[name], args.concurrency, args.iterations)
+            print(f"{name:<28}{stats['throughput']:>10.1f}{stats['p50'] * 1000:>10.1f}"
+                  f"{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}{stats['errors']:>8}")
+
+    asyncio.run(run_all())
+    server.stop()
+    print(f"requests by route: {dict(sorted(server.stats.items()))}")
+
+
+if __name__ == "__main__":
+    main()
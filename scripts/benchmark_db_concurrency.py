@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+DBアクセス層の同時実行ベンチマーク
+
+ローカルに起動したPostgREST互換のスタブサーバー（固定遅延で在庫行を返す）に対して、
+InventoryCRUD.get_all_items を同時に複数実行し、
+従来の実装（async関数内で同期の query.execute() を直接呼ぶ）と
+mcp_servers.utils.execute_query（スレッドプールへのオフロード）の
+所要時間とイベントループの最大停止時間を比較します。
+オフロード側はリクエストごとに get_authenticated_client で共有接続プールの
+ビューを取得し、接続の再利用率も表示します。
+
+使用方法:
+    python scripts/benchmark_db_concurrency.py [--requests 50] [--latency-ms 50]
+
+Supabase/PostgRESTへの接続は不要です（スタブサーバーはこのスクリプト内で起動します）。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from supabase import create_client
+
+from mcp_servers.inventory_crud import InventoryCRUD
+from mcp_servers.supabase_pool import get_supabase_pool
+from mcp_servers.utils import get_authenticated_client
+
+# スタブのダミーキー（PostgRESTスタブは検証しない）
+STUB_KEY = "stub-anon-key"
+
+SAMPLE_ROWS = [
+    {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "user_id": "bench-user",
+        "item_name": name,
+        "quantity": 1,
+        "unit": "個",
+        "storage_location": "冷蔵庫",
+        "expiry_date": None,
+        "created_at": "2025-01-01T00:00:00+00:00",
+    }
+    for i, name in enumerate(["牛乳", "卵", "にんじん", "玉ねぎ", "鶏もも肉"])
+]
+
+
+def start_stub_server(latency: float) -> ThreadingHTTPServer:
+    """PostgREST互換のスタブサーバーを起動（/rest/v1/<table> に固定遅延で応答）"""
+
+    class Handler(BaseHTTPRequestHandler):
+        # keep-aliveを有効にする（HTTP/1.0では応答ごとに切断される）
+        protocol_version = "HTTP/1.1"
+        # ヘッダーと本文の分割送信による遅延ACK待ちを避ける
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = json.dumps(SAMPLE_ROWS).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # 同時接続時にSYNが破棄されないよう待ち行列を広げる
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class LegacyInventoryCRUD:
+    """従来の InventoryCRUD.get_all_items（イベントループ上で同期I/Oを実行）"""
+
+    async def get_all_items(self, client, user_id: str):
+        query = client.table("inventory").select("*").eq("user_id", user_id).order("created_at", desc=True)
+        result = query.execute()
+        return {"success": True, "data": result.data}
+
+
+class PooledInventoryCRUD(InventoryCRUD):
+    """MCPツールと同様に、呼び出しごとに認証済みクライアントを取得"""
+
+    async def get_all_items(self, client, user_id: str, **kwargs):
+        return await super().get_all_items(get_authenticated_client(user_id, STUB_KEY), user_id, **kwargs)
+
+
+async def run(crud, client, requests: int) -> tuple:
+    """同時実行して (所要秒数, イベントループの最大停止秒数) を返す"""
+    max_lag = 0.0
+    stop = asyncio.Event()
+
+    async def monitor():
+        # 1msごとに起床し、予定からの遅れをイベントループの停止時間として計測
+        nonlocal max_lag
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - expected)
+
+    monitor_task = asyncio.create_task(monitor())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(crud.get_all_items(client, "bench-user") for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor_task
+
+    assert all(r["success"] and len(r["data"]) == len(SAMPLE_ROWS) for r in results), results[:1]
+    return elapsed, max_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DBアクセス層の同時実行ベンチマーク")
+    parser.add_argument("--requests", type=int, default=50, help="同時リクエスト数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="スタブサーバーの応答遅延（ミリ秒）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.FileHandler(os.devnull, encoding="utf-8")])
+
+    server = start_stub_server(args.latency_ms / 1000)
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SUPABASE_URL"] = stub_url
+    os.environ["SUPABASE_KEY"] = STUB_KEY
+    client = create_client(stub_url, STUB_KEY)
+
+    # ウォームアップ（接続確立）
+    client.table("inventory").select("*").execute()
+
+    legacy_seconds, legacy_lag = asyncio.run(run(LegacyInventoryCRUD(), client, args.requests))
+    offload_seconds, offload_lag = asyncio.run(run(PooledInventoryCRUD(), None, args.requests))
+    server.shutdown()
+
+    print(f"concurrent requests: {args.requests} (stub latency {args.latency_ms:.0f} ms, DB_MAX_WORKERS={os.getenv('DB_MAX_WORKERS', '16')})")
+    print(f"legacy (blocking execute): {legacy_seconds * 1000:8.1f} ms total, max event-loop stall {legacy_lag * 1000:7.1f} ms")
+    print(f"execute_query (offload):   {offload_seconds * 1000:8.1f} ms total, max event-loop stall {offload_lag * 1000:7.1f} ms")
+    print(f"speedup:                   {legacy_seconds / offload_seconds:8.1f}x")
+    print(f"supabase pool:             {get_supabase_pool().get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+食材マッチングスコア計算のマイクロベンチマーク
+
+合成した在庫（既定50品目）と候補レシピに対して、従来のRecipeSearchEngineの
+_calculate_match_score / _has_main_ingredient_normalized（候補ごと・単語ごとに正規化する
+二重ループの実装）と、mcp_servers.recipe_rag.matching.IngredientMatcher
+（正規化済みトークン + 候補全件の一括計算）の計算時間を比較します。
+両者の出力（スコア・マッチした食材・主要食材判定）が一致することも確認します。
+
+使用方法:
+    python scripts/benchmark_match_scoring.py [--inventory 50] [--candidates 100] [--queries 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp_servers.recipe_rag.matching import IngredientMatcher, normalize_ingredient, tokenize_ingredients
+
+# 合成データ用の食材名（ひらがな・カタカナ・部分一致する表記を含む）
+INGREDIENT_POOL = [
+    "鶏もも肉", "鶏むね肉", "鶏肉", "豚バラ肉", "豚肉", "牛肉", "合いびき肉", "ひき肉", "ベーコン", "ハム",
+    "ウインナー", "鮭", "さば", "サバ", "えび", "エビ", "いか", "たこ", "ツナ缶", "あさり",
+    "たまご", "卵", "豆腐", "厚揚げ", "油揚げ", "納豆", "牛乳", "チーズ", "ヨーグルト", "生クリーム",
+    "たまねぎ", "玉ねぎ", "にんじん", "ニンジン", "じゃがいも", "ジャガイモ", "キャベツ", "はくさい", "白菜", "だいこん",
+    "大根", "ほうれん草", "こまつな", "小松菜", "ブロッコリー", "ピーマン", "なす", "ナス", "きゅうり", "トマト",
+    "ミニトマト", "もやし", "しめじ", "えのき", "しいたけ", "まいたけ", "エリンギ", "ごぼう", "れんこん", "かぼちゃ",
+    "さつまいも", "さといも", "長ねぎ", "青ねぎ", "ニラ", "レタス", "アスパラガス", "オクラ", "ズッキーニ", "パプリカ",
+    "わかめ", "ひじき", "こんにゃく", "春雨", "ごはん", "うどん", "スパゲッティ", "食パン", "コーン", "グリーンピース",
+]
+
+
+class LegacyMatcher:
+    """従来のRecipeSearchEngineのスコア計算（比較用にそのまま保持）"""
+
+    def _has_main_ingredient_normalized(self, main_ingredient, recipe_ingredients, matched_ingredients):
+        """正規化による主要食材判定"""
+        normalized_main = normalize_ingredient(main_ingredient)
+
+        # レシピ食材を正規化してチェック
+        recipe_words = recipe_ingredients.split()
+        for word in recipe_words:
+            normalized_word = normalize_ingredient(word)
+            # 完全一致または部分一致
+            if normalized_main == normalized_word or normalized_main in normalized_word:
+                return True
+
+        # マッチした食材を正規化してチェック
+        for matched in matched_ingredients:
+            if normalized_main in normalize_ingredient(matched):
+                return True
+
+        return False
+
+    def _calculate_match_score(self, recipe_ingredients, normalized_ingredients, main_ingredient=None):
+        """マッチングスコアを計算"""
+        if not recipe_ingredients or not normalized_ingredients:
+            return 0.0, []
+
+        recipe_words = recipe_ingredients.split()
+        matched_count = 0
+        total_inventory = len(normalized_ingredients)
+        matched_items = []
+
+        # 主要食材の重み付け
+        main_ingredient_weight = 5.0  # 主要食材の重み
+
+        for inventory_item in normalized_ingredients:
+            normalized_inventory = normalize_ingredient(inventory_item)
+            is_main_ingredient = main_ingredient and normalize_ingredient(inventory_item) == normalize_ingredient(main_ingredient)
+
+            # 完全マッチ（正規化後）
+            matched = False
+            for word in recipe_words:
+                normalized_word = normalize_ingredient(word)
+                if normalized_inventory == normalized_word:
+                    weight = main_ingredient_weight if is_main_ingredient else 1.0
+                    matched_count += weight
+                    matched_items.append(inventory_item)
+                    matched = True
+                    break
+
+            # 部分マッチ（正規化後）
+            if not matched:
+                for word in recipe_words:
+                    normalized_word = normalize_ingredient(word)
+                    if normalized_inventory in normalized_word or normalized_word in normalized_inventory:
+                        weight = main_ingredient_weight * 0.5 if is_main_ingredient else 0.5
+                        matched_count += weight
+                        matched_items.append(inventory_item)
+                        break
+
+        if main_ingredient and main_ingredient in normalized_ingredients:
+            other_ingredients_count = len(normalized_ingredients) - 1
+            max_possible_score = main_ingredient_weight + other_ingredients_count
+            match_score = matched_count / max_possible_score if max_possible_score > 0 else 0.0
+        else:
+            match_score = matched_count / total_inventory if total_inventory > 0 else 0.0
+
+        return match_score, matched_items
+
+    def score(self, recipes: List[str], inventory: List[str], main_ingredient: str) -> List[Tuple[float, List[str], bool]]:
+        """候補ごとにスコアと主要食材判定を計算"""
+        results = []
+        for recipe_ingredients in recipes:
+            match_score, matched = self._calculate_match_score(recipe_ingredients, inventory, main_ingredient)
+            has_main = bool(main_ingredient) and self._has_main_ingredient_normalized(main_ingredient, recipe_ingredients, matched)
+            results.append((match_score, matched, has_main))
+        return results
+
+
+def build_queries(count: int, inventory_size: int, candidate_count: int, seed: int):
+    """(在庫, 主要食材, 候補レシピの食材文字列) の組を生成"""
+    rng = random.Random(seed)
+    queries = []
+    for index in range(count):
+        inventory = rng.sample(INGREDIENT_POOL, min(inventory_size, len(INGREDIENT_POOL)))
+        main_ingredient = rng.choice(inventory) if index % 2 == 0 else None
+        recipes = [" ".join(rng.sample(INGREDIENT_POOL, rng.randint(3, 10))) for _ in range(candidate_count)]
+        queries.append((inventory, main_ingredient, recipes))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="食材マッチングスコア計算のマイクロベンチマーク")
+    parser.add_argument("--inventory", type=int, default=50, help="在庫の品目数")
+    parser.add_argument("--candidates", type=int, default=100, help="1検索あたりの候補レシピ数（limit*20相当）")
+    parser.add_argument("--queries", type=int, default=200, help="検索回数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+
+    queries = build_queries(args.queries, args.inventory, args.candidates, args.seed)
+    # ベクトルDB構築時に保存するトークン（ingredient_tokens）に相当
+    tokens = [[tokenize_ingredients(recipe) for recipe in recipes] for _, _, recipes in queries]
+
+    # 出力が一致することを確認
+    legacy = LegacyMatcher()
+    for (inventory, main_ingredient, recipes), candidate_tokens in zip(queries, tokens):
+        expected = legacy.score(recipes, inventory, main_ingredient)
+        actual = IngredientMatcher(inventory, main_ingredient).score(candidate_tokens)
+        assert expected == actual, f"mismatch for inventory={inventory} main={main_ingredient}"
+
+    start = time.perf_counter()
+    for inventory, main_ingredient, recipes in queries:
+        legacy.score(recipes, inventory, main_ingredient)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for (inventory, main_ingredient, _), candidate_tokens in zip(queries, tokens):
+        IngredientMatcher(inventory, main_ingredient).score(candidate_tokens)
+    matcher_seconds = time.perf_counter() - start
+
+    print(f"queries: {args.queries} x {args.candidates} candidates, {args.inventory}-item inventory")
+    print(f"legacy nested loops:     {legacy_seconds * 1e3 / args.queries:8.2f} ms/search")
+    print(f"IngredientMatcher:       {matcher_seconds * 1e3 / args.queries:8.2f} ms/search")
+    print(f"speedup:                 {legacy_seconds / matcher_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+パラメータ参照解決のマイクロベンチマーク
+
+合成したタスクプランに対して、従来のTaskExecutor._inject_data（参照文字列を
+タスク実行ごとに解析し、ステップごとにINFOログを出力する実装）と、
+core.param_resolverのコンパイル済み参照式の評価コストを比較します。
+両者の出力が一致することも確認します。
+
+使用方法:
+    python scripts/benchmark_param_resolver.py [--plans 200] [--repeat 20]
+
+ログのフォーマット・出力コストを含めるため、INFOレベルのログを
+os.devnullへ出力するハンドラを設定して計測します。
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.loggers import GenericLogger
+from core.param_resolver import compile_parameters, resolve_parameters
+
+
+class LegacyInjector:
+    """従来のTaskExecutor._inject_data実装（比較用にそのまま保持）"""
+
+    def __init__(self):
+        self.logger = GenericLogger("core", "executor")
+
+    def _inject_data(self, parameters: Dict[str, Any], previous_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Inject data from previous task results into parameters (辞書構造対応版)."""
+        injected = parameters.copy()
+        
+        
+        for key, value in parameters.items():
+            self.logger.info(f"🔍 [EXECUTOR] Processing parameter: key={key}, value={value}, type={type(value)}")
+            
+            # Phase 1F: セッションコンテキスト参照の処理（"session.context.xxx"形式）
+            if isinstance(value, str) and value.startswith("session.context."):
+                self.logger.info(f"🔍 [EXECUTOR] Detected session context reference: {value}")
+                # この時点では文字列のまま保持（エージェントで実際にセッションから取得する）
+                # injected[key] = value  # 既にvalueが設定されているため変更不要
+                continue
+            
+            if isinstance(value, str):
+                # 結合演算: "task1.result.data + task2.result.data"
+                if " + " in value and ".result." in value:
+                    self.logger.info(f"🔍 [EXECUTOR] Match: concatenation operation ({value})")
+                    resolved_value = self._resolve_concatenation(value, previous_results)
+                    if resolved_value is not None:
+                        injected[key] = resolved_value
+                        self.logger.info(f"🔗 [EXECUTOR] Resolved concatenation '{value}' = {len(resolved_value)} items")
+                
+                # 辞書フィールド参照: "task2.result.main_dish"
+                elif ".result." in value and value.endswith((".main_dish", ".side_dish", ".soup")):
+                    self.logger.info(f"🔍 [EXECUTOR] Match: dict field reference ({value})")
+                    field_value = self._extract_field_from_result(value, previous_results)
+                    injected[key] = field_value
+                    self.logger.info(f"🔗 [EXECUTOR] Extracted field '{value}' = '{field_value}'")
+                
+                # 複数フィールド参照: "task2.result.main_dish,task3.result.main_dish"
+                elif "," in value and ".result." in value:
+                    self.logger.info(f"🔍 [EXECUTOR] Match: multiple fields reference ({value})")
+                    field_values = self._extract_multiple_fields(value, previous_results)
+                    injected[key] = field_values
+                    self.logger.info(f"🔗 [EXECUTOR] Extracted multiple fields '{value}' = {field_values}")
+                
+                # ネストパス参照: "task2.result.data", "task1.result.success" など
+                elif ".result." in value:
+                    self.logger.info(f"🔍 [EXECUTOR] Match: nested path reference ({value})")
+                    resolved_value = self._extract_nested_path(value, previous_results)
+                    if resolved_value is not None:
+                        injected[key] = resolved_value
+                        self.logger.info(f"🔗 [EXECUTOR] Injected nested path '{value}' = {resolved_value}")
+                
+                # 単一タスク結果参照: "task1.result"
+                elif value.endswith(".result"):
+                    self.logger.info(f"🔍 [EXECUTOR] Match: single task result reference ({value})")
+                    task_ref = value[:-7]  # "task1.result" -> "task1"
+                    
+                    if task_ref in previous_results:
+                        # 在庫データから食材名リストを抽出
+                        inventory_data = previous_results[task_ref]
+                        
+                        if isinstance(inventory_data, dict) and inventory_data.get("success"):
+                            items = inventory_data.get("result", {}).get("data", [])
+                            item_names = [item.get("item_name") for item in items if item.get("item_name")]
+                            injected[key] = item_names
+                            self.logger.info(f"🔗 [EXECUTOR] Injected {len(item_names)} items from {task_ref} to {key}")
+                        else:
+                            self.logger.warning(f"⚠️ [EXECUTOR] Inventory data is not successful: {inventory_data}")
+                    else:
+                        self.logger.warning(f"⚠️ [EXECUTOR] Task reference not found in previous_results: {task_ref}")
+                else:
+                    self.logger.info(f"🔍 [EXECUTOR] No match: keeping original value ({value})")
+                    # その他の文字列はそのまま保持
+                    pass
+            
+            elif isinstance(value, list):
+                # 🆕 リスト型パラメータの処理を追加
+                resolved_list = []
+                
+                for item in value:
+                    if isinstance(item, str):
+                        # リスト内の各要素を解決
+                        if ".result." in item:
+                            # ネストされたパス（task2.result.data.main_dishなど）の場合は_extract_nested_pathを使用
+                            # シンプルなパス（task2.result.main_dish）の場合は_extract_field_from_resultを使用
+                            dot_count = item.count(".")
+                            if dot_count >= 3 and item.endswith((".main_dish", ".side_dish", ".soup")):
+                                # ネストされたパスの場合
+                                field_value = self._extract_nested_path(item, previous_results)
+                                resolved_list.append(field_value if field_value is not None else "")
+                                self.logger.info(f"🔗 [EXECUTOR] Resolved nested path list item '{item}' = '{field_value}'")
+                            elif item.endswith((".main_dish", ".side_dish", ".soup")):
+                                # シンプルなパスの場合
+                                field_value = self._extract_field_from_result(item, previous_results)
+                                resolved_list.append(field_value)
+                                self.logger.info(f"🔗 [EXECUTOR] Resolved list item '{item}' = '{field_value}'")
+                            elif item.endswith(".result"):
+                                # 単一タスク結果参照
+                                task_ref = item[:-7]
+                                if task_ref in previous_results:
+                                    task_result = previous_results[task_ref]
+                                    if isinstance(task_result, dict) and task_result.get("success"):
+                                        resolved_list.append(task_result.get("result", {}))
+                                        self.logger.info(f"🔗 [EXECUTOR] Resolved list item '{item}' = task result")
+                                else:
+                                    resolved_list.append(item)
+                            else:
+                                # その他の.result.を含む文字列はネストパスとして処理
+                                resolved_value = self._extract_nested_path(item, previous_results)
+                                resolved_list.append(resolved_value if resolved_value is not None else item)
+                                self.logger.info(f"🔗 [EXECUTOR] Resolved nested path list item '{item}' = '{resolved_value}'")
+                        else:
+                            # その他の文字列はそのまま
+                            resolved_list.append(item)
+                    else:
+                        # 文字列以外はそのまま
+                        resolved_list.append(item)
+                
+                injected[key] = resolved_list
+                self.logger.info(f"🔗 [EXECUTOR] Resolved list parameter '{key}' = {resolved_list}")
+            
+            else:
+                # その他の型はそのまま保持
+                pass
+        
+        return injected
+    
+    def _extract_field_from_result(self, value: str, previous_results: Dict[str, Any]) -> str:
+        """辞書構造から特定フィールドを抽出"""
+        # "task2.result.main_dish" -> task2のmain_dishフィールドを抽出
+        parts = value.split(".")
+        task_id = parts[0]
+        field_name = parts[2]  # main_dish, side_dish, soup
+        
+        
+        if task_id in previous_results:
+            task_result = previous_results[task_id]
+            
+            if isinstance(task_result, dict) and task_result.get("success"):
+                data = task_result.get("result", {}).get("data", {})
+                field_value = data.get(field_name, "")
+                self.logger.info(f"🔗 [EXECUTOR] Extracted '{field_name}' = '{field_value}'")
+                return field_value
+            else:
+                self.logger.warning(f"⚠️ [EXECUTOR] Task result is not successful: {task_result}")
+        else:
+            self.logger.warning(f"⚠️ [EXECUTOR] Task '{task_id}' not found in previous_results")
+        
+        return ""
+    
+    def _extract_multiple_fields(self, value: str, previous_results: Dict[str, Any]) -> List[str]:
+        """複数の辞書フィールドを抽出してリスト化"""
+        field_refs = [ref.strip() for ref in value.split(",")]
+        results = []
+        
+        
+        for field_ref in field_refs:
+            if ".result." in field_ref:
+                field_value = self._extract_field_from_result(field_ref, previous_results)
+                if field_value:  # 空文字列は除外
+                    results.append(field_value)
+                    self.logger.info(f"🔗 [EXECUTOR] Added field value: '{field_value}'")
+                else:
+                    # 空文字列の場合はスキップ
+                    pass
+        
+        self.logger.info(f"🔗 [EXECUTOR] Final extracted values: {results}")
+        return results
+    
+    def _extract_nested_path(self, path: str, previous_results: Dict[str, Any]) -> Any:
+        """ネストされたパスを解決（任意の深さに対応: task2.result.data.candidates など）"""
+        parts = path.split(".")
+        if len(parts) < 2:
+            self.logger.warning(f"⚠️ [EXECUTOR] Invalid nested path format: {path}")
+            return None
+        
+        task_id = parts[0]  # "task2"
+        path_after_task = parts[1:]  # ["result", "data", "candidates"]
+        
+        self.logger.info(f"🔍 [EXECUTOR] Extracting nested path: {path}")
+        self.logger.info(f"🔍 [EXECUTOR] task_id={task_id}, nested_path={'.'.join(path_after_task)}")
+        
+        if task_id not in previous_results:
+            self.logger.warning(f"⚠️ [EXECUTOR] Task '{task_id}' not found")
+            return None
+        
+        task_result = previous_results[task_id]
+        
+        # 再帰的にパスを辿る
+        current_value = task_result
+        
+        for key in path_after_task:
+            if isinstance(current_value, dict):
+                if key in current_value:
+                    current_value = current_value[key]
+                    self.logger.info(f"🔗 [EXECUTOR] Traversing to '{key}': found {type(current_value).__name__}")
+                else:
+                    self.logger.warning(f"⚠️ [EXECUTOR] Key '{key}' not found in {list(current_value.keys())}")
+                    return None
+            else:
+                self.logger.warning(f"⚠️ [EXECUTOR] Cannot traverse '{key}' from {type(current_value).__name__}")
+                return None
+        
+        self.logger.info(f"✅ [EXECUTOR] Successfully extracted: {type(current_value).__name__}")
+        
+        # Phase 3A Fix: candidatesが辞書のリストの場合、titleのリストに変換
+        if isinstance(current_value, list) and len(current_value) > 0 and isinstance(current_value[0], dict):
+            if "title" in current_value[0]:
+                titles = [item["title"] for item in current_value if "title" in item]
+                self.logger.info(f"🔧 [EXECUTOR] Converted candidates list to title list: {len(titles)} titles")
+                return titles
+        
+        return current_value
+    
+    def _resolve_concatenation(self, expression: str, previous_results: Dict[str, Any]) -> Optional[list]:
+        """結合演算を解決（例: "task1.result.data + task2.result.data"）"""
+        try:
+            parts = expression.split(" + ")
+            result_list = []
+            
+            for part in parts:
+                part = part.strip()
+                # ネストパス参照として解決
+                resolved_value = self._extract_nested_path(part, previous_results)
+                
+                if resolved_value is not None:
+                    # リストの場合は拡張、それ以外は追加
+                    if isinstance(resolved_value, list):
+                        result_list.extend(resolved_value)
+                        self.logger.info(f"🔗 [EXECUTOR] Extended {len(resolved_value)} items from {part}")
+                    else:
+                        result_list.append(resolved_value)
+                        self.logger.info(f"🔗 [EXECUTOR] Added item from {part}")
+                else:
+                    self.logger.warning(f"⚠️ [EXECUTOR] Could not resolve part: {part}")
+            
+            self.logger.info(f"✅ [EXECUTOR] Concatenation result: {len(result_list)} items")
+            return result_list
+            
+        except Exception as e:
+            self.logger.error(f"❌ [EXECUTOR] Error in _resolve_concatenation: {e}")
+            return None
+
+
+def build_synthetic_plan(index: int) -> List[Dict[str, Any]]:
+    """献立生成フロー相当の合成プラン（パラメータのみ）"""
+    return [
+        {"user_id": "user-1", "limit": 50},
+        {"inventory_items": "task1.result", "user_id": "user-1", "menu_type": "和食"},
+        {"inventory_items": "task1.result", "used_ingredients": "task2.result.data.used_ingredients", "user_id": "user-1"},
+        {"candidates": "task2.result.data.candidates + task3.result.data.candidates", "user_id": "user-1"},
+        {"recipe_titles": ["task2.result.main_dish", "task2.result.side_dish", "task2.result.data.soup", "固定値"], "user_id": "user-1"},
+        {"titles": "task2.result.main_dish,task2.result.side_dish,task2.result.soup", "sse_session_id": "session.context.sse_session_id"},
+        {"menu": "task2.result.main_dish", "note": f"plan-{index}", "flag": "task9.result.success"},
+    ]
+
+
+def build_previous_results() -> Dict[str, Any]:
+    """前タスクの結果（在庫20件・候補5件）"""
+    candidates = [{"title": f"レシピ{i}", "ingredients": ["玉ねぎ", "人参"]} for i in range(5)]
+    return {
+        "task1": {"success": True, "result": {"data": [{"item_name": f"食材{i}", "quantity": i} for i in range(20)]}},
+        "task2": {
+            "success": True,
+            "result": {"data": {"main_dish": "鶏の照り焼き", "side_dish": "ほうれん草のおひたし", "soup": "味噌汁", "candidates": candidates, "used_ingredients": ["鶏肉"]}},
+        },
+        "task3": {"success": True, "result": {"data": {"candidates": candidates}}},
+    }
+
+
+def run_legacy(plans: List[List[Dict[str, Any]]], results: Dict[str, Any], repeat: int) -> float:
+    injector = LegacyInjector()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for plan in plans:
+            for parameters in plan:
+                injector._inject_data(parameters, results)
+    return time.perf_counter() - start
+
+
+def run_compiled(plans: List[List[Dict[str, Any]]], results: Dict[str, Any], repeat: int) -> float:
+    # コンパイルはプランニング時に1回だけ行われる
+    compiled_plans = [[compile_parameters(parameters) for parameters in plan] for plan in plans]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for plan, compiled_plan in zip(plans, compiled_plans):
+            for parameters, compiled in zip(plan, compiled_plan):
+                resolve_parameters(compiled, parameters, results)
+    return time.perf_counter() - start
+
+
+def run_compile(plans: List[List[Dict[str, Any]]]) -> float:
+    start = time.perf_counter()
+    for plan in plans:
+        for parameters in plan:
+            compile_parameters(parameters)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パラメータ参照解決のマイクロベンチマーク")
+    parser.add_argument("--plans", type=int, default=200, help="合成プラン数")
+    parser.add_argument("--repeat", type=int, default=20, help="各プランの解決回数")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler(os.devnull, encoding="utf-8")]
+    )
+
+    plans = [build_synthetic_plan(i) for i in range(args.plans)]
+    results = build_previous_results()
+
+    # 出力が一致することを確認
+    legacy = LegacyInjector()
+    for plan in plans:
+        for parameters in plan:
+            expected = legacy._inject_data(parameters, results)
+            actual = resolve_parameters(compile_parameters(parameters), parameters, results)
+            assert expected == actual, f"mismatch: {parameters}\n  legacy:   {expected}\n  compiled: {actual}"
+
+    resolutions = args.plans * args.repeat * len(plans[0])
+    legacy_seconds = run_legacy(plans, results, args.repeat)
+    compile_seconds = run_compile(plans)
+    compiled_seconds = run_compiled(plans, results, args.repeat)
+
+    print(f"parameter sets resolved: {resolutions}")
+    print(f"legacy _inject_data:     {legacy_seconds * 1e6 / resolutions:8.2f} us/task")
+    print(f"compiled resolver:       {compiled_seconds * 1e6 / resolutions:8.2f} us/task")
+    print(f"compile (once per task): {compile_seconds * 1e6 / (args.plans * len(plans[0])):8.2f} us/task")
+    print(f"speedup:                 {legacy_seconds / compiled_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
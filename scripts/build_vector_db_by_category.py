@@ -6,7 +6,11 @@
 主菜・副菜・汁物別に3つのChromaDBベクトルデータベースを構築します。
 
 使用方法:
-    python scripts/build_vector_db_by_category.py
+    python scripts/build_vector_db_by_category.py [--ingredient-index-only]
+
+ベクトルDBと同時に、ハイブリッド検索（RECIPE_SEARCH_MODE=hybrid）用の食材の転置インデックスを
+RECIPE_INGREDIENT_INDEX_PATH（デフォルト: recipe_ingredient_index.json）に作成します。
+--ingredient-index-only を指定すると、埋め込みAPIを呼び出さずに転置インデックスのみを作成します。
 
 前提条件:
     - me2you/recipe_data.jsonlが存在すること
@@ -14,6 +18,7 @@
     - 必要な依存関係がインストールされていること
 """
 
+import argparse
 import json
 import os
 import sys
@@ -22,11 +27,17 @@ from typing import List, Dict, Any
 import logging
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 # LangChain関連のインポート
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+# 検索時の部分マッチングと同じ正規化でトークン化
+from mcp_servers.recipe_rag.matching import tokenize_ingredients
+from mcp_servers.recipe_rag.ingredient_index import IngredientIndex, save_ingredient_indexes
+
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -181,6 +192,7 @@ def preprocess_recipes(recipes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                     'recipe_category': recipe_info['category'],
                     'category_detail': recipe_info['category_detail'],  # 新規追加
                     'main_ingredients': ', '.join(recipe_info['main_ingredients'][:3]),  # リストを文字列に変換
+                    'ingredient_tokens': ' '.join(tokenize_ingredients(combined_text)),  # 正規化済み食材トークン（検索時の正規化を省略）
                     'original_index': i,  # 元のJSONLファイルでのインデックス
                     'category_index': len(processed_recipes)  # カテゴリ内でのインデックス
                 }
@@ -425,6 +437,10 @@ def build_vector_database(processed_recipes: List[Dict[str, Any]], output_dir: s
 
 def main():
     """メイン処理"""
+    parser = argparse.ArgumentParser(description="レシピベクトルDB構築（分類別版）")
+    parser.add_argument("--ingredient-index-only", action="store_true", help="食材の転置インデックスのみを作成")
+    args = parser.parse_args()
+    
     # .envファイルの読み込み
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
@@ -437,7 +453,7 @@ def main():
         logger.warning(f".envファイルが見つかりません: {env_path}")
     
     # OpenAI APIキーの確認
-    if not os.getenv("OPENAI_API_KEY"):
+    if not args.ingredient_index_only and not os.getenv("OPENAI_API_KEY"):
         logger.error("OPENAI_API_KEYが設定されていません。.envファイルを確認してください。")
         sys.exit(1)
     
@@ -463,6 +479,8 @@ def main():
         ('soup', 'recipe_vector_db_soup', '汁物')
     ]
     
+    ingredient_indexes = {}
+    
     for category_type, output_dir_name, category_name in categories:
         logger.info(f"=== {category_name}用ベクトルDB構築開始 ===")
         
@@ -474,6 +492,16 @@ def main():
             logger.warning(f"{category_name}用レシピが見つかりません。スキップします。")
             continue
         
+        # 食材の転置インデックス（ベクトルDBと同じ文書・メタデータを保持）
+        ingredient_indexes[category_type] = IngredientIndex([
+            {"content": recipe['combined_text'], "metadata": recipe['metadata']}
+            for recipe in filtered_recipes
+        ])
+        logger.info(f"{category_name}用転置インデックス: {len(ingredient_indexes[category_type].postings)}食材")
+        
+        if args.ingredient_index_only:
+            continue
+        
         # ベクトルDB構築
         output_dir = project_root / output_dir_name
         vectorstore = build_vector_database(filtered_recipes, str(output_dir))
@@ -492,7 +520,14 @@ def main():
         
         logger.info(f"=== {category_name}用ベクトルDB構築完了 ===")
     
-    # 4. 完了報告
+    # 4. 食材の転置インデックスを保存
+    ingredient_index_path = Path(os.getenv("RECIPE_INGREDIENT_INDEX_PATH", "recipe_ingredient_index.json"))
+    if not ingredient_index_path.is_absolute():
+        ingredient_index_path = project_root / ingredient_index_path
+    save_ingredient_indexes(str(ingredient_index_path), ingredient_indexes)
+    logger.info(f"食材の転置インデックスを保存しました: {ingredient_index_path}")
+    
+    # 5. 完了報告
     logger.info("=== レシピベクトルDB構築完了（分類別版） ===")
     logger.info(f"処理件数: {len(processed_recipes)}件")
     logger.info("出力先:")
@@ -0,0 +1,911 @@
+#!/usr/bin/env python3
+"""
+ローカルSupabaseスタンドイン（PostgREST / Auth のサブセット）
+
+Supabaseプロジェクトなしで CRUD 層の負荷試験・レイテンシ計測を行うための
+インメモリサーバーです。SUPABASE_URL をこのサーバーに向けるだけで、
+InventoryCRUD / InventoryAdvanced / RecipeHistoryCRUD / OCRMappingCRUD / AuthHandler
+（TokenVerifier）を変更せずに実行できます。
+
+対応範囲:
+    - /rest/v1/<table>: GET / POST（insert・upsert）/ PATCH / DELETE
+      select（列指定）、eq / neq / gt / gte / lt / lte / like / ilike / in / is、not.、
+      or=(...) / and(...)、order、limit / offset、Prefer: return / resolution / count
+    - /rest/v1/rpc/<fn>: supabase/migrations のRPC関数（--no-rpc で未作成の状態を再現）
+    - /auth/v1/user（auth.get_user）、/auth/v1/token（password / refresh_token）
+    - 行レベルセキュリティ: ユーザーのJWTで呼ばれた場合は user_id が一致する行のみ操作可能
+    - 制約: NOT NULL（23502）、主キー・UNIQUE（23505）、不正なUUID（22P02）、未知の列
+    - 遅延の注入: 固定遅延 + 一様ジッター + 一定割合のテール遅延（乱数シード固定で再現可能）
+
+使用方法:
+    python scripts/local_supabase.py [--port 54321] [--latency-ms 20] [--jitter-ms 5]
+        [--tail-rate 0.01 --tail-ms 200] [--seed 0] [--no-rpc]
+        [--users 10 --items-per-user 200 --histories-per-user 100 --mappings-per-user 50]
+        [--data fixtures.json] [--token-for user@example.com]
+
+    起動時に表示される環境変数（SUPABASE_URL / SUPABASE_KEY / SUPABASE_JWT_SECRET）を
+    設定してAPIやスクリプトを実行します。ベンチマークからはインプロセスで
+    LocalSupabase(...).start() として起動することもできます。
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+import jwt
+
+# ローカル用のダミーキー・JWTシークレット（本番の値とは無関係）
+LOCAL_ANON_KEY = "local-anon-key"
+LOCAL_JWT_SECRET = "local-supabase-jwt-secret-for-testing-only"
+
+# ユーザーIDをメールアドレスから決定的に生成するための名前空間
+_USER_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "local-supabase")
+
+UUID, TEXT, NUMERIC, INTEGER, BOOLEAN, TIMESTAMPTZ, DATE, JSONB = (
+    "uuid", "text", "numeric", "integer", "boolean", "timestamptz", "date", "jsonb"
+)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _new_uuid() -> str:
+    return str(uuid.uuid4())
+
+
+# テーブル定義（docs/archive/DDL.md のサブセット）
+# columns: 列名 → 型、defaults: 省略時の既定値（呼び出し可能なら生成関数）
+TABLES: Dict[str, Dict[str, Any]] = {
+    "inventory": {
+        "columns": {
+            "id": UUID, "user_id": UUID, "item_name": TEXT, "quantity": NUMERIC, "unit": TEXT,
+            "storage_location": TEXT, "expiry_date": DATE, "created_at": TIMESTAMPTZ, "updated_at": TIMESTAMPTZ,
+        },
+        "defaults": {"id": _new_uuid, "quantity": 0, "unit": "個", "created_at": _now, "updated_at": _now},
+        "not_null": ("item_name", "quantity", "unit"),
+        "unique": (("id",),),
+        "owner": "user_id",
+    },
+    "recipe_historys": {
+        "columns": {
+            "id": UUID, "user_id": UUID, "title": TEXT, "source": TEXT, "url": TEXT, "cooked_at": TIMESTAMPTZ,
+            "rating": INTEGER, "notes": TEXT, "ingredients": JSONB, "ingredients_deleted": BOOLEAN,
+            "created_at": TIMESTAMPTZ, "updated_at": TIMESTAMPTZ,
+        },
+        "defaults": {
+            "id": _new_uuid, "cooked_at": _now, "ingredients_deleted": False, "created_at": _now, "updated_at": _now,
+        },
+        "not_null": ("title",),
+        "unique": (("id",),),
+        "owner": "user_id",
+    },
+    "ocr_item_mappings": {
+        "columns": {
+            "id": UUID, "user_id": UUID, "original_name": TEXT, "normalized_name": TEXT,
+            "created_at": TIMESTAMPTZ, "updated_at": TIMESTAMPTZ,
+        },
+        "defaults": {"id": _new_uuid, "created_at": _now, "updated_at": _now},
+        "not_null": ("original_name", "normalized_name"),
+        "unique": (("id",), ("user_id", "original_name")),
+        "owner": "user_id",
+    },
+    "profiles": {
+        "columns": {"id": UUID, "email": TEXT, "display_name": TEXT, "created_at": TIMESTAMPTZ, "updated_at": TIMESTAMPTZ},
+        "defaults": {"created_at": _now, "updated_at": _now},
+        "not_null": ("id",),
+        "unique": (("id",),),
+        "owner": "id",
+    },
+}
+
+
+class PostgrestError(Exception):
+    """PostgREST形式のエラー応答（postgrest-py の APIError に変換される）"""
+
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None, hint: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": details, "hint": hint}
+
+
+# --- 値の変換 ---
+
+def _parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00").replace(" ", "T", 1))
+    # タイムゾーンなしはUTCとして扱う（DBセッションのタイムゾーンがUTCの場合と同じ）
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def coerce(column_type: str, value: Any) -> Any:
+    """列の型に合わせて値を変換（変換できない場合は 22P02）"""
+    if value is None:
+        return None
+    try:
+        if column_type == UUID:
+            return str(uuid.UUID(str(value)))
+        if column_type == NUMERIC:
+            return float(value)
+        if column_type == INTEGER:
+            return int(value)
+        if column_type == BOOLEAN:
+            return value if isinstance(value, bool) else str(value).lower() == "true"
+        if column_type == TIMESTAMPTZ:
+            return _parse_timestamp(value)
+        if column_type == DATE:
+            return value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+        if column_type == TEXT:
+            return str(value)
+        return value
+    except (TypeError, ValueError):
+        raise PostgrestError(400, "22P02", f'invalid input syntax for type {column_type}: "{value}"')
+
+
+def serialize(row: Dict[str, Any], columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """行をJSON応答用に変換（columns指定時はその列のみ）"""
+    out = {}
+    for key in columns or row.keys():
+        value = row.get(key)
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        out[key] = value
+    return out
+
+
+# --- フィルタ（PostgRESTの演算子・論理式） ---
+
+def _split_top_level(text: str) -> List[str]:
+    """括弧・ダブルクォートの外側のカンマで分割"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _like_regex(pattern: str, ignore_case: bool) -> "re.Pattern":
+    regex = "".join(".*" if c in "*%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def _condition(table: str, column: str, expression: str) -> Predicate:
+    """"op.value"（not.付きも可）を行の判定関数に変換"""
+    columns = TABLES[table]["columns"]
+    if column not in columns:
+        raise PostgrestError(400, "42703", f"column {table}.{column} does not exist")
+    column_type = columns[column]
+
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, raw = expression.partition(".")
+
+    if operator == "is":
+        if raw.lower() not in ("null", "true", "false"):
+            raise PostgrestError(400, "PGRST100", f'"failed to parse filter (is.{raw})"')
+        expected = {"null": None, "true": True, "false": False}[raw.lower()]
+        predicate = lambda row: row.get(column) is expected
+    elif operator == "in":
+        values = {coerce(column_type, _unquote(v)) for v in _split_top_level(raw.strip()[1:-1]) if v.strip()}
+        predicate = lambda row: row.get(column) is not None and row.get(column) in values
+    elif operator in ("like", "ilike"):
+        regex = _like_regex(_unquote(raw), operator == "ilike")
+        predicate = lambda row: row.get(column) is not None and bool(regex.match(str(row.get(column))))
+    elif operator in ("eq", "neq", "gt", "gte", "lt", "lte"):
+        value = coerce(column_type, _unquote(raw))
+        compare = {
+            "eq": lambda a, b: a == b, "neq": lambda a, b: a != b,
+            "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b,
+        }[operator]
+        # SQLと同様にNULLとの比較は常に偽
+        predicate = lambda row: row.get(column) is not None and compare(row.get(column), value)
+    else:
+        raise PostgrestError(400, "PGRST100", f'"failed to parse filter ({operator}.{raw})"')
+
+    return (lambda row: not predicate(row)) if negate else predicate
+
+
+def _logic_tree(table: str, operator: str, body: str) -> Predicate:
+    """or=(...) / and=(...) の論理式を判定関数に変換"""
+    predicates = []
+    for part in _split_top_level(body):
+        part = part.strip()
+        negate = part.startswith("not.")
+        inner = part[4:] if negate else part
+        match = re.match(r"^(and|or)\((.*)\)$", inner, re.DOTALL)
+        if match:
+            predicate = _logic_tree(table, match.group(1), match.group(2))
+            predicates.append((lambda p: lambda row: not p(row))(predicate) if negate else predicate)
+        else:
+            column, _, expression = part.partition(".")
+            predicates.append(_condition(table, column, expression))
+    combine = any if operator == "or" else all
+    return lambda row: combine(p(row) for p in predicates)
+
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def build_filters(table: str, params: List[Tuple[str, str]]) -> List[Predicate]:
+    """クエリパラメータからフィルタの判定関数リストを作成"""
+    filters = []
+    for key, value in params:
+        if key in RESERVED_PARAMS:
+            continue
+        negate = key.startswith("not.")
+        logic = key[4:] if negate else key
+        if logic in ("or", "and"):
+            predicate = _logic_tree(table, logic, value.strip()[1:-1])
+            filters.append((lambda p: lambda row: not p(row))(predicate) if negate else predicate)
+        else:
+            filters.append(_condition(table, key, value))
+    return filters
+
+
+def apply_order(table: str, rows: List[Dict[str, Any]], order: Optional[str]) -> List[Dict[str, Any]]:
+    """order=col.desc.nullslast,... で並べ替え（PostgreSQLと同じくASCはNULL最後、DESCはNULL先頭）"""
+    if not order:
+        return rows
+    for term in reversed(_split_top_level(order)):
+        parts = term.strip().split(".")
+        column = parts[0]
+        if column not in TABLES[table]["columns"]:
+            raise PostgrestError(400, "42703", f"column {table}.{column} does not exist")
+        descending = "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (descending and "nullslast" not in parts[1:])
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def parse_select(table: str, select: Optional[str]) -> Optional[List[str]]:
+    """select=col1,col2 を列リストに変換（* の場合はNone）"""
+    if not select or select.strip() == "*":
+        return None
+    columns = [column.strip() for column in select.split(",") if column.strip()]
+    for column in columns:
+        if column != "*" and column not in TABLES[table]["columns"]:
+            raise PostgrestError(400, "42703", f"column {table}.{column} does not exist")
+    return None if "*" in columns else columns
+
+
+# --- インメモリストア ---
+
+class LocalStore:
+    """テーブルごとの行リストと制約チェック（操作全体を1つのロックで直列化）"""
+
+    def __init__(self):
+        self.rows: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLES}
+        self.lock = threading.RLock()
+
+    def _prepare(self, table: str, data: Dict[str, Any], owner: Optional[str]) -> Dict[str, Any]:
+        spec = TABLES[table]
+        row = {}
+        for key, value in data.items():
+            if key not in spec["columns"]:
+                raise PostgrestError(400, "PGRST204", f"Could not find the '{key}' column of '{table}' in the schema cache")
+            row[key] = coerce(spec["columns"][key], value)
+        for key, column_type in spec["columns"].items():
+            if key not in row:
+                default = spec["defaults"].get(key)
+                row[key] = coerce(column_type, default() if callable(default) else default)
+        for key in spec["not_null"]:
+            if row.get(key) is None:
+                raise PostgrestError(
+                    400, "23502", f'null value in column "{key}" of relation "{table}" violates not-null constraint'
+                )
+        if owner is not None and row.get(spec["owner"]) != owner:
+            raise PostgrestError(403, "42501", f'new row violates row-level security policy for table "{table}"')
+        return row
+
+    def _conflict(self, table: str, row: Dict[str, Any], candidates: List[Dict[str, Any]], keys: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        values = tuple(row.get(key) for key in keys)
+        if any(value is None for value in values):
+            return None
+        for existing in candidates:
+            if existing is not row and tuple(existing.get(key) for key in keys) == values:
+                return existing
+        return None
+
+    def insert(
+        self,
+        table: str,
+        data: List[Dict[str, Any]],
+        owner: Optional[str],
+        on_conflict: Optional[Tuple[str, ...]] = None,
+        resolution: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """行を挿入（1リクエスト内はすべて成功かすべて失敗）"""
+        with self.lock:
+            existing = self.rows[table]
+            staged: List[Dict[str, Any]] = []
+            merged: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+            returned: List[Dict[str, Any]] = []
+            for item in data:
+                row = self._prepare(table, item, owner)
+                if on_conflict and resolution:
+                    target = self._conflict(table, row, existing, on_conflict)
+                    if target is not None:
+                        if owner is not None and target.get(TABLES[table]["owner"]) != owner:
+                            raise PostgrestError(403, "42501", f'new row violates row-level security policy for table "{table}"')
+                        if resolution == "merge-duplicates":
+                            # 指定された列のみ更新（既存行のIDなどは維持）
+                            updates = {key: row[key] for key in item if key != "id"}
+                            merged.append((target, updates))
+                            returned.append({**target, **updates, "updated_at": _now()})
+                        continue
+                for keys in TABLES[table]["unique"]:
+                    if self._conflict(table, row, existing + staged, keys) is not None:
+                        constraint = f"{table}_{'_'.join(keys)}_key" if keys != ("id",) else f"{table}_pkey"
+                        raise PostgrestError(
+                            409, "23505", f'duplicate key value violates unique constraint "{constraint}"',
+                            details=f"Key ({', '.join(keys)})=({', '.join(str(row[k]) for k in keys)}) already exists."
+                        )
+                staged.append(row)
+                returned.append(row)
+            for target, updates in merged:
+                target.update(updates)
+                target["updated_at"] = _now()
+            existing.extend(staged)
+            return returned
+
+    def select(self, table: str, filters: List[Predicate], owner: Optional[str]) -> List[Dict[str, Any]]:
+        owner_column = TABLES[table]["owner"]
+        with self.lock:
+            return [
+                row for row in self.rows[table]
+                if (owner is None or row.get(owner_column) == owner) and all(f(row) for f in filters)
+            ]
+
+    def update(self, table: str, data: Dict[str, Any], filters: List[Predicate], owner: Optional[str]) -> List[Dict[str, Any]]:
+        spec = TABLES[table]
+        changes = {}
+        for key, value in data.items():
+            if key not in spec["columns"]:
+                raise PostgrestError(400, "PGRST204", f"Could not find the '{key}' column of '{table}' in the schema cache")
+            changes[key] = coerce(spec["columns"][key], value)
+            if value is None and key in spec["not_null"]:
+                raise PostgrestError(
+                    400, "23502", f'null value in column "{key}" of relation "{table}" violates not-null constraint'
+                )
+        with self.lock:
+            rows = self.select(table, filters, owner)
+            for row in rows:
+                row.update(changes)
+                # updated_atトリガー相当
+                if "updated_at" in spec["columns"]:
+                    row["updated_at"] = _now()
+            return rows
+
+    def delete(self, table: str, filters: List[Predicate], owner: Optional[str]) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.select(table, filters, owner)
+            doomed = {id(row) for row in rows}
+            self.rows[table] = [row for row in self.rows[table] if id(row) not in doomed]
+            return rows
+
+    def load(self, data: Dict[str, List[Dict[str, Any]]]) -> None:
+        """フィクスチャを読み込む（RLSなし）"""
+        for table, rows in data.items():
+            if table not in TABLES:
+                raise ValueError(f"Unknown table in fixtures: {table}")
+            self.insert(table, rows, owner=None)
+
+
+# --- RPC（supabase/migrations の関数と同じ動作） ---
+
+def _ordered_target(store: LocalStore, params: Dict[str, Any], owner: Optional[str]) -> Optional[Dict[str, Any]]:
+    user_id = coerce(UUID, params["p_user_id"])
+    rows = store.select(
+        "inventory",
+        [lambda row: row["user_id"] == user_id, lambda row: row["item_name"] == params["p_item_name"]],
+        owner
+    )
+    if not rows:
+        return None
+    rows.sort(key=lambda row: row["id"])
+    rows.sort(key=lambda row: row["created_at"], reverse=bool(params.get("p_latest")))
+    return rows[0]
+
+
+def rpc_inventory_update_by_name_ordered(store: LocalStore, params: Dict[str, Any], owner: Optional[str]) -> List[Dict[str, Any]]:
+    with store.lock:
+        target = _ordered_target(store, params, owner)
+        if target is None:
+            return []
+        updates = {
+            key: value for key, value in (params.get("p_updates") or {}).items()
+            if key in ("quantity", "unit", "storage_location", "expiry_date")
+        }
+        return store.update("inventory", updates, [lambda row: row is target], owner)
+
+
+def rpc_inventory_delete_by_name_ordered(store: LocalStore, params: Dict[str, Any], owner: Optional[str]) -> List[Dict[str, Any]]:
+    with store.lock:
+        target = _ordered_target(store, params, owner)
+        if target is None:
+            return []
+        return store.delete("inventory", [lambda row: row is target], owner)
+
+
+def rpc_inventory_apply_quantities(store: LocalStore, params: Dict[str, Any], owner: Optional[str]) -> List[Dict[str, Any]]:
+    user_id = coerce(UUID, params["p_user_id"])
+    delete_ids = {coerce(UUID, value) for value in params.get("p_delete_ids") or []}
+    with store.lock:
+        deleted = store.delete(
+            "inventory", [lambda row: row["user_id"] == user_id and row["id"] in delete_ids], owner
+        )
+        updated = []
+        for update in params.get("p_updates") or []:
+            item_id = coerce(UUID, update["id"])
+            if item_id in delete_ids:
+                continue
+            updated.extend(store.update(
+                "inventory", {"quantity": update["quantity"]},
+                [lambda row: row["user_id"] == user_id and row["id"] == item_id], owner
+            ))
+    return [{"id": row["id"], "action": "deleted"} for row in deleted] + [{"id": row["id"], "action": "updated"} for row in updated]
+
+
+_CATEGORY_PREFIXES = (("main", "主菜: "), ("sub", "副菜: "), ("soup", "汁物: "))
+
+
+def rpc_recipe_history_by_date(store: LocalStore, params: Dict[str, Any], owner: Optional[str]) -> List[Dict[str, Any]]:
+    user_id = coerce(UUID, params["p_user_id"])
+    start = coerce(TIMESTAMPTZ, params.get("p_from"))
+    end = coerce(TIMESTAMPTZ, params.get("p_to"))
+    cursor_at = coerce(TIMESTAMPTZ, params.get("p_cursor_cooked_at"))
+    cursor_id = coerce(UUID, params.get("p_cursor_id"))
+    category = params.get("p_category")
+    limit = params.get("p_limit")
+
+    rows = store.select("recipe_historys", [
+        lambda row: row["user_id"] == user_id and row["cooked_at"] is not None,
+        lambda row: start is None or row["cooked_at"] >= start,
+        lambda row: end is None or row["cooked_at"] < end,
+        lambda row: cursor_at is None or (row["cooked_at"], row["id"]) < (cursor_at, cursor_id),
+    ], owner)
+    rows.sort(key=lambda row: (row["cooked_at"], row["id"]), reverse=True)
+
+    groups: Dict[date, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(row["cooked_at"].astimezone(timezone.utc).date(), []).append(row)
+
+    result = []
+    for history_date in sorted(groups, reverse=True)[:limit]:
+        group = groups[history_date]
+        recipes = []
+        for row in group:
+            row_category = next((cat for cat, prefix in _CATEGORY_PREFIXES if row["title"].startswith(prefix)), None)
+            if category is None or row_category == category:
+                recipes.append({
+                    "category": row_category, "title": row["title"], "source": row.get("source") or "web",
+                    "url": row.get("url"), "history_id": row["id"],
+                })
+        oldest = group[-1]
+        result.append({
+            "cooked_date": history_date,
+            "recipes": recipes,
+            "ingredients_deleted": all(bool(row.get("ingredients_deleted")) for row in group),
+            "cursor_cooked_at": oldest["cooked_at"],
+            "cursor_id": oldest["id"],
+        })
+    return result
+
+
+RPC_FUNCTIONS: Dict[str, Callable[[LocalStore, Dict[str, Any], Optional[str]], List[Dict[str, Any]]]] = {
+    "inventory_update_by_name_ordered": rpc_inventory_update_by_name_ordered,
+    "inventory_delete_by_name_ordered": rpc_inventory_delete_by_name_ordered,
+    "inventory_apply_quantities": rpc_inventory_apply_quantities,
+    "recipe_history_by_date": rpc_recipe_history_by_date,
+}
+
+
+# --- サーバー ---
+
+class LocalSupabase:
+    """
+    ローカルSupabaseスタンドイン
+
+    例:
+        server = LocalSupabase(latency_ms=20, jitter_ms=5, seed=0).start()
+        os.environ["SUPABASE_URL"] = server.url
+        os.environ["SUPABASE_KEY"] = LOCAL_ANON_KEY
+        token = server.issue_token(server.user_id("alice@example.com"))
+        ...
+        server.stop()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_ms: float = 0.0,
+        seed: int = 0,
+        rpc: bool = True,
+        jwt_secret: str = LOCAL_JWT_SECRET,
+        token_ttl: int = 3600
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.tail_rate = tail_rate
+        self.tail = tail_ms / 1000
+        self.rpc_enabled = rpc
+        self.jwt_secret = jwt_secret
+        self.token_ttl = token_ttl
+        self.store = LocalStore()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+
+    # --- 認証 ---
+
+    @staticmethod
+    def user_id(email: str) -> str:
+        """メールアドレスから決定的なユーザーIDを生成"""
+        return str(uuid.uuid5(_USER_NAMESPACE, email))
+
+    def issue_token(self, user_id: str, email: Optional[str] = None) -> str:
+        """Supabase Authと同じ形式（HS256, aud=authenticated）のアクセストークンを発行"""
+        now = int(time.time())
+        claims = {
+            "sub": user_id, "email": email, "aud": "authenticated", "role": "authenticated",
+            "iat": now, "exp": now + self.token_ttl,
+        }
+        return jwt.encode(claims, self.jwt_secret, algorithm="HS256")
+
+    def _decode(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            return jwt.decode(token, self.jwt_secret, algorithms=["HS256"], audience="authenticated")
+        except jwt.InvalidTokenError:
+            return None
+
+    def _user_json(self, user_id: str, email: Optional[str]) -> Dict[str, Any]:
+        return {
+            "id": user_id, "aud": "authenticated", "role": "authenticated", "email": email,
+            "app_metadata": {"provider": "email"}, "user_metadata": {},
+            "created_at": "2025-01-01T00:00:00+00:00", "last_sign_in_at": _now().isoformat(),
+        }
+
+    def _session_json(self, user_id: str, email: Optional[str]) -> Dict[str, Any]:
+        return {
+            "access_token": self.issue_token(user_id, email), "token_type": "bearer",
+            "expires_in": self.token_ttl, "expires_at": int(time.time()) + self.token_ttl,
+            "refresh_token": f"local-refresh:{user_id}:{email or ''}", "user": self._user_json(user_id, email),
+        }
+
+    # --- 遅延・統計 ---
+
+    def _delay(self) -> float:
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self.tail_rate and self._random.random() < self.tail_rate:
+                delay += self.tail
+        return delay
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    # --- ライフサイクル ---
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self) -> "LocalSupabase":
+        """バックグラウンドスレッドでサーバーを起動"""
+        self._server = _Server((self.host, self.port), _make_handler(self))
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        """フォアグラウンドでサーバーを起動（CLI用）"""
+        self._server = _Server((self.host, self.port), _make_handler(self))
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # --- リクエスト処理 ---
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: Any) -> Tuple[int, Dict[str, str], Any]:
+        """1リクエストを処理して (ステータス, 追加ヘッダー, JSON本文) を返す"""
+        parsed = urlparse(path)
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        route = parsed.path.rstrip("/")
+
+        if route.startswith("/auth/v1/"):
+            self._count(f"auth {route[len('/auth/v1/'):]}")
+            return self._handle_auth(method, route[len("/auth/v1/"):], dict(params), headers, body)
+
+        authorization = headers.get("authorization", "")
+        claims = self._decode(authorization[7:]) if authorization.lower().startswith("bearer ") else None
+        # ユーザーのJWTで呼ばれた場合のみRLSを適用（anonキー・サービスキーは全行）
+        owner = claims["sub"] if claims else None
+
+        if route.startswith("/rest/v1/rpc/"):
+            name = route[len("/rest/v1/rpc/"):]
+            self._count(f"rpc {name}")
+            function = RPC_FUNCTIONS.get(name) if self.rpc_enabled else None
+            if function is None:
+                raise PostgrestError(
+                    404, "PGRST202", f"Could not find the function public.{name} in the schema cache",
+                    hint="Perhaps you meant to call a different function"
+                )
+            return 200, {}, [serialize(row) for row in function(self.store, body or {}, owner)]
+
+        if not route.startswith("/rest/v1/"):
+            raise PostgrestError(404, "PGRST000", f"Not found: {route}")
+        table = route[len("/rest/v1/"):]
+        if table not in TABLES:
+            raise PostgrestError(404, "42P01", f'relation "public.{table}" does not exist')
+        self._count(f"{method} {table}")
+
+        query = dict(params)
+        prefer = headers.get("prefer", "")
+        columns = parse_select(table, query.get("select"))
+        filters = build_filters(table, params)
+
+        if method == "GET":
+            rows = apply_order(table, self.store.select(table, filters, owner), query.get("order"))
+            total = len(rows)
+            offset = int(query.get("offset", 0))
+            limit = int(query["limit"]) if "limit" in query else None
+            rows = rows[offset:offset + limit if limit is not None else None]
+            extra = {}
+            if "count=" in prefer:
+                end = offset + len(rows) - 1
+                extra["Content-Range"] = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+            return 200, extra, [serialize(row, columns) for row in rows]
+
+        if method == "POST":
+            items = body if isinstance(body, list) else [body]
+            resolution = next((r for r in ("merge-duplicates", "ignore-duplicates") if f"resolution={r}" in prefer), None)
+            on_conflict = tuple(c.strip() for c in query.get("on_conflict", "id").split(",")) if resolution else None
+            rows = self.store.insert(table, items, owner, on_conflict, resolution)
+            status = 201
+        elif method == "PATCH":
+            rows = self.store.update(table, body or {}, filters, owner)
+            status = 200
+        elif method == "DELETE":
+            rows = self.store.delete(table, filters, owner)
+            status = 200
+        else:
+            raise PostgrestError(405, "PGRST000", f"Method not allowed: {method}")
+
+        if "return=representation" not in prefer:
+            return 204 if method != "POST" else 201, {}, None
+        return status, {}, [serialize(row, columns) for row in rows]
+
+    def _handle_auth(self, method: str, route: str, query: Dict[str, str], headers: Dict[str, str], body: Any) -> Tuple[int, Dict[str, str], Any]:
+        if route == "user" and method == "GET":
+            authorization = headers.get("authorization", "")
+            claims = self._decode(authorization[7:]) if authorization.lower().startswith("bearer ") else None
+            if not claims:
+                return 401, {}, {"code": 401, "error_code": "bad_jwt", "msg": "invalid JWT: unable to parse or verify signature"}
+            return 200, {}, self._user_json(claims["sub"], claims.get("email"))
+
+        if route == "token" and method == "POST":
+            body = body or {}
+            if query.get("grant_type") == "password" and body.get("email"):
+                email = body["email"]
+                return 200, {}, self._session_json(self.user_id(email), email)
+            if query.get("grant_type") == "refresh_token" and str(body.get("refresh_token", "")).startswith("local-refresh:"):
+                _, user_id, email = body["refresh_token"].split(":", 2)
+                return 200, {}, self._session_json(user_id, email or None)
+            return 400, {}, {"code": 400, "error_code": "invalid_grant", "msg": "Invalid login credentials"}
+
+        if route == ".well-known/jwks.json":
+            # HS256のみ（TokenVerifierはSUPABASE_JWT_SECRETまたはauth.get_userで検証する）
+            return 200, {}, {"keys": []}
+
+        return 404, {}, {"code": 404, "error_code": "not_found", "msg": f"Not found: /auth/v1/{route}"}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 同時接続時にSYNが破棄されないよう待ち行列を広げる
+    request_queue_size = 256
+
+
+def _make_handler(app: LocalSupabase):
+    class Handler(BaseHTTPRequestHandler):
+        # keep-aliveを有効にする（HTTP/1.0では応答ごとに切断される）
+        protocol_version = "HTTP/1.1"
+        # ヘッダーと本文の分割送信による遅延ACK待ちを避ける
+        disable_nagle_algorithm = True
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            delay = app._delay()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                body = json.loads(raw) if raw else None
+                headers = {key.lower(): value for key, value in self.headers.items()}
+                status, extra, payload = app.handle(self.command, self.path, headers, body)
+            except PostgrestError as e:
+                status, extra, payload = e.status, {}, e.body
+            except (KeyError, TypeError, ValueError, json.JSONDecodeError) as e:
+                status, extra, payload = 400, {}, {"code": "PGRST102", "message": f"Invalid request: {e}", "details": None, "hint": None}
+
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in extra.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+# --- フィクスチャ ---
+
+_ITEM_NAMES = ["牛乳", "卵", "にんじん", "玉ねぎ", "鶏もも肉", "豚バラ肉", "キャベツ", "じゃがいも", "豆腐", "しめじ"]
+_DISHES = ["主菜: 生姜焼き", "主菜: 肉じゃが", "副菜: ほうれん草のおひたし", "副菜: きんぴらごぼう", "汁物: 味噌汁", "汁物: 豚汁"]
+
+
+def generate_fixtures(
+    users: int,
+    items_per_user: int,
+    histories_per_user: int,
+    mappings_per_user: int,
+    seed: int = 0
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """
+    決定的なテストデータを生成
+
+    Returns:
+        (テーブル → 行リスト, メールアドレスのリスト)
+    """
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    data: Dict[str, List[Dict[str, Any]]] = {"inventory": [], "recipe_historys": [], "ocr_item_mappings": [], "profiles": []}
+    emails = [f"user{index}@example.com" for index in range(users)]
+
+    for email in emails:
+        user_id = LocalSupabase.user_id(email)
+        data["profiles"].append({"id": user_id, "email": email})
+        for index in range(items_per_user):
+            data["inventory"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": user_id,
+                "item_name": _ITEM_NAMES[index % len(_ITEM_NAMES)] + ("" if index < len(_ITEM_NAMES) else str(index // len(_ITEM_NAMES))),
+                "quantity": rng.randint(1, 5),
+                "unit": "個",
+                "storage_location": rng.choice(["冷蔵庫", "冷凍庫", "常温倉庫", "野菜室"]),
+                "created_at": (base + timedelta(minutes=index)).isoformat(),
+            })
+        for index in range(histories_per_user):
+            data["recipe_historys"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": user_id,
+                "title": _DISHES[index % len(_DISHES)],
+                "source": rng.choice(["web", "rag"]),
+                "cooked_at": (base + timedelta(hours=8 * index)).isoformat(),
+                "ingredients": rng.sample(_ITEM_NAMES, 3),
+                "ingredients_deleted": rng.random() < 0.5,
+            })
+        for index in range(mappings_per_user):
+            data["ocr_item_mappings"].append({
+                "user_id": user_id,
+                "original_name": f"レシート表記{index}",
+                "normalized_name": _ITEM_NAMES[index % len(_ITEM_NAMES)],
+            })
+    return data, emails
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ローカルSupabaseスタンドイン（PostgREST / Auth のサブセット）")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=54321, help="待ち受けポート")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="全リクエストに加える固定遅延（ミリ秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="固定遅延に加える一様ジッターの最大値（ミリ秒）")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="テール遅延を加えるリクエストの割合（0〜1）")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="テール遅延（ミリ秒）")
+    parser.add_argument("--seed", type=int, default=0, help="遅延・フィクスチャの乱数シード")
+    parser.add_argument("--no-rpc", action="store_true", help="RPC関数を未作成の状態にする（フォールバック経路の計測用）")
+    parser.add_argument("--jwt-secret", default=LOCAL_JWT_SECRET, help="アクセストークンの署名に使うシークレット")
+    parser.add_argument("--data", help="読み込むフィクスチャ（{テーブル名: [行, ...]} のJSONファイル）")
+    parser.add_argument("--users", type=int, default=0, help="生成するテストユーザー数")
+    parser.add_argument("--items-per-user", type=int, default=50, help="ユーザーごとの在庫数")
+    parser.add_argument("--histories-per-user", type=int, default=30, help="ユーザーごとのレシピ履歴数")
+    parser.add_argument("--mappings-per-user", type=int, default=20, help="ユーザーごとのOCR変換数")
+    parser.add_argument("--token-for", action="append", default=[], help="アクセストークンを表示するメールアドレス（複数指定可）")
+    args = parser.parse_args()
+
+    server = LocalSupabase(
+        host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        tail_rate=args.tail_rate, tail_ms=args.tail_ms, seed=args.seed, rpc=not args.no_rpc,
+        jwt_secret=args.jwt_secret
+    )
+
+    emails = list(args.token_for)
+    if args.users:
+        data, generated = generate_fixtures(
+            args.users, args.items_per_user, args.histories_per_user, args.mappings_per_user, args.seed
+        )
+        server.store.load(data)
+        emails.extend(generated[:3])
+    if args.data:
+        with open(args.data, encoding="utf-8") as f:
+            server.store.load(json.load(f))
+
+    url = f"http://{args.host}:{args.port}"
+    print(f"🚀 Local Supabase stand-in listening on {url} (rpc={'on' if not args.no_rpc else 'off'}, "
+          f"latency={args.latency_ms}ms+U(0,{args.jitter_ms})ms, tail={args.tail_rate:.2%}×{args.tail_ms}ms)")
+    print("")
+    print(f"export SUPABASE_URL={url}")
+    print(f"export SUPABASE_KEY={LOCAL_ANON_KEY}")
+    print(f"export SUPABASE_JWT_SECRET={args.jwt_secret}")
+    print("export SUPABASE_JWT_USE_JWKS=false")
+    for email in emails:
+        print(f"# {email} ({server.user_id(email)})")
+        print(f"#   Bearer {server.issue_token(server.user_id(email), email)}")
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,9 @@ if TYPE_CHECKING:
 class AmbiguityDetector:
     """曖昧性検出クラス"""
     
+    # 確認メッセージ・候補一覧に必要な在庫の列
+    CONFIRMATION_FIELDS = ["id", "item_name", "quantity", "unit", "storage_location", "expiry_date", "created_at"]
+    
     def __init__(self, tool_router=None):
         """初期化"""
         self.tool_router = tool_router
@@ -113,7 +116,7 @@ class AmbiguityDetector:
                         # MCPツール経由でデータを取得
                         result = await self.tool_router.route_tool(
                             "inventory_list_by_name",
-                            {"item_name": item_name, "user_id": user_id},
+                            {"item_name": item_name, "user_id": user_id, "fields": self.CONFIRMATION_FIELDS},
                             token
                         )
                         
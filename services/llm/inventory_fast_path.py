@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+InventoryFastPath - 在庫操作の高速パス
+
+「在庫を見せて」「牛乳を2本追加」のような単純な在庫操作リクエストを
+ルールベースで解析し、LLMを呼び出さずにタスクを生成する。
+確実に解析できない場合（複数品目・条件付き・未知の表現など）はNoneを返し、
+従来通りLLMによるタスク分解にフォールバックする。
+"""
+
+import os
+import re
+import unicodedata
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from config.loggers import GenericLogger
+
+# 環境変数を読み込み
+load_dotenv()
+
+
+# 単位（inventory_add の unit にそのまま渡す）
+_UNITS = (
+    "パック", "切れ", "kg", "ml", "g", "L", "個", "本", "枚", "袋", "玉", "束",
+    "缶", "丁", "株", "房", "箱", "杯", "尾", "匹", "把", "瓶", "合",
+)
+_UNIT_PATTERN = "|".join(re.escape(unit) for unit in _UNITS)
+
+_KANJI_NUMBERS = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10}
+
+_QUANTITY = rf"(?P<quantity>\d+(?:\.\d+)?|[一二三四五六七八九十])(?P<unit>{_UNIT_PATTERN})?"
+_STORAGE = r"(?:(?P<storage>冷蔵庫|冷凍庫|野菜室|常温)に)?"
+# 食材名（複数品目の区切りや修飾語は含めない）
+_ITEM = r"(?P<item>[ぁ-んァ-ヶー一-龥a-zA-Z][ぁ-んァ-ヶー一-龥a-zA-Z0-9]{0,19}?)"
+
+# 修飾語 → strategy
+_PREFIX_STRATEGIES = (
+    (("一番古い", "最も古い", "古い方の", "古い"), "by_name_oldest"),
+    (("一番新しい", "最も新しい", "新しい方の", "新しい", "最新の"), "by_name_latest"),
+    (("全部の", "すべての", "全ての"), "by_name_all"),
+)
+_SUFFIX_ALL = ("全部", "すべて", "全て")
+
+_PREFIX = r"(?P<prefix>" + "|".join(
+    re.escape(word) for words, _ in _PREFIX_STRATEGIES for word in words
+) + r")?"
+_SUFFIX = r"(?P<suffix>" + "|".join(_SUFFIX_ALL) + r")?"
+
+_POLITE = r"(?:して|してください|ください|したい|して欲しい|してほしい)?"
+
+_LIST_RE = re.compile(
+    r"^(?:今の|現在の)?在庫(?:一覧|リスト)?(?:を|は)?"
+    r"(?:見せて|確認して|確認|教えて|表示して|表示|出して|見たい)?(?:ください)?$"
+)
+_ADD_RE = re.compile(rf"^{_STORAGE}{_ITEM}(?:を)?{_QUANTITY}{_STORAGE.replace('storage', 'storage2')}追加{_POLITE}$")
+_DELETE_RE = re.compile(rf"^{_PREFIX}{_ITEM}(?:を)?{_SUFFIX}(?:削除|消去){_POLITE}$")
+_UPDATE_RE = re.compile(
+    rf"^{_PREFIX}{_ITEM}(?:を)?{_SUFFIX}{_QUANTITY}に(?:変えて|変更して|更新して|して)(?:ください)?$"
+)
+
+# 食材名として扱わない語（含まれる場合はLLMに任せる）
+_AMBIGUOUS_ITEM_WORDS = ("在庫", "全部", "すべて", "全て", "古い", "新しい", "最新", "と", "や", "の")
+
+
+class InventoryFastPath:
+    """在庫操作のルールベースタスク生成"""
+
+    def __init__(self):
+        """初期化"""
+        self.logger = GenericLogger("service", "llm.inventory_fast_path")
+        # キルスイッチ（falseで常にLLMによるタスク分解を行う）
+        self.enabled = os.getenv("INVENTORY_FAST_PATH_ENABLED", "true").lower() == "true"
+        self.stats = {"hits": 0, "fallbacks": 0}
+
+    @staticmethod
+    def _normalize(request: str) -> str:
+        """全角英数字・空白・末尾の句読点を正規化"""
+        text = unicodedata.normalize("NFKC", request)
+        text = re.sub(r"\s+", "", text)
+        return text.rstrip("。.!！?？")
+
+    @staticmethod
+    def _parse_quantity(value: str) -> float:
+        if value in _KANJI_NUMBERS:
+            return _KANJI_NUMBERS[value]
+        quantity = float(value)
+        return int(quantity) if quantity.is_integer() else quantity
+
+    @staticmethod
+    def _is_clear_item(item: str) -> bool:
+        return not any(word in item for word in _AMBIGUOUS_ITEM_WORDS)
+
+    @staticmethod
+    def _strategy(prefix: Optional[str], suffix: Optional[str]) -> Optional[str]:
+        """修飾語からstrategyを判定（矛盾する指定はNone）"""
+        strategies = set()
+        for words, strategy in _PREFIX_STRATEGIES:
+            if prefix in words:
+                strategies.add(strategy)
+        if suffix:
+            strategies.add("by_name_all")
+        if len(strategies) > 1:
+            return None
+        return strategies.pop() if strategies else "by_name"
+
+    @staticmethod
+    def _task(method: str, parameters: Dict[str, Any], user_id: str) -> List[Dict[str, Any]]:
+        parameters["user_id"] = user_id
+        return [{
+            "service": "inventory_service",
+            "method": method,
+            "parameters": parameters,
+            "dependencies": []
+        }]
+
+    def _match(self, text: str, user_id: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        if _LIST_RE.match(text):
+            return "get_inventory", self._task("get_inventory", {}, user_id)
+
+        match = _ADD_RE.match(text)
+        if match and self._is_clear_item(match["item"]):
+            storage = match["storage"] or match["storage2"]
+            if match["storage"] and match["storage2"]:
+                return None
+            parameters = {
+                "item_name": match["item"],
+                "quantity": self._parse_quantity(match["quantity"]),
+            }
+            if match["unit"]:
+                parameters["unit"] = match["unit"]
+            if storage:
+                parameters["storage_location"] = storage
+            return "add_inventory", self._task("add_inventory", parameters, user_id)
+
+        match = _UPDATE_RE.match(text)
+        if match and self._is_clear_item(match["item"]):
+            strategy = self._strategy(match["prefix"], match["suffix"])
+            if strategy is None:
+                return None
+            parameters = {
+                "item_identifier": match["item"],
+                "updates": {"quantity": self._parse_quantity(match["quantity"])},
+                "strategy": strategy,
+            }
+            return "update_inventory", self._task("update_inventory", parameters, user_id)
+
+        match = _DELETE_RE.match(text)
+        if match and self._is_clear_item(match["item"]):
+            strategy = self._strategy(match["prefix"], match["suffix"])
+            if strategy is None:
+                return None
+            parameters = {"item_identifier": match["item"], "strategy": strategy}
+            return "delete_inventory", self._task("delete_inventory", parameters, user_id)
+
+        return None
+
+    def parse(self, request: str, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        在庫操作リクエストを解析してタスクを生成
+
+        Args:
+            request: ユーザーリクエスト
+            user_id: ユーザーID
+
+        Returns:
+            タスクリスト（convert_to_task_format と同じ形式）、確実に解析できない場合はNone
+        """
+        if not self.enabled:
+            return None
+
+        matched = self._match(self._normalize(request), user_id)
+        if matched is None:
+            self.stats["fallbacks"] += 1
+            self.logger.info(f"🔍 [InventoryFastPath] Not confident, falling back to LLM: '{request}'")
+            return None
+
+        method, tasks = matched
+        self.stats["hits"] += 1
+        self.logger.info(f"⚡ [InventoryFastPath] Parsed '{request}' → inventory_service.{method} {tasks[0]['parameters']}")
+        return tasks
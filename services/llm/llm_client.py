@@ -7,9 +7,10 @@ OpenAI API呼び出しとフォールバック処理を担当
 """
 
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
+from config.clients import get_openai_client
 from config.loggers import GenericLogger, log_prompt_with_tokens
 
 # 環境変数を読み込み
@@ -21,8 +22,13 @@ class LLMClient:
     
     MAX_TOKENS = 3000  # マックストークン数
     
-    def __init__(self):
-        """初期化"""
+    def __init__(self, openai_client: Optional[AsyncOpenAI] = None):
+        """
+        初期化
+        
+        Args:
+            openai_client: 使用するOpenAIクライアント（省略時はプロセス共有クライアント）
+        """
         self.logger = GenericLogger("service", "llm.client")
         
         # OpenAI設定を環境変数から取得
@@ -30,9 +36,11 @@ class LLMClient:
         self.openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.openai_temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.8"))
         
-        # OpenAIクライアントを初期化
-        if self.openai_api_key:
-            self.openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+        # OpenAIクライアントを初期化（接続プールを共有するためリクエストごとに生成しない）
+        if openai_client is None and self.openai_api_key:
+            openai_client = get_openai_client()
+        if openai_client is not None:
+            self.openai_client = openai_client
             self.logger.info(f"✅ [LLMClient] OpenAI client initialized with model: {self.openai_model}")
         else:
             self.openai_client = None
@@ -59,10 +67,7 @@ class LLMClient:
             
             response = await self.openai_client.chat.completions.create(
                 model=self.openai_model,
-                messages=[
-                    {"role": "system", "content": "あなたは優秀なタスク分解アシスタントです。ユーザーの要求を適切なサービスクラスのメソッド呼び出しに分解してください。"},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_messages(prompt),
                 temperature=self.openai_temperature,
                 max_tokens=self.MAX_TOKENS
             )
@@ -79,6 +84,59 @@ class LLMClient:
             self.logger.error(f"❌ [LLMClient] OpenAI API call failed: {e}")
             raise
     
+    async def stream_openai_api(self, prompt: str) -> AsyncIterator[str]:
+        """
+        OpenAI APIをストリーミングモードで呼び出し、受信したテキストを逐次返す
+        
+        Args:
+            prompt: 送信するプロンプト
+        
+        Yields:
+            LLMからのレスポンス（受信したチャンク単位）
+        """
+        try:
+            if not self.openai_client:
+                raise Exception("OpenAI client not initialized")
+            
+            self.logger.info(f"🔧 [LLMClient] Streaming OpenAI API with model: {self.openai_model}")
+            
+            # プロンプトとトークン数をログ出力（5行省略表示）
+            log_prompt_with_tokens(prompt, max_tokens=self.MAX_TOKENS, logger_name="service.llm")
+            
+            stream = await self.openai_client.chat.completions.create(
+                model=self.openai_model,
+                messages=self._build_messages(prompt),
+                temperature=self.openai_temperature,
+                max_tokens=self.MAX_TOKENS,
+                stream=True
+            )
+            
+            chunks = []
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+            
+            content = "".join(chunks)
+            self.logger.info(f"✅ [LLMClient] OpenAI API stream completed: {len(content)} characters")
+            
+            # LLMレスポンスを改行付きでログ出力
+            self.logger.info(f"📄 [LLMClient] LLM Response:\n{content}")
+            
+        except Exception as e:
+            self.logger.error(f"❌ [LLMClient] OpenAI API stream failed: {e}")
+            raise
+    
+    def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """タスク分解用のメッセージを構築"""
+        return [
+            {"role": "system", "content": "あなたは優秀なタスク分解アシスタントです。ユーザーの要求を適切なサービスクラスのメソッド呼び出しに分解してください。"},
+            {"role": "user", "content": prompt}
+        ]
+    
     def get_fallback_tasks(self, user_id: str) -> List[Dict[str, Any]]:
         """
         フォールバック用のタスク（LLM呼び出し失敗時）
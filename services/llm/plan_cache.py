@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+PlanTemplateCache - タスク分解テンプレートキャッシュ
+
+RequestAnalyzerのパターン判定結果（パターン + 抽出パラメータの形）をキーに、
+検証済みのタスクDAGテンプレートを保持し、LLMによるタスク分解を省略する。
+テンプレートは宣言済みテンプレート（各パターンのプロンプトで指示している構成）と、
+過去のLLM分解結果から学習したテンプレートの2種類。
+"""
+
+import copy
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from config.loggers import GenericLogger
+
+# 環境変数を読み込み
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Param:
+    """テンプレート内のプレースホルダ（インスタンス化時に現在のパラメータで置換）"""
+    name: str
+
+
+# テンプレート化するパターン（タスク構成がパターンだけで決まるもの）
+# inventory はユーザー要求から食材名・数量等をLLMで抽出する必要があるため対象外
+CACHEABLE_PATTERNS = (
+    "main", "sub", "soup",
+    "main_additional", "sub_additional", "soup_additional",
+    "menu",
+)
+
+# パラメータの形（キャッシュキー）に含めない項目
+_SHAPE_EXCLUDED_PARAMS = ("user_id", "user_request")
+
+# プレースホルダに置換するパラメータ（学習時に値が一致したものを置換）
+_PLACEHOLDER_PARAMS = ("user_id", "sse_session_id", "main_ingredient", "used_ingredients", "menu_category")
+
+_TASK_REF_PATTERN = re.compile(r"\b(task\d+)\.result\b")
+
+
+def _task(service: str, method: str, parameters: Dict[str, Any], dependencies: List[str]) -> Dict[str, Any]:
+    return {"service": service, "method": method, "parameters": parameters, "dependencies": dependencies}
+
+
+def _proposal_template(category: str, extra_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """主菜・副菜・汁物提案の4段階タスク構成（各提案プロンプトと同じ構成）"""
+    proposal_params = {
+        "inventory_items": "task1.result",
+        "excluded_recipes": "task2.result.data",
+        "category": category,
+        "user_id": Param("user_id"),
+    }
+    proposal_params.update(extra_params)
+    return [
+        _task("inventory_service", "get_inventory", {"user_id": Param("user_id")}, []),
+        _task("history_service", "history_get_recent_titles",
+              {"user_id": Param("user_id"), "category": category, "days": 14}, ["task1"]),
+        _task("recipe_service", "generate_proposals", proposal_params, ["task1", "task2"]),
+        _task("recipe_service", "search_recipes_from_web",
+              {"recipe_titles": "task3.result.data.candidates", "user_id": Param("user_id")}, ["task3"]),
+    ]
+
+
+def _additional_template(category: str) -> List[Dict[str, Any]]:
+    """追加提案の4段階タスク構成（追加提案プロンプトと同じ構成）"""
+    return [
+        _task("history_service", "history_get_recent_titles",
+              {"user_id": Param("user_id"), "category": category, "days": 14}, []),
+        _task("session_service", "session_get_proposed_titles",
+              {"sse_session_id": Param("sse_session_id"), "category": category, "user_id": Param("user_id")}, []),
+        _task("recipe_service", "generate_proposals", {
+            "inventory_items": "session.context.inventory_items",
+            "excluded_recipes": "task1.result.data + task2.result.data",
+            "main_ingredient": "session.context.main_ingredient",
+            "menu_type": "session.context.menu_type",
+            "category": category,
+            "user_id": Param("user_id"),
+        }, ["task1", "task2"]),
+        _task("recipe_service", "search_recipes_from_web",
+              {"recipe_titles": "task3.result.data.candidates", "user_id": Param("user_id")}, ["task3"]),
+    ]
+
+
+def _menu_template() -> List[Dict[str, Any]]:
+    """献立生成の4段階タスク構成（献立プロンプトの具体例と同じ構成）"""
+    return [
+        _task("inventory_service", "get_inventory", {"user_id": Param("user_id")}, []),
+        _task("recipe_service", "generate_menu_plan",
+              {"inventory_items": "task1.result", "user_id": Param("user_id")}, ["task1"]),
+        _task("recipe_service", "search_menu_from_rag",
+              {"inventory_items": "task1.result", "user_id": Param("user_id")}, ["task1"]),
+        _task("recipe_service", "search_recipes_from_web", {
+            "recipe_titles": [
+                "task2.result.data.main_dish", "task2.result.data.side_dish", "task2.result.data.soup",
+                "task3.result.data.main_dish", "task3.result.data.side_dish", "task3.result.data.soup",
+            ],
+            "menu_categories": ["main_dish", "side_dish", "soup", "main_dish", "side_dish", "soup"],
+            "menu_source": "mixed",
+            "num_results": 3,
+            "user_id": Param("user_id"),
+        }, ["task2", "task3"]),
+    ]
+
+
+DECLARED_TEMPLATES: Dict[str, List[Dict[str, Any]]] = {
+    "main": _proposal_template("main", {"main_ingredient": Param("main_ingredient")}),
+    "sub": _proposal_template("sub", {"used_ingredients": Param("used_ingredients")}),
+    "soup": _proposal_template("soup", {
+        "used_ingredients": Param("used_ingredients"),
+        "menu_category": Param("menu_category"),
+    }),
+    "main_additional": _additional_template("main"),
+    "sub_additional": _additional_template("sub"),
+    "soup_additional": _additional_template("soup"),
+    "menu": _menu_template(),
+}
+
+
+class PlanTemplateCache:
+    """タスク分解テンプレートキャッシュ"""
+
+    def __init__(self):
+        """初期化"""
+        self.logger = GenericLogger("service", "llm.plan_cache")
+
+        # キルスイッチ（falseで常にLLMによるタスク分解を行う）
+        self.enabled = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+        self.use_declared_templates = os.getenv("PLAN_CACHE_DECLARED_TEMPLATES", "true").lower() == "true"
+        # 同じ構成のLLM分解結果が何回得られたら学習するか（0で学習しない）
+        self.learn_threshold = int(os.getenv("PLAN_CACHE_LEARN_THRESHOLD", "2"))
+
+        # (パターン, パラメータの形) → テンプレート
+        self._learned: Dict[Tuple[str, Tuple], List[Dict[str, Any]]] = {}
+        # (パターン, パラメータの形) → (テンプレートのフィンガープリント, 一致回数)
+        self._candidates: Dict[Tuple[str, Tuple], Tuple[str, int]] = {}
+
+        self.stats = {"hits": 0, "misses": 0, "declared_hits": 0, "learned": 0, "rejected": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        """キャッシュヒット率"""
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """メトリクスを取得"""
+        return {
+            **self.stats,
+            "hit_rate": round(self.hit_rate, 4),
+            "learned_templates": len(self._learned),
+            "enabled": self.enabled,
+        }
+
+    @staticmethod
+    def _param_shape(value: Any) -> str:
+        if value is None:
+            return "none"
+        if isinstance(value, (list, tuple)):
+            return "list" if value else "empty_list"
+        return type(value).__name__
+
+    def _cache_key(self, analysis_result: Dict[str, Any]) -> Tuple[str, Tuple]:
+        """キャッシュキー: (パターン, 抽出パラメータの形)"""
+        params = analysis_result.get("params", {})
+        shape = tuple(sorted(
+            (key, self._param_shape(value))
+            for key, value in params.items()
+            if key not in _SHAPE_EXCLUDED_PARAMS
+        ))
+        return analysis_result["pattern"], shape
+
+    @staticmethod
+    def _placeholder_values(analysis_result: Dict[str, Any], user_id: str, sse_session_id: Optional[str]) -> Dict[str, Any]:
+        params = analysis_result.get("params", {})
+        values = {name: params.get(name) for name in _PLACEHOLDER_PARAMS}
+        values["user_id"] = user_id
+        values["sse_session_id"] = sse_session_id
+        return values
+
+    def is_cacheable(self, analysis_result: Dict[str, Any]) -> bool:
+        """キャッシュ対象のリクエストか"""
+        return self.enabled and analysis_result.get("pattern") in CACHEABLE_PATTERNS
+
+    def lookup(self, analysis_result: Dict[str, Any], user_id: str, sse_session_id: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        テンプレートを検索し、現在のパラメータでインスタンス化
+
+        Args:
+            analysis_result: RequestAnalyzerの分析結果
+            user_id: ユーザーID
+            sse_session_id: SSEセッションID
+
+        Returns:
+            タスクリスト（convert_to_task_format と同じ形式）、ヒットしない場合はNone
+        """
+        if not self.is_cacheable(analysis_result):
+            return None
+
+        pattern = analysis_result["pattern"]
+        template = self._learned.get(self._cache_key(analysis_result))
+        source = "learned"
+        if template is None and self.use_declared_templates:
+            template = DECLARED_TEMPLATES.get(pattern)
+            source = "declared"
+
+        if template is None:
+            self.stats["misses"] += 1
+            self.logger.info(f"🔍 [PlanCache] Miss: pattern={pattern} (hit_rate={self.hit_rate:.2%})")
+            return None
+
+        self.stats["hits"] += 1
+        if source == "declared":
+            self.stats["declared_hits"] += 1
+
+        values = self._placeholder_values(analysis_result, user_id, sse_session_id)
+        tasks = self._instantiate(template, values)
+        self.logger.info(f"⚡ [PlanCache] Hit ({source}): pattern={pattern}, {len(tasks)} tasks (hit_rate={self.hit_rate:.2%})")
+        return tasks
+
+    def _instantiate(self, value: Any, values: Dict[str, Any]) -> Any:
+        if isinstance(value, Param):
+            return copy.deepcopy(values.get(value.name))
+        if isinstance(value, dict):
+            return {key: self._instantiate(item, values) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._instantiate(item, values) for item in value]
+        return value
+
+    def learn(self, analysis_result: Dict[str, Any], tasks: List[Dict[str, Any]], user_id: str, sse_session_id: Optional[str] = None) -> bool:
+        """
+        LLMによるタスク分解結果からテンプレートを学習
+
+        パラメータ値をプレースホルダに置換したうえでDAGとして検証し、
+        同じキーで同じ構成が learn_threshold 回得られたら採用する
+        （リクエスト固有の値を含む分解結果は一致しないため採用されない）。
+
+        Returns:
+            テンプレートとして採用された場合True
+        """
+        if not self.is_cacheable(analysis_result) or self.learn_threshold <= 0 or not tasks:
+            return False
+
+        key = self._cache_key(analysis_result)
+        if key in self._learned:
+            return False
+
+        values = self._placeholder_values(analysis_result, user_id, sse_session_id)
+        template = [self._abstract_task(task, values) for task in tasks]
+
+        error = self._validate(template)
+        if error:
+            self.stats["rejected"] += 1
+            self.logger.info(f"⚠️ [PlanCache] Plan not cacheable (pattern={key[0]}): {error}")
+            return False
+
+        fingerprint = json.dumps(template, sort_keys=True, ensure_ascii=False, default=lambda p: f"<{p.name}>")
+        previous_fingerprint, count = self._candidates.get(key, (None, 0))
+        count = count + 1 if previous_fingerprint == fingerprint else 1
+        self._candidates[key] = (fingerprint, count)
+
+        if count < self.learn_threshold:
+            return False
+
+        self._learned[key] = template
+        self._candidates.pop(key, None)
+        self.stats["learned"] += 1
+        self.logger.info(f"📚 [PlanCache] Learned template: pattern={key[0]}, {len(template)} tasks")
+        return True
+
+    def _abstract_task(self, task: Dict[str, Any], values: Dict[str, Any]) -> Dict[str, Any]:
+        parameters = {}
+        for name, value in (task.get("parameters") or {}).items():
+            placeholder = next(
+                (param for param, param_value in values.items()
+                 if param_value not in (None, "", []) and value == param_value),
+                None
+            )
+            parameters[name] = Param(placeholder) if placeholder else copy.deepcopy(value)
+        return _task(task.get("service"), task.get("method"), parameters, list(task.get("dependencies") or []))
+
+    @staticmethod
+    def _validate(template: List[Dict[str, Any]]) -> Optional[str]:
+        """テンプレートのDAG検証（問題があればエラーメッセージを返す）"""
+        for index, task in enumerate(template):
+            task_id = f"task{index + 1}"
+            if not task.get("service") or not task.get("method"):
+                return f"{task_id} has no service/method"
+
+            dependencies = task["dependencies"]
+            for dep_id in dependencies:
+                # タスクIDは位置で決まるため、前方のタスクへの依存のみ許可（循環しない）
+                if not isinstance(dep_id, str) or not dep_id.startswith("task") or not dep_id[4:].isdigit():
+                    return f"{task_id} has invalid dependency {dep_id!r}"
+                if not 1 <= int(dep_id[4:]) <= index:
+                    return f"{task_id} depends on {dep_id} which does not precede it"
+
+            # 先行タスクの結果参照は依存関係に含まれている必要がある
+            references = set()
+            for value in task["parameters"].values():
+                for item in (value if isinstance(value, list) else [value]):
+                    if isinstance(item, str):
+                        references.update(_TASK_REF_PATTERN.findall(item))
+            missing = references - set(dependencies)
+            if missing:
+                return f"{task_id} references {sorted(missing)} without depending on them"
+
+        return None
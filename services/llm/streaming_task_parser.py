@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+StreamingTaskParser - ストリーミングレスポンスの逐次タスク解析
+
+LLMのストリーミングレスポンス（{"tasks": [{...}, {...}]} 形式）をチャンク単位で受け取り、
+タスク配列の要素（JSONオブジェクト）が閉じた時点で1件ずつ取り出す。
+```json ... ``` で囲まれたレスポンスにも対応する。
+"""
+
+import json
+import re
+from typing import Dict, Any, List
+
+_TASKS_ARRAY_RE = re.compile(r'"tasks"\s*:\s*\[')
+
+
+class StreamingTaskParser:
+    """タスク配列の逐次パーサー"""
+
+    def __init__(self):
+        """初期化"""
+        self._text = ""
+        self._pos = 0
+        self._in_array = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+
+    @property
+    def text(self) -> str:
+        """これまでに受信したレスポンス全体"""
+        return self._text
+
+    @property
+    def finished(self) -> bool:
+        """タスク配列の終端（]）まで解析済みか"""
+        return self._finished
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        チャンクを追加し、新たに完成したタスクを返す
+
+        Args:
+            chunk: ストリーミングで受信したテキスト
+
+        Returns:
+            このチャンクで完成したタスクのリスト
+
+        Raises:
+            json.JSONDecodeError: 完成したタスクがJSONとして不正な場合
+        """
+        self._text += chunk
+        if self._finished:
+            return []
+
+        if not self._in_array:
+            match = _TASKS_ARRAY_RE.search(self._text, max(0, self._pos - 16))
+            if match is None:
+                self._pos = len(self._text)
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        tasks = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    tasks.append(json.loads(text[self._object_start:i + 1]))
+                    self._object_start = -1
+            elif char == "]" and self._depth == 0:
+                self._finished = True
+                break
+        self._pos = len(text)
+        return tasks
@@ -6,28 +6,43 @@ LLM呼び出しのコントロール専用サービス
 分割されたサブモジュールを使用してLLM機能を提供
 """
 
-from typing import Dict, Any, List, Optional
+import copy
+from typing import Dict, Any, List, Optional, AsyncIterator
 from config.loggers import GenericLogger
 from .llm.prompt_manager import PromptManager
 from .llm.response_processor import ResponseProcessor
 from .llm.llm_client import LLMClient
 from .llm.request_analyzer import RequestAnalyzer
+from .llm.plan_cache import PlanTemplateCache
+from .llm.inventory_fast_path import InventoryFastPath
+from .llm.streaming_task_parser import StreamingTaskParser
 
 
 class LLMService:
     """LLM呼び出しサービス"""
     
-    def __init__(self):
-        """初期化"""
+    def __init__(self, llm_client: Optional[LLMClient] = None):
+        """
+        初期化
+        
+        Args:
+            llm_client: 使用するLLMClient（省略時は新規作成）
+        """
         self.logger = GenericLogger("service", "llm")
         
         # 分割されたサブモジュールを初期化
         self.prompt_manager = PromptManager()
         self.response_processor = ResponseProcessor()
-        self.llm_client = LLMClient()
+        self.llm_client = llm_client or LLMClient()
         
         # Phase 2.5A: RequestAnalyzer を追加
         self.request_analyzer = RequestAnalyzer()
+        
+        # パターン別タスク分解テンプレートキャッシュ（ヒット時はLLM呼び出しを省略）
+        self.plan_cache = PlanTemplateCache()
+        
+        # 単純な在庫操作のルールベース解析（解析できない場合のみLLMを使用）
+        self.inventory_fast_path = InventoryFastPath()
     
     async def decompose_tasks(
         self, 
@@ -54,39 +69,13 @@ class LLMService:
             self.logger.info(f"🔧 [LLMService] Decomposing tasks for user: {user_id}")
             self.logger.info(f"📝 [LLMService] User request: '{user_request}'")
             
-            # Phase 2.5C: リクエスト分析（RequestAnalyzer を使用）
-            analysis_result = self.request_analyzer.analyze(
-                request=user_request,
-                user_id=user_id,
-                sse_session_id=sse_session_id,
-                session_context=session_context or {}
-            )
+            analysis_result = self._analyze_request(user_request, user_id, sse_session_id, session_context)
             
-            self.logger.info(f"🔍 [LLMService] Analysis result: pattern={analysis_result['pattern']}")
-            
-            # 曖昧性がある場合、確認質問を返す
-            if analysis_result["ambiguities"]:
-                self.logger.info(f"⚠️ [LLMService] Ambiguity detected: {len(analysis_result['ambiguities'])} ambiguities")
-                # TODO: 曖昧性確認の実装（Phase 1B参照）
-                # 現時点では既存の処理を続行
-            
-            # Phase 2.5C: 動的プロンプト構築（新プロンプトマネージャーを強制使用）
-            from .llm.prompt_manager import PromptManager as NewPromptManager
-            new_prompt_manager = NewPromptManager()
-            
-            try:
-                prompt = new_prompt_manager.build_prompt(
-                    analysis_result=analysis_result,
-                    user_id=user_id,
-                    sse_session_id=sse_session_id
-                )
-                self.logger.info(f"✅ [LLMService] Dynamic prompt built using RequestAnalyzer (pattern={analysis_result['pattern']})")
-            except Exception as e:
-                import traceback
-                self.logger.error(f"❌ [LLMService] Failed to build dynamic prompt: {e}")
-                self.logger.error(traceback.format_exc())
-                # Phase 2.5C完了後はエラーを例外として扱う（フォールバックしない）
-                raise
+            shortcut_tasks = self._get_shortcut_tasks(analysis_result, user_request, user_id, sse_session_id)
+            if shortcut_tasks is not None:
+                return shortcut_tasks
+            
+            prompt = self._build_prompt(analysis_result, user_id, sse_session_id)
             
             # 2. OpenAI API呼び出し
             response = await self.llm_client.call_openai_api(prompt)
@@ -98,40 +87,12 @@ class LLMService:
             converted_tasks = self.response_processor.convert_to_task_format(tasks, user_id)
 
             # 5. 重要: パターンに基づきカテゴリ等を強制整合（LLMの記述ぶれ対策）
-            try:
-                desired_category = analysis_result.get("params", {}).get("category")
-                if desired_category in {"main", "sub", "soup"}:
-                    for t in converted_tasks:
-                        service = (t.get("service") or "").lower()
-                        method = (t.get("method") or "").lower()
-                        params = t.get("parameters") or {}
-
-                        # recipe_service.generate_proposals の category を強制上書き
-                        if service == "recipe_service" and method == "generate_proposals":
-                            params["category"] = desired_category
-                            t["parameters"] = params
-
-                        # history_service.history_get_recent_titles の category を強制上書き
-                        if service == "history_service" and method == "history_get_recent_titles":
-                            params["category"] = desired_category
-                            t["parameters"] = params
-
-                        # session_service.session_get_proposed_titles の category を強制上書き
-                        if service == "session_service" and method == "session_get_proposed_titles":
-                            params["category"] = desired_category
-                            t["parameters"] = params
-            except Exception as e:
-                self.logger.warning(f"⚠️ [LLMService] Failed to enforce category from analysis_result: {e}")
-            
-            # 生成されたタスクの詳細をログ出力
-            self.logger.info(f"✅ [LLMService] Tasks decomposed successfully: {len(converted_tasks)} tasks")
-            for i, task in enumerate(converted_tasks, 1):
-                self.logger.info(f"📋 [LLMService] Task {i}:")
-                self.logger.info(f"  Service: {task.get('service')}")
-                self.logger.info(f"  Method: {task.get('method')}")
-                self.logger.info(f"  Parameters: {task.get('parameters')}")
-                self.logger.info(f"  Dependencies: {task.get('dependencies')}")
+            self._enforce_category(converted_tasks, analysis_result)
             
+            # 検証済みの分解結果をテンプレート候補として記録
+            self.plan_cache.learn(analysis_result, converted_tasks, user_id, sse_session_id)
+            
+            self._log_decomposed_tasks(converted_tasks)
             return converted_tasks
             
         except Exception as e:
@@ -139,6 +100,193 @@ class LLMService:
             # エラー時はフォールバック
             return self.llm_client.get_fallback_tasks(user_id)
     
+    async def stream_decompose_tasks(
+        self, 
+        user_request: str, 
+        available_tools: List[str], 
+        user_id: str,
+        sse_session_id: str = None,
+        session_context: dict = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        ストリーミングLLM呼び出しによるタスク分解
+        
+        decompose_tasks と同じ形式のタスクを、LLMがタスク配列の要素を書き終えた時点で
+        1件ずつ返す（テンプレートキャッシュ・高速パスにヒットした場合は一括で返す）。
+        
+        Args:
+            user_request: ユーザーリクエスト
+            available_tools: 利用可能なツールリスト
+            user_id: ユーザーID
+            sse_session_id: SSEセッションID
+            session_context: セッションコンテキスト
+        
+        Yields:
+            分解されたタスク
+        
+        Raises:
+            Exception: タスクを1件以上返した後にLLM呼び出し・解析が失敗した場合
+        """
+        emitted_tasks = []
+        try:
+            self.logger.info(f"🔧 [LLMService] Stream-decomposing tasks for user: {user_id}")
+            self.logger.info(f"📝 [LLMService] User request: '{user_request}'")
+            
+            analysis_result = self._analyze_request(user_request, user_id, sse_session_id, session_context)
+            
+            shortcut_tasks = self._get_shortcut_tasks(analysis_result, user_request, user_id, sse_session_id)
+            if shortcut_tasks is not None:
+                for task in shortcut_tasks:
+                    emitted_tasks.append(task)
+                    yield task
+                return
+            
+            prompt = self._build_prompt(analysis_result, user_id, sse_session_id)
+            
+            # 学習用に実行前のタスクを保持（後続処理でパラメータが書き換えられるため）
+            planned_tasks = []
+            parser = StreamingTaskParser()
+            async for chunk in self.llm_client.stream_openai_api(prompt):
+                for task in parser.feed(chunk):
+                    converted_task = self._convert_streamed_task(task, analysis_result, user_id)
+                    self.logger.info(f"⚡ [LLMService] Task {len(emitted_tasks) + 1} parsed from stream: {converted_task.get('service')}.{converted_task.get('method')}")
+                    planned_tasks.append(copy.deepcopy(converted_task))
+                    emitted_tasks.append(converted_task)
+                    yield converted_task
+            
+            if not emitted_tasks:
+                # 逐次解析できない形式の場合はレスポンス全体を解析
+                tasks = self.response_processor.parse_llm_response(parser.text)
+                converted_tasks = self.response_processor.convert_to_task_format(tasks, user_id)
+                self._enforce_category(converted_tasks, analysis_result)
+                planned_tasks = copy.deepcopy(converted_tasks)
+                for task in converted_tasks:
+                    emitted_tasks.append(task)
+                    yield task
+            
+            # 検証済みの分解結果をテンプレート候補として記録
+            self.plan_cache.learn(analysis_result, planned_tasks, user_id, sse_session_id)
+            
+            self._log_decomposed_tasks(planned_tasks)
+            
+        except Exception as e:
+            self.logger.error(f"❌ [LLMService] Error in stream_decompose_tasks: {e}")
+            if emitted_tasks:
+                # 一部のタスクは既に実行に渡しているためフォールバックできない
+                raise
+            # エラー時はフォールバック
+            for task in self.llm_client.get_fallback_tasks(user_id):
+                yield task
+    
+    def _analyze_request(self, user_request: str, user_id: str, sse_session_id: str, session_context: Optional[dict]) -> Dict[str, Any]:
+        """リクエストを分析してパターン・パラメータを取得"""
+        # Phase 2.5C: リクエスト分析（RequestAnalyzer を使用）
+        analysis_result = self.request_analyzer.analyze(
+            request=user_request,
+            user_id=user_id,
+            sse_session_id=sse_session_id,
+            session_context=session_context or {}
+        )
+        
+        self.logger.info(f"🔍 [LLMService] Analysis result: pattern={analysis_result['pattern']}")
+        
+        # 曖昧性がある場合、確認質問を返す
+        if analysis_result["ambiguities"]:
+            self.logger.info(f"⚠️ [LLMService] Ambiguity detected: {len(analysis_result['ambiguities'])} ambiguities")
+            # TODO: 曖昧性確認の実装（Phase 1B参照）
+            # 現時点では既存の処理を続行
+        
+        return analysis_result
+    
+    def _get_shortcut_tasks(self, analysis_result: Dict[str, Any], user_request: str, user_id: str, sse_session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """LLMを呼び出さずに生成できるタスク（テンプレートキャッシュ・在庫高速パス）を取得"""
+        # テンプレートキャッシュにヒットした場合はLLMによるタスク分解を省略
+        cached_tasks = self.plan_cache.lookup(analysis_result, user_id, sse_session_id)
+        if cached_tasks is not None:
+            self.logger.info(f"✅ [LLMService] Tasks instantiated from plan template: {len(cached_tasks)} tasks")
+            return cached_tasks
+        
+        # 単純な在庫操作はLLMを呼び出さずにタスクを生成
+        if analysis_result["pattern"] == "inventory":
+            fast_path_tasks = self.inventory_fast_path.parse(user_request, user_id)
+            if fast_path_tasks is not None:
+                self.logger.info(f"✅ [LLMService] Tasks generated by inventory fast path: {len(fast_path_tasks)} tasks")
+                return fast_path_tasks
+        
+        return None
+    
+    def _build_prompt(self, analysis_result: Dict[str, Any], user_id: str, sse_session_id: str) -> str:
+        """分析結果からタスク分解プロンプトを構築"""
+        # Phase 2.5C: 動的プロンプト構築（新プロンプトマネージャーを強制使用）
+        from .llm.prompt_manager import PromptManager as NewPromptManager
+        new_prompt_manager = NewPromptManager()
+        
+        try:
+            prompt = new_prompt_manager.build_prompt(
+                analysis_result=analysis_result,
+                user_id=user_id,
+                sse_session_id=sse_session_id
+            )
+            self.logger.info(f"✅ [LLMService] Dynamic prompt built using RequestAnalyzer (pattern={analysis_result['pattern']})")
+            return prompt
+        except Exception as e:
+            import traceback
+            self.logger.error(f"❌ [LLMService] Failed to build dynamic prompt: {e}")
+            self.logger.error(traceback.format_exc())
+            # Phase 2.5C完了後はエラーを例外として扱う（フォールバックしない）
+            raise
+    
+    def _convert_streamed_task(self, task: Dict[str, Any], analysis_result: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """ストリームから取り出した1タスクをタスク形式に変換"""
+        parameters = task.get("parameters", {})
+        if "user_id" not in parameters:
+            parameters["user_id"] = user_id
+        converted_task = {
+            "service": task.get("service"),
+            "method": task.get("method"),
+            "parameters": parameters,
+            "dependencies": task.get("dependencies", [])
+        }
+        self._enforce_category([converted_task], analysis_result)
+        return converted_task
+    
+    def _enforce_category(self, tasks: List[Dict[str, Any]], analysis_result: Dict[str, Any]) -> None:
+        """パターンに基づきカテゴリ等を強制整合（LLMの記述ぶれ対策）"""
+        try:
+            desired_category = analysis_result.get("params", {}).get("category")
+            if desired_category in {"main", "sub", "soup"}:
+                for t in tasks:
+                    service = (t.get("service") or "").lower()
+                    method = (t.get("method") or "").lower()
+                    params = t.get("parameters") or {}
+
+                    # recipe_service.generate_proposals の category を強制上書き
+                    if service == "recipe_service" and method == "generate_proposals":
+                        params["category"] = desired_category
+                        t["parameters"] = params
+
+                    # history_service.history_get_recent_titles の category を強制上書き
+                    if service == "history_service" and method == "history_get_recent_titles":
+                        params["category"] = desired_category
+                        t["parameters"] = params
+
+                    # session_service.session_get_proposed_titles の category を強制上書き
+                    if service == "session_service" and method == "session_get_proposed_titles":
+                        params["category"] = desired_category
+                        t["parameters"] = params
+        except Exception as e:
+            self.logger.warning(f"⚠️ [LLMService] Failed to enforce category from analysis_result: {e}")
+    
+    def _log_decomposed_tasks(self, tasks: List[Dict[str, Any]]) -> None:
+        """生成されたタスクの詳細をログ出力"""
+        self.logger.info(f"✅ [LLMService] Tasks decomposed successfully: {len(tasks)} tasks")
+        for i, task in enumerate(tasks, 1):
+            self.logger.info(f"📋 [LLMService] Task {i}:")
+            self.logger.info(f"  Service: {task.get('service')}")
+            self.logger.info(f"  Method: {task.get('method')}")
+            self.logger.info(f"  Parameters: {task.get('parameters')}")
+            self.logger.info(f"  Dependencies: {task.get('dependencies')}")
+    
     async def format_response(
         self, 
         results: Dict[str, Any],
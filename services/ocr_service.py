@@ -10,8 +10,8 @@ import base64
 import json
 import re
 from typing import Dict, Any, List, Optional
-from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from config.clients import get_openai_client
 from config.loggers import GenericLogger
 
 load_dotenv()
@@ -29,7 +29,7 @@ class OCRService:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEYが設定されていません")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.client = get_openai_client()
         self.logger.info(f"✅ [OCR] OCRService initialized with model: {self.ocr_model}")
     
     async def analyze_receipt_image(
@@ -264,25 +264,34 @@ class OCRService:
             
             mapping_crud = OCRMappingCRUD()
             
+            # ユーザーの変換テーブルを一括取得（キャッシュ済みならDBアクセスなし）
+            mapping_result = await mapping_crud.get_user_mappings(client=client, user_id=user_id)
+            if not mapping_result.get("success"):
+                raise Exception(mapping_result.get("error", "Failed to load item mappings"))
+            
+            mappings = mapping_result["data"]
+            if not mappings:
+                return items
+            
+            # 正規化した元の名前でも照合できるよう索引を作成（完全一致を優先）
+            normalized_mappings = {}
+            for mapped_original_name, mapped_normalized_name in mappings.items():
+                normalized_mappings.setdefault(self.normalize_item_name(mapped_original_name), mapped_normalized_name)
+            
             # 各アイテムのitem_nameを変換テーブルで検索
             for item in items:
                 if "item_name" in item and item["item_name"]:
                     original_name = item["item_name"]
                     
-                    # 変換テーブルから取得
-                    mapping_result = await mapping_crud.get_mapping(
-                        client=client,
-                        user_id=user_id,
-                        original_name=original_name
-                    )
+                    normalized_name = mappings.get(original_name.strip())
+                    if normalized_name is None:
+                        normalized_name = normalized_mappings.get(self.normalize_item_name(original_name))
                     
-                    if mapping_result.get("success") and mapping_result.get("data"):
-                        normalized_name = mapping_result["data"]["normalized_name"]
-                        if original_name != normalized_name:
-                            self.logger.debug(
-                                f"🔧 [OCR] Applied mapping: '{original_name}' -> '{normalized_name}'"
-                            )
-                            item["item_name"] = normalized_name
+                    if normalized_name and original_name != normalized_name:
+                        self.logger.debug(
+                            f"🔧 [OCR] Applied mapping: '{original_name}' -> '{normalized_name}'"
+                        )
+                        item["item_name"] = normalized_name
                     
         except Exception as e:
             # 変換テーブル適用が失敗しても、既存の処理は継続
@@ -24,10 +24,15 @@ class ToolRouterError(Exception):
 class ToolRouter:
     """ツールルータ - MCPツールの自動ルーティング"""
     
-    def __init__(self):
-        """初期化"""
+    def __init__(self, mcp_client: Optional[MCPClient] = None):
+        """
+        初期化
+        
+        Args:
+            mcp_client: 共有するMCPクライアント（省略時は新規作成）
+        """
         # 既存のMCPクライアントを使用
-        self.mcp_client = MCPClient()
+        self.mcp_client = mcp_client or MCPClient()
         
         # MCP Clientのマッピングを参照（重複を排除）
         self.tool_server_mapping = self.mcp_client.tool_server_mapping
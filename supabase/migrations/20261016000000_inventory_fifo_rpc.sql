@@ -0,0 +1,87 @@
+-- Morizo AI v2 - 名前指定の最古/最新在庫の原子的な更新・削除
+--
+-- InventoryAdvanced.update_by_name_oldest / update_by_name_latest /
+-- delete_by_name_oldest / delete_by_name_latest から RPC で呼び出す。
+-- 対象行の選択（created_at順の先頭1件）と更新/削除を1回の呼び出し・1トランザクションで行い、
+-- FOR UPDATE SKIP LOCKED により同時実行中の別リクエストがロックしている行は飛ばして
+-- 次の候補を対象とする（同じ1件を二重に消費しない）。
+--
+-- SECURITY INVOKER のため inventory テーブルのRLS（auth.uid() = user_id）がそのまま適用される。
+
+-- 名前指定の最古/最新検索用インデックス
+CREATE INDEX IF NOT EXISTS idx_inventory_user_item_created_at
+    ON public.inventory (user_id, item_name, created_at);
+
+-- 最古（p_latest = false）または最新（p_latest = true）の在庫1件を更新
+-- p_updates: quantity / unit / storage_location / expiry_date のうち更新する項目のみを含むJSON
+CREATE OR REPLACE FUNCTION public.inventory_update_by_name_ordered(
+    p_user_id UUID,
+    p_item_name TEXT,
+    p_updates JSONB,
+    p_latest BOOLEAN DEFAULT FALSE
+)
+RETURNS SETOF public.inventory
+LANGUAGE sql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+    WITH target AS (
+        SELECT id
+        FROM public.inventory
+        WHERE user_id = p_user_id
+          AND item_name = p_item_name
+        ORDER BY
+            CASE WHEN p_latest THEN created_at END DESC,
+            CASE WHEN NOT p_latest THEN created_at END ASC,
+            id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE public.inventory AS i
+    SET
+        quantity = CASE WHEN p_updates ? 'quantity'
+            THEN (p_updates->>'quantity')::DECIMAL(10,2) ELSE i.quantity END,
+        unit = CASE WHEN p_updates ? 'unit'
+            THEN p_updates->>'unit' ELSE i.unit END,
+        storage_location = CASE WHEN p_updates ? 'storage_location'
+            THEN p_updates->>'storage_location' ELSE i.storage_location END,
+        expiry_date = CASE WHEN p_updates ? 'expiry_date'
+            THEN (p_updates->>'expiry_date')::DATE ELSE i.expiry_date END
+    FROM target
+    WHERE i.id = target.id
+    RETURNING i.*;
+$$;
+
+-- 最古（p_latest = false）または最新（p_latest = true）の在庫1件を削除
+CREATE OR REPLACE FUNCTION public.inventory_delete_by_name_ordered(
+    p_user_id UUID,
+    p_item_name TEXT,
+    p_latest BOOLEAN DEFAULT FALSE
+)
+RETURNS SETOF public.inventory
+LANGUAGE sql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+    WITH target AS (
+        SELECT id
+        FROM public.inventory
+        WHERE user_id = p_user_id
+          AND item_name = p_item_name
+        ORDER BY
+            CASE WHEN p_latest THEN created_at END DESC,
+            CASE WHEN NOT p_latest THEN created_at END ASC,
+            id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM public.inventory AS i
+    USING target
+    WHERE i.id = target.id
+    RETURNING i.*;
+$$;
+
+REVOKE ALL ON FUNCTION public.inventory_update_by_name_ordered(UUID, TEXT, JSONB, BOOLEAN) FROM PUBLIC;
+REVOKE ALL ON FUNCTION public.inventory_delete_by_name_ordered(UUID, TEXT, BOOLEAN) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.inventory_update_by_name_ordered(UUID, TEXT, JSONB, BOOLEAN) TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.inventory_delete_by_name_ordered(UUID, TEXT, BOOLEAN) TO authenticated, service_role;
@@ -0,0 +1,42 @@
+-- Morizo AI v2 - 在庫数量の一括反映（食材の使用・削除）
+--
+-- /api/recipe/ingredients/delete から InventoryCRUD.apply_quantity_changes 経由で RPC として呼び出す。
+-- 削除対象の一括削除と数量更新の一括反映を1回の呼び出し・1トランザクションで行う。
+-- 処理された在庫IDと処理内容（deleted / updated）を返す（該当しないIDは返らない）。
+--
+-- SECURITY INVOKER のため inventory テーブルのRLS（auth.uid() = user_id）がそのまま適用される。
+
+-- p_delete_ids: 削除する在庫IDの配列
+-- p_updates: 数量を更新する在庫の配列（[{"id": "...", "quantity": 1.5}, ...]）
+CREATE OR REPLACE FUNCTION public.inventory_apply_quantities(
+    p_user_id UUID,
+    p_delete_ids UUID[],
+    p_updates JSONB DEFAULT '[]'::JSONB
+)
+RETURNS TABLE (id UUID, action TEXT)
+LANGUAGE sql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+    WITH deleted AS (
+        DELETE FROM public.inventory AS i
+        WHERE i.user_id = p_user_id
+          AND i.id = ANY(p_delete_ids)
+        RETURNING i.id
+    ),
+    updated AS (
+        UPDATE public.inventory AS i
+        SET quantity = u.quantity
+        FROM jsonb_to_recordset(p_updates) AS u(id UUID, quantity DECIMAL(10,2))
+        WHERE i.user_id = p_user_id
+          AND i.id = u.id
+          AND NOT (i.id = ANY(p_delete_ids))
+        RETURNING i.id
+    )
+    SELECT deleted.id, 'deleted' FROM deleted
+    UNION ALL
+    SELECT updated.id, 'updated' FROM updated;
+$$;
+
+REVOKE ALL ON FUNCTION public.inventory_apply_quantities(UUID, UUID[], JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.inventory_apply_quantities(UUID, UUID[], JSONB) TO authenticated, service_role;
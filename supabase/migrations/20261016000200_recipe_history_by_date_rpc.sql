@@ -0,0 +1,85 @@
+-- Morizo AI v2 - 献立履歴の日付別集計（キーセットページネーション）
+--
+-- /api/menu/history から RecipeHistoryCRUD.get_histories_by_date 経由で RPC として呼び出す。
+-- 期間内のレシピ履歴を日付（UTC）ごとにまとめ、カテゴリ判定・カテゴリ絞り込み・
+-- ingredients_deleted の集計（その日のすべてのレシピがTRUEの場合のみTRUE）をDB側で行う。
+-- 各日付の最も古い (cooked_at, id) を次ページのカーソルとして返す。
+--
+-- SECURITY INVOKER のため recipe_historys テーブルのRLS（auth.uid() = user_id）がそのまま適用される。
+
+-- 期間指定・キーセットページネーション用（user_id + cooked_at降順 + id降順）
+CREATE INDEX IF NOT EXISTS idx_recipe_historys_user_cooked_at
+    ON public.recipe_historys (user_id, cooked_at DESC, id DESC);
+
+-- p_from / p_to: 期間（p_from以上、p_to未満。NULLの場合は制限なし）
+-- p_category: カテゴリ絞り込み（main / sub / soup。NULLの場合は全件）
+-- p_cursor_cooked_at / p_cursor_id: 前ページの最後の日付のカーソル（これより古い履歴を返す）
+-- p_limit: 返す日付の最大数（NULLの場合は制限なし）
+CREATE OR REPLACE FUNCTION public.recipe_history_by_date(
+    p_user_id UUID,
+    p_from TIMESTAMPTZ DEFAULT NULL,
+    p_to TIMESTAMPTZ DEFAULT NULL,
+    p_category TEXT DEFAULT NULL,
+    p_cursor_cooked_at TIMESTAMPTZ DEFAULT NULL,
+    p_cursor_id UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    cooked_date DATE,
+    recipes JSONB,
+    ingredients_deleted BOOLEAN,
+    cursor_cooked_at TIMESTAMPTZ,
+    cursor_id UUID
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+    WITH histories AS (
+        SELECT
+            h.id,
+            h.title,
+            h.source,
+            h.url,
+            h.cooked_at,
+            h.ingredients_deleted,
+            (h.cooked_at AT TIME ZONE 'UTC')::DATE AS history_date,
+            CASE
+                WHEN starts_with(h.title, '主菜: ') THEN 'main'
+                WHEN starts_with(h.title, '副菜: ') THEN 'sub'
+                WHEN starts_with(h.title, '汁物: ') THEN 'soup'
+            END AS category
+        FROM public.recipe_historys AS h
+        WHERE h.user_id = p_user_id
+          AND h.cooked_at IS NOT NULL
+          AND (p_from IS NULL OR h.cooked_at >= p_from)
+          AND (p_to IS NULL OR h.cooked_at < p_to)
+          AND (p_cursor_cooked_at IS NULL OR (h.cooked_at, h.id) < (p_cursor_cooked_at, p_cursor_id))
+    )
+    SELECT
+        histories.history_date,
+        COALESCE(
+            jsonb_agg(
+                jsonb_build_object(
+                    'category', histories.category,
+                    'title', histories.title,
+                    'source', COALESCE(histories.source, 'web'),
+                    'url', histories.url,
+                    'history_id', histories.id
+                )
+                ORDER BY histories.cooked_at DESC, histories.id DESC
+            ) FILTER (WHERE p_category IS NULL OR histories.category = p_category),
+            '[]'::JSONB
+        ),
+        bool_and(COALESCE(histories.ingredients_deleted, FALSE)),
+        MIN(histories.cooked_at),
+        (array_agg(histories.id ORDER BY histories.cooked_at, histories.id))[1]
+    FROM histories
+    GROUP BY histories.history_date
+    ORDER BY histories.history_date DESC
+    LIMIT p_limit;
+$$;
+
+REVOKE ALL ON FUNCTION public.recipe_history_by_date(UUID, TIMESTAMPTZ, TIMESTAMPTZ, TEXT, TIMESTAMPTZ, UUID, INTEGER) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.recipe_history_by_date(UUID, TIMESTAMPTZ, TIMESTAMPTZ, TEXT, TIMESTAMPTZ, UUID, INTEGER) TO authenticated, service_role;